@@ -11,10 +11,12 @@ import sys
 
 import rospy
 from turtle_frame import TurtleFrame
+from turtle_world import TurtleWorld
 
-
-BASE_PATH = os.path.expanduser("~/ros")
-STOP_FILE_PATH = os.path.join(BASE_PATH, "STOP")
+# The STOP watch is shared with the nodes of the turtlesim_expl package
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "turtlesim_expl", "src"))
+# pylint: disable-msg=C0413; (Import should be placed at the top)
+from stop_watch import StopWatch
 
 
 class Turtlesim(object):
@@ -38,9 +40,30 @@ class Turtlesim(object):
 		# pylint: disable-msg=W0612; (Unused variable - need to hold reference)
 		frame = TurtleFrame(draw_gui, intrusion)
 
-		# Block until shut down and check for stop file every ten seconds
+		self._block()
+
+
+	def execute_world(self, vehicles, pose_rate_in_hz, colour_rate_in_hz):
+		""" Run the simulation of all given vehicles in one batched world. """
+
+		rospy.loginfo("Starting turtle world with %s vehicles and pose/colour rates [%s/%s Hz]",
+			len(vehicles), pose_rate_in_hz, colour_rate_in_hz)
+
+		# pylint: disable-msg=W0612; (Unused variable - need to hold reference)
+		world = TurtleWorld(vehicles, pose_rate_in_hz, colour_rate_in_hz)
+
+		self._block()
+
+
+	# pylint: disable-msg=R0201; (Method could be a function)
+	def _block(self):
+		""" Block until shut down or stopped. """
+
+		stop_watch = StopWatch.get_shared()
+
+		# Block until shut down or stopped
 		while not rospy.is_shutdown():
-			if os.path.lexists(STOP_FILE_PATH):
+			if stop_watch.is_set():
 				rospy.logerr("!!! STOP FILE DETECTED !!! KILLED !!!")
 				break
 
@@ -48,13 +71,41 @@ class Turtlesim(object):
 
 
 
+def parse_vehicle(spec):
+	""" Parse a VIN[:INTRUSION] world vehicle definition into (vin, intrusion or None). """
+
+	vin, _, intrusion = spec.partition(":")
+
+	if not vin:
+		raise argparse.ArgumentTypeError("Missing VIN in vehicle definition \"{}\"".format(spec))
+
+	if intrusion and intrusion not in TurtleFrame.POSSIBLE_INTRUSION_LEVELS:
+		raise argparse.ArgumentTypeError("Invalid intrusion level in vehicle definition \"{}\"".format(spec))
+
+	return (vin, intrusion or None)
+
+
+
 if __name__ == "__main__":
 	PARSER = argparse.ArgumentParser(prog="tf")
 	PARSER.add_argument("--draw-gui", "-g", action="store_true", dest="draw_gui")
 	PARSER.add_argument("--intrusion", "-i", choices=TurtleFrame.POSSIBLE_INTRUSION_LEVELS)
+	PARSER.add_argument("--world", "-w", nargs="+", type=parse_vehicle, metavar="VIN[:INTRUSION]",
+		help="Simulate the turtles of all given vehicles batched in one process (topics /VIN/turtle/turtle1/...)")
+	PARSER.add_argument("--pose-rate", type=float, default=TurtleWorld.DEFAULT_POSE_RATE_IN_HZ, metavar="HZ",
+		help="World mode: Pose messages per turtle and second, 0 for every step (default: %(default).2f)")
+	PARSER.add_argument("--colour-rate", type=float, default=TurtleWorld.DEFAULT_COLOUR_RATE_IN_HZ,
+		metavar="HZ", help="World mode: Colour messages per turtle and second, 0 for every step "
+		"(default: %(default).2f)")
 	# Remove remapping arguments and program name
 	FILTERED_ARGV = rospy.myargv(sys.argv)[1:]
 	ARGS = PARSER.parse_args(FILTERED_ARGV)
 
+	if ARGS.world and (ARGS.draw_gui or ARGS.intrusion):
+		PARSER.error("--draw-gui and --intrusion can't be used with --world")
+
 	SIM = Turtlesim()
-	SIM.execute(ARGS.draw_gui, ARGS.intrusion)
+	if ARGS.world:
+		SIM.execute_world(ARGS.world, ARGS.pose_rate, ARGS.colour_rate)
+	else:
+		SIM.execute(ARGS.draw_gui, ARGS.intrusion)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+""" Letter-per-cell terminal output of the turtle frame """
+
+import fcntl
+import os
+import signal
+import struct
+import sys
+import termios
+
+import numpy
+
+
+class TerminalRenderer(object):
+	"""
+	Draws the background downscaled to a square of <rows> x <rows> letters with the turtles on top.
+	The full screen is only drawn initially and after a resize - afterwards only the cells
+	around moved turtles are rewritten with cursor moves. Each frame is a single write.
+	"""
+
+	UNKNOWN_LETTER = "?"
+	TURTLE_LETTER = " "
+
+
+	def __init__(self, background, letters, output=None, size=None):
+		"""
+		Ctor
+		*background: (width, height, 3) array of RGB pixels
+		*letters: List of (Rgb, letter) tuples; other colours are drawn as "?"
+		*output: Stream to write to (default: stdout)
+		*size: Fixed size in cells; None follows the terminal and must be created on the main thread.
+		"""
+
+		object.__init__(self)
+
+		self._background = background
+		self._letters = letters
+		self._output = output or sys.stdout
+
+		self._size = size
+		self._resized = size is None
+		# Downscaled background letters, [x][y] - computed per size
+		self._cells = None
+		self._scale = None
+		# { label : (cell x, cell y) } of the last frame
+		self._turtle_cells = {}
+
+		if size is None:
+			signal.signal(signal.SIGWINCH, self._on_resize)
+
+
+	def render(self, turtles):
+		"""
+		Draw the given turtles.
+		*turtles: List of (label, x, y) tuples in background coordinates
+		"""
+
+		full = self._cells is None or self._resized
+		if self._resized:
+			self._resized = False
+			self._size = self._read_terminal_size()
+		if full:
+			self._precompute()
+
+		if self._size <= 0:
+			return
+
+		turtle_cells = {}
+		for label, trt_x, trt_y in turtles:
+			turtle_cells[label] = (int(trt_x / self._scale), int(trt_y / self._scale))
+
+		if full:
+			frame = self._draw_full(turtle_cells)
+		else:
+			frame = self._draw_changes(turtle_cells)
+
+		self._turtle_cells = turtle_cells
+
+		if not frame:
+			return
+
+		# Park the cursor below the field
+		frame += "\x1b[{};1H".format(self._size + 1)
+		self._output.write(frame)
+		self._output.flush()
+
+
+	def _on_resize(self, _, __):
+		""" SIGWINCH handler: Re-read the size before the next frame. """
+		self._resized = True
+
+
+	def _precompute(self):
+		""" Downscale the background to one letter per cell. """
+
+		if self._size <= 0:
+			self._cells = []
+			return
+
+		width = self._background.shape[0]
+		self._scale = float(width) / self._size
+
+		indices = (numpy.arange(self._size) * self._scale).astype(int)
+		sample = self._background[indices][:, indices]
+
+		cells = numpy.full((self._size, self._size), TerminalRenderer.UNKNOWN_LETTER, dtype="S1")
+		for rgb, letter in self._letters:
+			cells[numpy.all(sample == (rgb.r, rgb.g, rgb.b), axis=2)] = letter
+
+		self._cells = cells.tolist()
+
+
+	def _draw_full(self, turtle_cells):
+		""" Clear the screen and draw all cells. """
+
+		overlay = self._create_overlay(turtle_cells)
+
+		lines = ["\x1b[2J\x1b[H"]
+		# We draw from top left (0,size-1) to bottom right (size-1,0)
+		for cell_y in range(self._size - 1, -1, -1):
+			lines.append(" ".join(
+				overlay.get((cell_x, cell_y)) or self._cells[cell_x][cell_y]
+				for cell_x in range(self._size)))
+			lines.append(" \n")
+
+		return "".join(lines)
+
+
+	def _draw_changes(self, turtle_cells):
+		""" Redraw the cells around turtles that left or entered a cell. """
+
+		dirty = set()
+		for label in set(self._turtle_cells) | set(turtle_cells):
+			old_cell = self._turtle_cells.get(label)
+			new_cell = turtle_cells.get(label)
+			if old_cell == new_cell:
+				continue
+			for cell in (old_cell, new_cell):
+				if cell is not None:
+					dirty.update(self._get_neighbourhood(cell))
+
+		if not dirty:
+			return ""
+
+		overlay = self._create_overlay(turtle_cells)
+
+		parts = []
+		for cell_x, cell_y in sorted(dirty):
+			letter = overlay.get((cell_x, cell_y)) or self._cells[cell_x][cell_y]
+			# Screen rows start at 1 on the top, every cell is a letter and a space wide
+			parts.append("\x1b[{};{}H{}".format(self._size - cell_y, cell_x * 2 + 1, letter))
+
+		return "".join(parts)
+
+
+	def _create_overlay(self, turtle_cells):
+		""" Map the cells covered by turtles to their letters: the label with a blank border. """
+
+		overlay = {}
+		for cell in turtle_cells.values():
+			for neighbour in self._get_neighbourhood(cell):
+				overlay[neighbour] = TerminalRenderer.TURTLE_LETTER
+
+		for label, cell in turtle_cells.items():
+			overlay[cell] = label
+
+		return overlay
+
+
+	def _get_neighbourhood(self, cell):
+		""" The cell and its (up to) eight neighbours inside the field. """
+
+		cell_x, cell_y = cell
+		return [(x, y)
+			for x in range(max(cell_x - 1, 0), min(cell_x + 2, self._size))
+			for y in range(max(cell_y - 1, 0), min(cell_y + 2, self._size))]
+
+
+	def _read_terminal_size(self):
+		""" Get the number of terminal rows - 0 if the output isn't a terminal. """
+
+		try:
+			packed = fcntl.ioctl(self._output.fileno(), termios.TIOCGWINSZ, "\0" * 8)
+			rows, _, _, _ = struct.unpack("hhhh", packed)
+			return rows
+		except (AttributeError, IOError, ValueError):
+			pass
+
+		try:
+			rows, _ = os.popen("stty size", "r").read().split()
+			return int(rows)
+		except ValueError:
+			return 0
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+""" Unit tests for the TerminalRenderer class """
+
+import StringIO
+import unittest
+
+import numpy
+
+from terminal_renderer import TerminalRenderer
+from util.rgb import Rgb
+
+
+class Tests(unittest.TestCase):
+	""" All tests """
+
+	def test_render(self):
+		""" The first frame draws the whole field, later frames only the cells around moved turtles """
+
+		background = numpy.zeros((100, 100, 3), dtype=numpy.uint8)
+		background[:50, :] = (Rgb.pastel_green().r, Rgb.pastel_green().g, Rgb.pastel_green().b)
+		output = StringIO.StringIO()
+		renderer = TerminalRenderer(background, [(Rgb.pastel_green(), "g")], output=output, size=10)
+
+		renderer.render([("1", 0, 0)])
+		lines = output.getvalue().split("\n")
+		self.assertEqual(lines[0], "\x1b[2J\x1b[Hg g g g g ? ? ? ? ? ")
+		self.assertEqual(lines[8], "    g g g ? ? ? ? ? ")
+		self.assertEqual(lines[9], "1   g g g ? ? ? ? ? ")
+
+		output.truncate(0)
+		renderer.render([("1", 5, 5)])
+		self.assertEqual(output.getvalue(), "")
+
+		renderer.render([("1", 15, 0)])
+		frame = output.getvalue()
+		# The turtle moved to cell 1,0: Cell 0,0 becomes border and cell 2,0 is newly covered
+		self.assertIn("\x1b[10;1H ", frame)
+		self.assertIn("\x1b[10;3H1", frame)
+		self.assertIn("\x1b[10;5H ", frame)
+		self.assertNotIn("\x1b[2J", frame)
+
+
+if __name__ == "__main__":
+	unittest.main()
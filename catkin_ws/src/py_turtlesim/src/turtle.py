@@ -19,6 +19,7 @@ from turtlesim.msg import Pose, Color
 
 from util.point import Point
 from util.point_f import PointF
+from util.rgb import Rgb
 
 DEFAULT_PEN_R = 0xb3
 DEFAULT_PEN_G = 0xb8
@@ -91,7 +92,7 @@ class Turtle(object):
 
 		# Figure out (and publish) the color underneath the turtle
 		colour = Color()
-		rgb = background[self.pos.x][self.pos.y]
+		rgb = Rgb.from_pixel(background[self.pos.x, self.pos.y])
 		colour.r = rgb.r
 		colour.g = rgb.g
 		colour.b = rgb.b
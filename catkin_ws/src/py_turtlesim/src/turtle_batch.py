@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+""" State of many turtles, stepped together on NumPy arrays """
+
+import numpy
+
+
+class TurtleBatch(object):
+	"""
+	Positions and velocities of many turtles on their backgrounds.
+	step() has the semantics of Turtle.update for all turtles at once.
+	"""
+
+	# Movement commands are only valid for one second
+	COMMAND_TIMEOUT = 1.0
+
+
+	def __init__(self, backgrounds, background_indices, positions):
+		"""
+		Ctor
+		*backgrounds: (count, width, height, 3) array of RGB pixels
+		*background_indices: Index of the background of each turtle
+		*positions: Initial (x, y) position of each turtle
+		"""
+
+		object.__init__(self)
+
+		if len(background_indices) != len(positions):
+			raise ValueError("Got {} background indices for {} turtles".format(
+				len(background_indices), len(positions)))
+
+		self._backgrounds = backgrounds
+		self._background_indices = numpy.array(background_indices, dtype=int)
+
+		self._width = backgrounds.shape[1]
+		self._height = backgrounds.shape[2]
+
+		# Per-turtle state tables
+		self._positions_f = numpy.array(positions, dtype=float).reshape((len(positions), 2))
+		self._positions = self._positions_f.astype(int)
+		self._velocities = numpy.zeros((len(positions), 2))
+		self._command_times = numpy.zeros(len(positions))
+
+
+	def __len__(self):
+		return len(self._positions)
+
+
+	def set_velocity(self, index, x_vel, y_vel, time_now):
+		""" Set the velocity of the given turtle, valid for COMMAND_TIMEOUT seconds from <time_now>. """
+
+		self._command_times[index] = time_now
+		self._velocities[index] = (x_vel, y_vel)
+
+
+	def step(self, dtime, time_now):
+		""" Move all turtles by their velocities and clamp their positions to the background. """
+
+		self._velocities[time_now - self._command_times > TurtleBatch.COMMAND_TIMEOUT] = 0
+
+		self._positions_f += self._velocities * dtime
+
+		# As in Turtle.update: The float position isn't clamped, only the integer one
+		positions = self._positions_f.astype(int)
+		numpy.clip(positions[:, 0], 0, self._width - 1, out=positions[:, 0])
+		numpy.clip(positions[:, 1], 0, self._height - 1, out=positions[:, 1])
+		self._positions = positions
+
+
+	def get_positions(self, indices=None):
+		""" Get a copy of the (x, y) positions of the given turtles (default: all). """
+
+		if indices is None:
+			return self._positions.copy()
+
+		return self._positions[indices]
+
+
+	def get_colours(self, indices=None):
+		""" Get the (r, g, b) background colours underneath the given turtles (default: all). """
+
+		if indices is None:
+			indices = numpy.arange(len(self))
+
+		positions = self._positions[indices]
+		return self._backgrounds[self._background_indices[indices], positions[:, 0], positions[:, 1]]
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+""" Unit tests for the TurtleBatch class """
+
+import unittest
+
+import numpy
+
+from turtle_batch import TurtleBatch
+
+
+class Tests(unittest.TestCase):
+	""" All tests """
+
+	def test_step(self):
+		""" Turtles move by their velocities, clamp to the background and stop on old commands """
+
+		backgrounds = numpy.zeros((2, 100, 100, 3), dtype=numpy.uint8)
+		backgrounds[0, 50:, :] = (1, 2, 3)
+		backgrounds[1, :, :] = (255, 0, 0)
+
+		batch = TurtleBatch(backgrounds, [0, 1, 0], [(10, 10), (10, 10), (98, 3)])
+		batch.set_velocity(0, 100, -1000, time_now=99.5)
+		batch.set_velocity(1, 1, 1, time_now=98)
+		batch.set_velocity(2, 200, 0, time_now=99.9)
+
+		batch.step(0.016, time_now=100)
+
+		# Turtle 1's command timed out, turtle 0 is clamped in y and turtle 2 in x
+		self.assertEqual(batch.get_positions().tolist(), [[11, 0], [10, 10], [99, 3]])
+		self.assertEqual(batch.get_colours().tolist(), [[0, 0, 0], [255, 0, 0], [1, 2, 3]])
+		self.assertEqual(batch.get_colours([2]).tolist(), [[1, 2, 3]])
+
+		# The float position isn't clamped: Turtle 0 is at y = -6 and has to come back before moving up
+		batch.set_velocity(0, 0, 1000, time_now=100)
+		batch.step(0.0065, time_now=100)
+		self.assertEqual(batch.get_positions([0]).tolist(), [[11, 0]])
+		batch.step(0.001, time_now=100)
+		self.assertEqual(batch.get_positions([0]).tolist(), [[11, 1]])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -19,10 +19,11 @@ Rebuilding turtle_frame.cpp in Python
 # pylint: disable-msg=R0903; (Too few public methods)
 
 
-import os
 import random
+from terminal_renderer import TerminalRenderer
 from turtle import Turtle
 
+import numpy
 import rospy
 from util.rgb import Rgb
 from util.point import Point
@@ -44,15 +45,10 @@ class TurtleFrame(object):
 		object.__init__(self)
 
 		self._has_gui = draw_gui
-		self._gui_size = 0
 		self._frame_count = 0
-		self._gui_output = None
+		self._renderer = None
 
-		# Initialise background (500 x 500)
-		self._background = [
-			[Rgb(DEFAULT_BG_R, DEFAULT_BG_G, DEFAULT_BG_B) for _ in range(0, 500)]
-			for _ in range(0, 500)
-		]
+		self._background = TurtleFrame.create_background(intrusion)
 		self._turtles = {}
 
 		self._id_counter = 0
@@ -69,41 +65,54 @@ class TurtleFrame(object):
 
 		self._spawn_turtle(trt_x, trt_y)
 
+		# Initialise GUI (if requested)
+		if self._has_gui:
+			self._renderer = TerminalRenderer(self._background, self._get_output_letters())
+		self._redraw()
+
+		# Initialise update timer (16 msec)
+		self._update_interval = rospy.Duration(0.016)
+		rospy.Timer(self._update_interval, self._update_turtles)
+
+
+	@staticmethod
+	def create_background(intrusion=None):
+		""" Create the coloured background (500 x 500, RGB per pixel) for the given intrusion level. """
+
+		background = numpy.empty((500, 500, 3), dtype=numpy.uint8)
+		background[:, :] = (DEFAULT_BG_R, DEFAULT_BG_G, DEFAULT_BG_B)
+
 		# Colouring the background
 		# Window is 500 x 500, starting bottom left at 0,0 and ending top right at 499,499
 
 		# Top left: Pastel purple
-		self._draw_area(Rgb.pastel_purple(), Point(0, 250), Point(249, 499))
+		TurtleFrame._draw_area(background, Rgb.pastel_purple(), Point(0, 250), Point(249, 499))
 		# Top right: Pastel yellow
-		self._draw_area(Rgb.pastel_yellow(), Point(250, 250), Point(499, 499))
+		TurtleFrame._draw_area(background, Rgb.pastel_yellow(), Point(250, 250), Point(499, 499))
 		# Bottom left: Pastel green
-		self._draw_area(Rgb.pastel_green(), Point(0, 0), Point(249, 249))
+		TurtleFrame._draw_area(background, Rgb.pastel_green(), Point(0, 0), Point(249, 249))
 		# Bottom right: Pastel blue
-		self._draw_area(Rgb.pastel_blue(), Point(250, 0), Point(499, 249))
+		TurtleFrame._draw_area(background, Rgb.pastel_blue(), Point(250, 0), Point(499, 249))
 		# Intrusion zone (middle): Red
-		self._draw_red(intrusion)
+		TurtleFrame._draw_red(background, intrusion)
 
-		# Initialise GUI (if requested)
-		self._redraw()
-
-		# Initialise update timer (16 msec)
-		self._update_interval = rospy.Duration(0.016)
-		rospy.Timer(self._update_interval, self._update_turtles)
+		return background
 
 
 	def get_width(self):
 		""" Get the current background width. """
-		return len(self._background) if self._background else 0
+		return self._background.shape[0]
 
 
 	def get_height(self):
 		""" Get the current background height. """
-		return len(self._background[0]) if self.get_width() > 0 and self._background[0] else 0
+		return self._background.shape[1]
 
 
-	def _draw_area(self, colour, from_point, to_point):
+	@staticmethod
+	def _draw_area(background, colour, from_point, to_point):
 		"""
-		Draw defined area in defined colour.\n
+		Draw defined area in defined colour on the given background.\n
 		colour: Instance of Rgb class\n
 		top_left/bottom_right: Instances of Point class
 		"""
@@ -121,39 +130,37 @@ class TurtleFrame(object):
 		# BL x, TR y      === TR ===
 		# === BL ===      TR x, BL y
 
-		# pylint: disable-msg=C0103; (Invalid variable names x, y)
-		for x in range(from_x, to_x + 1):
-			for y in range(from_y, to_y + 1):
-				self._background[x][y] = colour
+		background[from_x:to_x + 1, from_y:to_y + 1] = (colour.r, colour.g, colour.b)
 
 
-	def _draw_red(self, intrusion):
+	@staticmethod
+	def _draw_red(background, intrusion):
 		""" Draw a red area in the center based on the intrusion level. """
 
 		if intrusion is None:
 			return
 
-		if intrusion not in self.POSSIBLE_INTRUSION_LEVELS:
+		if intrusion not in TurtleFrame.POSSIBLE_INTRUSION_LEVELS:
 			raise ValueError("Given value [{}] for argument \"intrusion\" is invalid".format(intrusion))
 
 		from_point = Point(0, 0)
 		to_point = Point(0, 0)
 		colour = Rgb()
 
-		assert(len(self.POSSIBLE_INTRUSION_LEVELS) == 3)
+		assert(len(TurtleFrame.POSSIBLE_INTRUSION_LEVELS) == 3)
 
 		# Easy: 40 % strong_red / 316 * 316
-		if intrusion == self.POSSIBLE_INTRUSION_LEVELS[0]:
+		if intrusion == TurtleFrame.POSSIBLE_INTRUSION_LEVELS[0]:
 			from_point = Point(92, 92)
 			to_point = Point(407, 407)
 			colour = Rgb.strong_red()
 		# Medium: 20 % med_red / 224 * 224
-		elif intrusion == self.POSSIBLE_INTRUSION_LEVELS[1]:
+		elif intrusion == TurtleFrame.POSSIBLE_INTRUSION_LEVELS[1]:
 			from_point = Point(138, 138)
 			to_point = Point(361, 361)
 			colour = Rgb.med_red()
 		# Hard: 5 % light_red / 112 * 112
-		elif intrusion == self.POSSIBLE_INTRUSION_LEVELS[2]:
+		elif intrusion == TurtleFrame.POSSIBLE_INTRUSION_LEVELS[2]:
 			from_point = Point(194, 194)
 			to_point = Point(305, 305)
 			colour = Rgb.light_red()
@@ -164,7 +171,7 @@ class TurtleFrame(object):
 		from_point = Point(0, 0)
 		to_point = Point(499, 499)
 
-		self._draw_area(colour, from_point, to_point)
+		TurtleFrame._draw_area(background, colour, from_point, to_point)
 
 
 	def _spawn_turtle(self, trt_x, trt_y, name=None):
@@ -215,64 +222,23 @@ class TurtleFrame(object):
 
 
 	def _redraw(self):
-		""" Draw an updated GUI output. """
+		""" Draw an updated GUI output. Turtles are marked with their index. """
 
 		if not self._has_gui:
 			return
 
-		rows, _ = os.popen('stty size', 'r').read().split()
-		self._gui_size = int(rows)
-
-		if self._gui_output is None or len(self._gui_output) != self._gui_size:
-			self._gui_output = [["" for _ in range(0, self._gui_size)] for _ in range(0, self._gui_size)]
-
-		self._update_output()
-
-		os.system("clear")
-
-		# pylint: disable-msg=C0103; (Invalid variable names x, y)
-		# We draw from top left (0,49) to bottom right (49,0)
-		for y in range(self._gui_size - 1, -1, -1):
-			line_output = ""
-			for x in range(0, self._gui_size):
-				line_output += self._gui_output[x][y] + " "
-			print(line_output)
-
-
-	def _update_output(self):
-		""" Update the GUI output in scale of self._gui_size. Turtle is marked with index. """
-
-		scale = min(self.get_height(), float(self.get_height()) / self._gui_size)
-
-		# pylint: disable-msg=C0103; (Invalid variable names x, y)
-		for x in range(0, self._gui_size):
-			for y in range(0, self._gui_size):
-				self._gui_output[x][y] = self._get_output_letter(
-					self._background[int(x * scale)][int(y * scale)])
-
-		for name, turtle in self._turtles.items():
-			trt_x = int(turtle.pos.x / scale)
-			trt_y = int(turtle.pos.y / scale)
-			for x in range(max(trt_x-1, 0), min(trt_x+2, self._gui_size)):
-				for y in range(max(trt_y-1, 0), min(trt_y+2, self._gui_size)):
-					self._gui_output[x][y] = " "
-
-			self._gui_output[trt_x][trt_y] = str(self._turtles.keys().index(name) + 1)
+		self._renderer.render([(str(index + 1), turtle.pos.x, turtle.pos.y)
+			for index, turtle in enumerate(self._turtles.values())])
 
 
 	@staticmethod
-	def _get_output_letter(rgb):
-		""" Produce a letter for the given Rgb. Returns "?" for unknown colours. """
-
-		if rgb == Rgb.pastel_purple():
-			return "p"
-		elif rgb == Rgb.pastel_yellow():
-			return "y"
-		elif rgb == Rgb.pastel_green():
-			return "g"
-		elif rgb == Rgb.pastel_blue():
-			return "b"
-		elif rgb == Rgb.strong_red():
-			return " "
-
-		return "?"
+	def _get_output_letters():
+		""" Produce the letters for the background colours. Other colours are shown as "?". """
+
+		return [
+			(Rgb.pastel_purple(), "p"),
+			(Rgb.pastel_yellow(), "y"),
+			(Rgb.pastel_green(), "g"),
+			(Rgb.pastel_blue(), "b"),
+			(Rgb.strong_red(), " ")
+		]
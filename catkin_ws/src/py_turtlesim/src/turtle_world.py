@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Batched simulation of many turtles (one per vehicle namespace) in one process
+"""
+
+# pylint: disable-msg=R0903; (Too few public methods)
+
+import random
+
+import numpy
+import rospy
+from geometry_msgs.msg import Twist
+from turtlesim.msg import Pose, Color
+
+from turtle_batch import TurtleBatch
+from turtle_frame import TurtleFrame, DEFAULT_BG_R, DEFAULT_BG_G, DEFAULT_BG_B
+
+
+class TurtleWorld(object):
+	"""
+	Simulates one turtle per vehicle with the topics a TurtleFrame in <VIN>/turtle would have.
+	All turtles are stepped together in a TurtleBatch.
+	"""
+
+	TURTLE_PATH = "/{}/turtle/turtle1/"
+
+	# A TurtleFrame publishes every 16 ms step, so the loggers (pose: 0.1 s, colour: 0.7 s limit)
+	# log poses every 112 ms and colours every 704 ms. Every 7th step (112 ms) for poses and every
+	# 4th step (64 ms) for colours keeps both intervals with a fifth of the messages.
+	DEFAULT_POSE_RATE_IN_HZ = 1 / 0.112
+	DEFAULT_COLOUR_RATE_IN_HZ = 1 / 0.064
+
+
+	def __init__(self, vehicles, pose_rate_in_hz=DEFAULT_POSE_RATE_IN_HZ,
+		colour_rate_in_hz=DEFAULT_COLOUR_RATE_IN_HZ):
+		"""
+		Ctor
+		*vehicles: List of (vin, intrusion level or None) tuples
+		*pose_rate_in_hz: Rate of pose messages per turtle; 0 publishes every step like a TurtleFrame.
+		Other rates than the default change how many poses the rate-limited loggers log.
+		*colour_rate_in_hz: Rate of colour messages per turtle, see <pose_rate_in_hz>.
+		"""
+
+		object.__init__(self)
+
+		if not vehicles:
+			raise ValueError("At least one vehicle is needed!")
+
+		if pose_rate_in_hz < 0 or colour_rate_in_hz < 0:
+			raise ValueError("Publish rates can't be negative!")
+
+		count = len(vehicles)
+
+		# One background per intrusion level in use, selected per turtle by index
+		intrusions = sorted(set(intrusion for _, intrusion in vehicles))
+		backgrounds = numpy.stack([TurtleFrame.create_background(intrusion) for intrusion in intrusions])
+		width = backgrounds.shape[1]
+		height = backgrounds.shape[2]
+
+		self._batch = TurtleBatch(
+			backgrounds,
+			[intrusions.index(intrusion) for _, intrusion in vehicles],
+			[(random.randrange(0, width), random.randrange(0, height)) for _ in range(count)])
+
+		rospy.set_param("background_r", DEFAULT_BG_R)
+		rospy.set_param("background_g", DEFAULT_BG_G)
+		rospy.set_param("background_b", DEFAULT_BG_B)
+
+		self._pose_pubs = []
+		self._colour_pubs = []
+
+		for index, (vin, _) in enumerate(vehicles):
+			path = TurtleWorld.TURTLE_PATH.format(vin)
+			rospy.Subscriber(path + "cmd_vel", Twist, self._velocity_callback, index)
+			self._pose_pubs.append(rospy.Publisher(path + "pose", Pose, queue_size=10))
+			self._colour_pubs.append(rospy.Publisher(path + "color_sensor", Color, queue_size=10))
+
+		# Initialise update timer (16 msec)
+		self._update_interval = rospy.Duration(0.016)
+
+		# Publish every <n>th step, spread over the steps by turtle
+		self._pose_every = self._get_steps_per_message(pose_rate_in_hz)
+		self._colour_every = self._get_steps_per_message(colour_rate_in_hz)
+		self._pose_offsets = numpy.arange(count) % self._pose_every
+		self._colour_offsets = numpy.arange(count) % self._colour_every
+		self._step_count = 0
+
+		rospy.Timer(self._update_interval, self._update_turtles)
+
+
+	def _get_steps_per_message(self, rate_in_hz):
+		""" Get the number of steps between two messages of the given rate - at least one. """
+
+		if rate_in_hz == 0:
+			return 1
+
+		steps_per_second = 1.0 / self._update_interval.to_sec()
+		return max(1, int(round(steps_per_second / rate_in_hz)))
+
+
+	def _velocity_callback(self, data, index):
+		""" Set the velocity of the given turtle based on the callback. """
+		self._batch.set_velocity(index, data.linear.x, data.linear.y, rospy.get_time())
+
+
+	def _update_turtles(self, _):
+		""" Update callback: Step all turtles and publish the due poses and colours. """
+
+		self._batch.step(self._update_interval.to_sec(), rospy.get_time())
+
+		poses_due = numpy.flatnonzero(self._pose_offsets == self._step_count % self._pose_every)
+		colours_due = numpy.flatnonzero(self._colour_offsets == self._step_count % self._colour_every)
+		self._step_count += 1
+
+		self._publish_poses(poses_due)
+		self._publish_colours(colours_due)
+
+
+	def _publish_poses(self, indices):
+		""" Publish the poses of the given turtles, skipping topics nobody subscribed to. """
+
+		positions = self._batch.get_positions(indices).tolist()
+
+		for index, (pos_x, pos_y) in zip(indices, positions):
+			if self._pose_pubs[index].get_num_connections() > 0:
+				self._pose_pubs[index].publish(Pose(x=pos_x, y=pos_y))
+
+
+	def _publish_colours(self, indices):
+		""" Publish the colours underneath the given turtles, skipping topics nobody subscribed to. """
+
+		colours = self._batch.get_colours(indices).tolist()
+
+		for index, (red, green, blue) in zip(indices, colours):
+			if self._colour_pubs[index].get_num_connections() > 0:
+				self._colour_pubs[index].publish(Color(r=red, g=green, b=blue))
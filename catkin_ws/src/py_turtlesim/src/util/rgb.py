@@ -28,6 +28,12 @@ class Rgb(object):
 		return not self.__eq__(other)
 
 
+	@staticmethod
+	def from_pixel(pixel):
+		""" Create an Rgb object from a (r, g, b) pixel of a numpy background. """
+		return Rgb(r=int(pixel[0]), g=int(pixel[1]), b=int(pixel[2]))
+
+
 	@staticmethod
 	def pastel_purple():
 		""" Return a pastel purple Rgb object. """
@@ -14,6 +14,9 @@ class DistributionGenerator(object):
 
 	LEVELS = ["easy", "med", "hard"]
 
+	# Number of values drawn at once in buffered mode
+	BLOCK_SIZE = 4096
+
 
 	def __init__(self,
 		method_name, name, args_constraints, expected_range, mean,
@@ -37,11 +40,19 @@ class DistributionGenerator(object):
 		self._mean = mean
 		self._set_intrusion_parameters()
 		self._intrusion_level = None
+		self._intrusion_mode = None
 
 		self.generate = self._generate_impl
 
+		# Buffered mode: Validated values, current block and index of its next value
+		self._buffered_values = None
+		self._block_size = None
+		self._buffer = None
+		self._buffer_index = 0
+
 		# pylint: disable-msg=E1101; (Module has no '...' member)
 		self.np_rand = numpy.random.RandomState()
+		self._method_name = method_name
 		self._method = getattr(self.np_rand, method_name)
 
 		self._intrusion_generators = {
@@ -97,17 +108,50 @@ class DistributionGenerator(object):
 		if intrusion_level not in DistributionGenerator.LEVELS:
 			raise ValueError("Given intrusion level is invalid: {}".format(intrusion_level))
 
+		if intrusion_mode not in self._intrusion_generators:
+			raise NotImplementedError("Intrusion mode not implemented")
+
 		self._intrusion_level = intrusion_level
+		self._intrusion_mode = intrusion_mode
 
-		try:
+		if self._buffered_values is not None:
+			# Drop the values drawn for the previous mode
+			self._buffer = None
+		else:
 			self.generate = self._intrusion_generators[intrusion_mode]
-		except KeyError:
-			raise NotImplementedError("Intrusion mode not implemented")
+
+
+	def start_buffered(self, values=None, block_size=BLOCK_SIZE):
+		"""
+		Switch to buffered generation: The values are validated once and generate() then serves
+		values from blocks drawn with one vectorised call each. generate() ignores its argument.
+		"""
+
+		if block_size <= 0:
+			raise ValueError("Block size must be positive valued!")
+
+		if values is None:
+			values = self.get_default_values()
+
+		self._validate_values(values)
+
+		self._buffered_values = list(values)
+		self._block_size = block_size
+		self._buffer = None
+		self.generate = self._generate_buffered
+
+
+	def copy(self):
+		""" Create an independent generator with the same definition, e.g. for another vehicle. """
+		return DistributionGenerator(self._method_name, self.name, self.args_constraints,
+			self._expected_range, self._mean, self.rate_in_hz, self.queue_size)
 
 
 	def seed(self, seed):
 		""" Seed the contained random generator. """
 		self.np_rand.seed(seed)
+		# Values drawn before seeding would break reproducibility
+		self._buffer = None
 
 
 	# pylint: disable-msg=E0202; (Attribute hides this method - intentional)
@@ -122,25 +166,57 @@ class DistributionGenerator(object):
 		if values is None:
 			values = self.get_default_values()
 
+		self._validate_values(values)
+
+		return (self._method(*values), DistributionGenerator.NORMAL)
+
+
+	def _validate_values(self, values):
+		""" Make sure the given values fit the argument constraints. """
+
 		args_count = self.get_args_count()
 
-		if len(values) is not args_count:
+		if args_count not in [1, 2]:
+			raise NotImplementedError("IMPLEMENTATION MISSING")
+
+		if len(values) != args_count:
 			raise Exception("Invalid number of values given")
 
 		for i in range(0, args_count):
 			if not self.args_constraints[i].fits(values[i]):
 				raise Exception("Given value {} does not fit the argument constraint".format(values[i]))
 
-		value = 0
 
-		if args_count is 1:
-			value = self._method(values[0])
-		elif args_count is 2:
-			value = self._method(values[0], values[1])
-		else:
-			raise NotImplementedError("IMPLEMENTATION MISSING")
 
-		return (value, DistributionGenerator.NORMAL)
+	### Buffered mode ###
+
+
+	# pylint: disable-msg=W0613; (Unused argument - is necessary)
+	def _generate_buffered(self, values=None):
+		""" Serve the next value of the current block, drawing a new block when it's used up. """
+
+		if self._buffer is None or self._buffer_index >= len(self._buffer):
+			self._buffer = self._draw_block()
+			self._buffer_index = 0
+
+		value = self._buffer[self._buffer_index]
+		self._buffer_index += 1
+
+		return (value.item(), self._intrusion_mode or DistributionGenerator.NORMAL)
+
+
+	def _draw_block(self):
+		""" Draw a block of values of the active mode from the seeded generator. """
+
+		if self._intrusion_mode == DistributionGenerator.OFF_VALUE:
+			return self.np_rand.choice(self._off_value_values[self._intrusion_level], size=self._block_size)
+
+		normal_values = self._method(*self._buffered_values, size=self._block_size)
+
+		if self._intrusion_mode == DistributionGenerator.HUGE_ERROR:
+			return self._to_huge_errors(normal_values)
+
+		return normal_values
 
 
 
@@ -152,7 +228,7 @@ class DistributionGenerator(object):
 		""" Return the off-value of the selected intrusion level. """
 
 		choices = self._off_value_values[self._intrusion_level]
-		off_value = numpy.random.choice(choices)
+		off_value = self.np_rand.choice(choices)
 
 		return (off_value, DistributionGenerator.OFF_VALUE)
 
@@ -161,19 +237,24 @@ class DistributionGenerator(object):
 		""" Calculate a huge error based on the selected intrusion level. """
 
 		normal_value, _ = self._generate_impl(values)
-		factor = -1
-		error_span = self._errors[self._intrusion_level].l
-		if normal_value >= self._mean:
-			factor = 1
-			error_span = self._errors[self._intrusion_level].r
-
-		# Generated value < 0: take span_l, subtract from mean
-		error_level = self._mean + factor * error_span
-		next_value = error_level + factor * (normal_value * normal_value)
+		next_value = self._to_huge_errors(numpy.array(normal_value)).item()
 
 		return (next_value, DistributionGenerator.HUGE_ERROR)
 
 
+	def _to_huge_errors(self, normal_values):
+		""" Calculate the huge errors of the given array of normal values. """
+
+		errors = self._errors[self._intrusion_level]
+		is_right = normal_values >= self._mean
+		factor = numpy.where(is_right, 1, -1)
+		error_span = numpy.where(is_right, errors.r, errors.l)
+
+		# Generated value < mean: take span_l, subtract from mean
+		error_level = self._mean + factor * error_span
+		return error_level + factor * (normal_values * normal_values)
+
+
 
 	### Getter ###
 
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+""" Unit tests for the DistributionGenerator class """
+
+import unittest
+
+from parameterized import parameterized
+
+from argument_constraint import ArgumentConstraint as AC
+from distribution_generator import DistributionGenerator
+
+
+def _create_generator():
+	return DistributionGenerator("normal", "gaussian", [AC(0.0), AC(1.0)],
+		expected_range=[-3.09023, 3.09023], mean=0.0)
+
+
+class Tests(unittest.TestCase):
+	""" All tests """
+
+	@parameterized.expand([
+		(None, ),
+		(DistributionGenerator.OFF_VALUE, ),
+		(DistributionGenerator.HUGE_ERROR, )
+	])
+	def test_buffered_reproducible(self, intrusion_mode):
+		""" Buffered and unbuffered generation draw the same values from the seeded stream """
+
+		results = []
+		for buffered in [False, True]:
+			generator = _create_generator()
+			if intrusion_mode is not None:
+				generator.activate_intrusion(intrusion_mode, "easy")
+			generator.seed(42)
+			if buffered:
+				generator.start_buffered(block_size=7)
+
+			results.append([generator.generate() for _ in range(20)])
+
+		for (unbuffered_value, unbuffered_str), (buffered_value, buffered_str) in zip(*results):
+			self.assertAlmostEqual(unbuffered_value, buffered_value)
+			self.assertEqual(unbuffered_str, buffered_str)
+
+
+	def test_buffered_validates_once(self):
+		""" Invalid values are rejected when starting the buffered mode """
+
+		generator = _create_generator()
+		with self.assertRaises(Exception):
+			generator.start_buffered([1.0])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -14,9 +14,10 @@ gen wald [mean] [scale]    : Wald distribution - mean > 0, scale >= 0
 gen weibull [a]            : Weibull distribution - a > 0
 gen zipf [a]               : Zipf distribution - a > 1
 
-Publish distribution based on pre-generated file
+Publish distribution based on pre-generated file with one "value,intrusion" record per line
 Possible arguments:
 file <file name> [-r]  : Repeat after reaching EOF
+file <file name> [--rate HZ] : Records per second; 0 publishes as fast as possible (default: 10)
 """
 
 # pylint: disable-msg=R0903; (Too few public methods)
@@ -31,9 +32,13 @@ import generators as GENS
 from distribution_generator import DistributionGenerator as DG
 from turtlesim_expl.msg import GenValue
 
+# The helpers shared by all nodes live in the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+# pylint: disable-msg=C0413; (Import should be placed at the top)
+from stop_watch import StopWatch
+
 
 BASE_PATH = os.path.expanduser("~/ros")
-STOP_FILE_PATH = os.path.join(BASE_PATH, "STOP")
 
 
 class DistributionPublisher(object):
@@ -45,8 +50,11 @@ class DistributionPublisher(object):
 		object.__init__(self)
 
 		self._file_based = False
-		self._file_contents = []
+		self._file_handle = None
+		self._file_rate_in_hz = None
 		self._current_line = 0
+		# Records read since the start of the file - files without any aren't repeated
+		self._current_records = 0
 		self._repeat_file = False
 		self._generator = None
 		self._generator_arguments = []
@@ -58,11 +66,12 @@ class DistributionPublisher(object):
 
 		#    a) File based
 		if args.mode == "file":
-			return_message = self._setup_reader(args.pub_file_path, args.repeat_file)
+			return_message = self._setup_reader(args.pub_file_path, args.repeat_file, args.rate)
 		#    b) Generator based
 		elif args.mode == "gen":
 			return_message = self._setup_generator(
-				args.generator, args.params, args.intrusion_mode, args.intrusion_level, args.seed)
+				args.generator, args.params, args.intrusion_mode, args.intrusion_level, args.seed,
+				args.buffered)
 			queue_size = self._generator.queue_size
 		else:
 			raise NotImplementedError()
@@ -75,10 +84,14 @@ class DistributionPublisher(object):
 		self._publisher = rospy.Publisher(publish_topic, GenValue, queue_size=queue_size)
 
 
-	def _setup_reader(self, file_path, repeat_file):
-		""" Setup for file-based publishing """
+	def _setup_reader(self, file_path, repeat_file, rate_in_hz):
+		""" Setup for file-based publishing. The file is read line by line while publishing. """
+
+		if rate_in_hz < 0:
+			raise ValueError("Rate must not be negative!")
 
 		self._file_based = True
+		self._file_rate_in_hz = rate_in_hz
 
 		# Either a full path was given (contains sep), otherwise the name is appended to the default path
 		if os.sep not in file_path:
@@ -88,20 +101,21 @@ class DistributionPublisher(object):
 			raise Exception("No file found at {}".format(file_path))
 
 		try:
-			file_reader = open(file_path)
-			self._file_contents = file_reader.readlines()
-			file_reader.close()
+			self._file_handle = open(file_path)
 		except IOError:
 			raise Exception("Couldn't read file {}".format(file_path))
 
 		# Repeat file argument
 		self._repeat_file = repeat_file
 
-		return "Publishing file-based from {}{}".format(
-			file_path, " (repeating)" if self._repeat_file else "")
+		return "Publishing file-based from {}{} at {}".format(
+			file_path, " (repeating)" if self._repeat_file else "",
+			"{} Hz".format(rate_in_hz) if rate_in_hz > 0 else "full speed")
 
 
-	def _setup_generator(self, gen_name, parameters, intrusion_mode, intrusion_level, seed=None):
+	# pylint: disable-msg=R0913; (Too many arguments)
+	def _setup_generator(self, gen_name, parameters, intrusion_mode, intrusion_level, seed=None,
+		buffered=False):
 		""" Setup for data generation """
 
 		if intrusion_mode is not None and intrusion_level is None:
@@ -130,7 +144,10 @@ class DistributionPublisher(object):
 			self._generator_arguments = [float(x) for x in parameters]
 			message += "given values {}".format(self._generator_arguments)
 
-		message += " (seed: {})".format(seed)
+		if buffered:
+			generator.start_buffered(self._generator_arguments)
+
+		message += " (seed: {}{})".format(seed, ", buffered" if buffered else "")
 		return message
 
 
@@ -138,7 +155,7 @@ class DistributionPublisher(object):
 		""" Run the distribution publisher with the given rate limiter and create num method """
 
 		# Default values for file-based publishing
-		rate_in_hz = 10
+		rate_in_hz = self._file_rate_in_hz
 		create_tuple = self._read
 
 		# Update for generation
@@ -146,49 +163,82 @@ class DistributionPublisher(object):
 			rate_in_hz = self._generator.rate_in_hz
 			create_tuple = self._generate
 
-		rate_limiter = rospy.Rate(rate_in_hz)
+		# No rate limit: Publish as fast as possible
+		rate_limiter = rospy.Rate(rate_in_hz) if rate_in_hz > 0 else None
+
+		stop_watch = StopWatch.get_shared()
 
-		# While loop to assure that Ctrl-C can exit the app
-		while not rospy.is_shutdown():
-			next_tuple = create_tuple()
+		try:
+			# While loop to assure that Ctrl-C can exit the app
+			while not rospy.is_shutdown():
+				next_tuple = create_tuple()
+
+				if next_tuple is None:
+					break
 
-			if next_tuple is None:
-				break
+				if stop_watch.is_set():
+					rospy.logerr("!!! STOP FILE DETECTED !!! KILLED !!!")
+					break
 
-			if os.path.lexists(STOP_FILE_PATH):
-				rospy.logerr("!!! STOP FILE DETECTED !!! KILLED !!!")
-				break
+				if self.debug:
+					rospy.loginfo("Value: %s (%s)", next_tuple[0], next_tuple[1])
+				self._publisher.publish(GenValue(value=next_tuple[0], intrusion=next_tuple[1]))
 
-			if self.debug:
-				rospy.loginfo("Value: %s (%s)", next_tuple[0], next_tuple[1])
-			self._publisher.publish(GenValue(value=next_tuple[0], intrusion=next_tuple[1]))
-			rate_limiter.sleep()
+				if rate_limiter is not None:
+					rate_limiter.sleep()
+		finally:
+			if self._file_handle is not None:
+				self._file_handle.close()
 
 
 	def _read(self):
 		"""
-		Read next line from file
-		Returns: Either repeats based on self._repeat_file or None if EOF is reached
+		Read the next "value,intrusion" record from the file. Empty lines are skipped.
+		Returns: (value, intrusion_str) - or None if EOF is reached and the file isn't repeated
 		"""
 
-		# TODO: Only allow files with value, intrusion_str lines
-		raise NotImplementedError()
+		while True:
+			line = self._file_handle.readline()
 
-		if self._current_line >= len(self._file_contents):
-			if self._repeat_file:
+			# EOF: Start over unless not repeating or there was nothing to read
+			if line == "":
+				if not self._repeat_file or self._current_records == 0:
+					rospy.loginfo("End of data file reached")
+					return None
+
+				self._file_handle.seek(0)
 				self._current_line = 0
-			else:
-				rospy.loginfo("End of data file reached")
-				return None
+				self._current_records = 0
+				continue
+
+			self._current_line += 1
+
+			line = line.strip()
+			if line == "":
+				continue
+
+			self._current_records += 1
+			return self._parse_record(line)
+
+
+	def _parse_record(self, line):
+		""" Parse a "value,intrusion" line. """
+
+		parts = line.split(",")
+		if len(parts) != 2:
+			raise ValueError("Invalid record in line {}: {}".format(self._current_line, line))
+
+		try:
+			value = float(parts[0])
+		except ValueError:
+			raise ValueError("Invalid value in line {}: {}".format(self._current_line, line))
 
-		next_num = float(self._file_contents[self._current_line])
-		self._current_line += 1
-		return next_num
+		return (value, parts[1].strip())
 
 
 	def _generate(self):
 		""" Generate data with current generator """
-		return self._generator.generate()
+		return self._generator.generate(self._generator_arguments)
 
 
 if __name__ == "__main__":
@@ -212,11 +262,15 @@ if __name__ == "__main__":
 			help="The generator name")
 		PARSER_GEN.add_argument("params", type=float, nargs="*", help="Optional parameters")
 		PARSER_GEN.add_argument("--seed", "-s", type=int)
+		PARSER_GEN.add_argument("--buffered", "-b", action="store_true",
+			help="Draw values in blocks (faster, allows higher rates)")
 
 		# File pub mode
 		PARSER_FILE = SUB_PARSERS.add_parser("file", help="Publish data from a file")
 		PARSER_FILE.add_argument("pub_file_path", metavar="/FILE/PATH", help="The file to publish from")
 		PARSER_FILE.add_argument("--repeat", "-r", action="store_true", dest="repeat_file")
+		PARSER_FILE.add_argument("--rate", type=float, default=10, metavar="HZ",
+			help="Records per second; 0 publishes as fast as possible (default: 10)")
 
 		# Pass filtered args to parser (remove remapping arguments and delete program name)
 		ARGS = PARSER.parse_args(rospy.myargv(sys.argv)[1:])
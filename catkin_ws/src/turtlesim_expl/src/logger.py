@@ -2,12 +2,11 @@
 """ Logging node """
 
 import argparse
-import os
 import random
 import sys
 import time
 
-import requests
+import numpy
 import rospy
 
 from turtlesim.msg import Pose, Color
@@ -16,10 +15,8 @@ from turtlesim_expl.msg import GenValue
 # pylint: disable-msg=C0411; (Standard import should be above - I don't consider it "standard")
 from pipes.pose_pipe import PosePipe
 from pipes.pose_processor import PoseProcessor, CC_STR, POI_STR, TSP_STR
-
-
-BASE_PATH = os.path.expanduser("~/ros")
-STOP_FILE_PATH = os.path.join(BASE_PATH, "STOP")
+from request_sender import RequestSender
+from stop_watch import StopWatch
 
 
 class Logger(object):
@@ -34,56 +31,87 @@ class Logger(object):
 	_VIN_FIELD = "vin"
 	_INTRUSION_FIELD = "intrusion"
 
+	# Columns of the last broadcast table
+	_BROADCAST_COLUMNS = {
+		"log_colour" : 0,
+		"log_pose" : 1
+	}
+
+	# Upper limit for the connections of a multi-vehicle logger
+	_MAX_CONNECTIONS = 8
+
 
 	def __init__(self, args):
 		""" Ctor """
 
-		self._data = {
-			Logger._VIN_FIELD : args.namespace
-		}
+		# [(vin, intrusion level or None, generator topics)]
+		vehicles = [(args.namespace, args.intrusion, args.gen_topics)]
+		# A single logger is seated in its vehicle's namespace, a multi-vehicle logger in the root
+		topic_prefixes = [""]
+		if args.vehicles:
+			vehicles = [parse_vehicle(spec) for spec in args.vehicles]
+			topic_prefixes = ["/{}/".format(vin) for vin, _, _ in vehicles]
 
 		self._label = args.label
-		self._intrusion = args.intrusion
 
-		self._pose = (0, 0)
+		# Per-vehicle state tables, indexed by the position of the vehicle in the arguments
+		self._base_requests = [{Logger._VIN_FIELD : vin} for vin, _, _ in vehicles]
+		self._intrusions = [intrusion for _, intrusion, _ in vehicles]
+		self._poses = numpy.zeros((len(vehicles), 2))
+		self._last_broadcast = numpy.zeros((len(vehicles), len(Logger._BROADCAST_COLUMNS)))
 
-		self._last_broadcast = {
-			self.log_colour.__name__ : 0,
-			self.log_pose.__name__ : 0
-		}
-		self._last_conn_err = 0
+		# All vehicles share the queue and connections
+		self._sender = RequestSender(Logger.URL, queue_size=1000 * len(vehicles),
+			connections=max(2, min(Logger._MAX_CONNECTIONS, len(vehicles) // 10)))
+		self._reported_counts = self._sender.get_counts()
+		self._last_report = 0
 
 		self._rand_gen = random.Random()
 
 		rospy.init_node("logger", anonymous=True)
 
 		# Subscribe to topics
-		for topic in args.gen_topics:
-			rospy.Subscriber(topic, GenValue, self.log_generated_data, topic)
-
-		# Each of the three poses should roughly generate as much data as the colour logger.
-		rospy.Subscriber(Logger.COLOUR_PATH, Color, self.rate_limit,
-			{"method" : self.log_colour, "rate" : 0.7})
-		rospy.Subscriber(Logger.POSE_PATH, Pose, self.rate_limit,
-			{"method" : self.log_pose, "rate" : 0.1})
+		for vehicle, (_, _, gen_topics) in enumerate(vehicles):
+			prefix = topic_prefixes[vehicle]
+
+			for topic in gen_topics:
+				rospy.Subscriber(prefix + topic, GenValue, self.log_generated_data, (vehicle, topic))
+
+			# Each of the three poses should roughly generate as much data as the colour logger.
+			rospy.Subscriber(prefix + Logger.COLOUR_PATH, Color, self.rate_limit,
+				{"method" : self.log_colour, "rate" : 0.7, "vehicle" : vehicle})
+			rospy.Subscriber(prefix + Logger.POSE_PATH, Pose, self.rate_limit,
+				{"method" : self.log_pose, "rate" : 0.1, "vehicle" : vehicle})
+
+		if args.vehicles:
+			rospy.loginfo("Logger initialised for {} vehicles".format(len(vehicles)))
+			rospy.loginfo("Options (Label | {}), (Intruded vehicles | {})"
+				.format("yes" if args.label else "no", len([i for i in self._intrusions if i is not None])))
+		else:
+			rospy.loginfo("Logger initialised in NS {}".format(args.namespace))
+			rospy.loginfo("Options (Label | {}), (Intrusion | {})"
+				.format("yes" if args.label else "no", args.intrusion))
 
-		rospy.loginfo("Logger initialised in NS {}".format(args.namespace))
-		rospy.loginfo("Options (Label | {}), (Intrusion | {})"
-			.format("yes" if args.label else "no", args.intrusion))
+		stop_watch = StopWatch.get_shared()
 
-		# Block until shut down and check for stop file every ten seconds
+		# Block until shut down or stopped
 		while not rospy.is_shutdown():
-			if os.path.lexists(STOP_FILE_PATH):
+			if stop_watch.is_set():
 				rospy.logerr("!!! STOP FILE DETECTED !!! KILLED !!!")
 				break
 
+			self.report_errors()
 			rospy.sleep(.1)
 
+		self._sender.close()
 
-	def log_generated_data(self, gen_value, generator_name):
+
+	def log_generated_data(self, gen_value, subscription):
 		""" Log generated data value. """
 
-		request = self.copy_base_request()
+		vehicle, generator_name = subscription
+
+		request = self.copy_base_request(vehicle)
 		request["generated"] = gen_value.value
 		if self._label:
 			request[Logger._INTRUSION_FIELD] = gen_value.intrusion
@@ -94,28 +122,30 @@ class Logger(object):
 	def rate_limit(self, log_data, callback_definition):
 		""" Rate limit the given method by rate_in_sec. """
 
-		if any(x not in callback_definition for x in ["method", "rate"]):
+		if any(x not in callback_definition for x in ["method", "rate", "vehicle"]):
 			raise ValueError("Invalid callback definition!")
 
 		method = callback_definition["method"]
 		rate_in_sec = callback_definition["rate"]
+		vehicle = callback_definition["vehicle"]
+		column = Logger._BROADCAST_COLUMNS[method.__name__]
 
 		time_now = time.time()
 
 		# Add a degree of randomness to when exactly the logging will begin
-		if self._last_broadcast[method.__name__] == 0:
-			self._last_broadcast[method.__name__] = time_now + self._rand_gen.randrange(1, 3)
+		if self._last_broadcast[vehicle, column] == 0:
+			self._last_broadcast[vehicle, column] = time_now + self._rand_gen.randrange(1, 3)
 
 		# Only broadcast once per rate_in_sec
-		if time_now < self._last_broadcast[method.__name__] + rate_in_sec:
+		if time_now < self._last_broadcast[vehicle, column] + rate_in_sec:
 			return
 
-		self._last_broadcast[method.__name__] = time_now
+		self._last_broadcast[vehicle, column] = time_now
 
-		method(log_data)
+		method(log_data, vehicle)
 
 
-	def log_colour(self, log_data):
+	def log_colour(self, log_data, vehicle):
 		""" Colour logging """
 
 		# See py_turtlesim.util.Rgb
@@ -134,8 +164,8 @@ class Logger(object):
 
 		colour_string = "%s,%s,%s" % this_colour
 
-		pose_x, pose_y = self._pose
-		request = self.copy_base_request()
+		pose_x, pose_y = self._poses[vehicle]
+		request = self.copy_base_request(vehicle)
 		request = PoseProcessor.add_to_request(request, pose_x, pose_y)
 		request["colour"] = colour_string
 
@@ -145,17 +175,17 @@ class Logger(object):
 		self.send_request("colour", request)
 
 
-	def log_pose(self, log_data):
+	def log_pose(self, log_data, vehicle):
 		""" Pose logging """
 
-		self._pose = (log_data.x, log_data.y)
+		self._poses[vehicle] = (log_data.x, log_data.y)
 
 		# Each request with 1/3 probability
 		pose_pipe = PosePipe.create(
-			intrusion=self._intrusion, intrusion_field=Logger._INTRUSION_FIELD,
+			intrusion=self._intrusions[vehicle], intrusion_field=Logger._INTRUSION_FIELD,
 			cc=1, poi=1, tsp=1)
 
-		request = self.copy_base_request()
+		request = self.copy_base_request(vehicle)
 		request = PoseProcessor.add_to_request(request, log_data.x, log_data.y)
 		request = pose_pipe.process(request, label=self._label)
 
@@ -174,37 +204,78 @@ class Logger(object):
 
 
 	def send_request(self, log_method, request, path="log"):
-		""" Send request to specified logging endpoint with given data. """
+		""" Queue request to specified logging endpoint with given data. Doesn't block. """
 
 		if self._label:
 			if Logger._INTRUSION_FIELD not in request:
 				raise KeyError("Missing intrusion key necessary for labelling.")
 
-		try:
-			requests.post(Logger.URL + "/" + path + "/" + log_method, request)
-		except requests.ConnectionError:
-			time_now = time.time()
-			# Only print an error every ten seconds
-			if time_now > self._last_conn_err + 10:
-				rospy.logerr("Can't connect to logging API")
-				self._last_conn_err = time_now
+		self._sender.send(path + "/" + log_method, request)
+
+
+	def report_errors(self):
+		""" Log the number of failed, dropped and retried requests, at most every ten seconds. """
+
+		time_now = time.time()
+		if time_now < self._last_report + 10:
+			return
+
+		counts = self._sender.get_counts()
+		new_counts = {key : counts[key] - self._reported_counts[key] for key in counts}
+
+		if new_counts[RequestSender.FAILED] > 0 or new_counts[RequestSender.DROPPED] > 0:
+			rospy.logerr("Can't keep up with or connect to logging API: {} failed, {} dropped, {} retried"
+				.format(new_counts[RequestSender.FAILED], new_counts[RequestSender.DROPPED],
+					new_counts[RequestSender.RETRIED]))
+
+		self._reported_counts = counts
+		self._last_report = time_now
+
+
+	def copy_base_request(self, vehicle):
+		""" Make a value-copy of the base request of the given vehicle. """
+		return dict(self._base_requests[vehicle])
 
 
-	def copy_base_request(self):
-		""" Make a value-copy of the base request. """
-		return dict(self._data)
+
+def parse_vehicle(spec):
+	"""
+	Parse a vehicle definition of the multi-vehicle mode: "VIN:INTRUSION:TOPIC,TOPIC,..."
+	INTRUSION and the topics may be empty.
+	returns: (vin, intrusion level or None, [generator topic])
+	"""
+
+	parts = spec.split(":")
+	if len(parts) != 3 or parts[0] == "":
+		raise ValueError("Invalid vehicle definition: %s" % spec)
+
+	vin, intrusion, topics = parts
+
+	if intrusion == "":
+		intrusion = None
+	elif intrusion not in PoseProcessor.POSSIBLE_INTRUSION_LEVELS:
+		raise ValueError("Invalid intrusion level: %s" % intrusion)
+
+	return (vin, intrusion, [topic for topic in topics.split(",") if topic != ""])
 
 
 
 if __name__ == "__main__":
 	PARSER = argparse.ArgumentParser(prog="logger")
 
-	PARSER.add_argument("namespace", metavar="NS", help="The namespace this logger is seated in")
+	PARSER.add_argument("namespace", metavar="NS", nargs="?", help="The namespace this logger is seated in")
 	PARSER.add_argument("--gen-topics", metavar="TOPIC", nargs="*", default=[], dest="gen_topics")
 	PARSER.add_argument("--label", action="store_true", help="Label the data with intrusion type")
 	PARSER.add_argument("--intrusion", "-i", choices=PoseProcessor.POSSIBLE_INTRUSION_LEVELS)
+	PARSER.add_argument("--vehicles", metavar="VIN:INTRUSION:TOPIC,...", nargs="+",
+		help="Log the given vehicles from one node in the root namespace instead of one namespace")
 
 	# Pass filtered args to parser (remove remapping arguments and delete program name)
 	ARGS = PARSER.parse_args(rospy.myargv(sys.argv)[1:])
 
+	if (ARGS.namespace is None) == (ARGS.vehicles is None):
+		PARSER.error("Give either a namespace or --vehicles")
+	if ARGS.vehicles and (ARGS.gen_topics or ARGS.intrusion):
+		PARSER.error("--gen-topics and --intrusion are part of the vehicle definitions in multi-vehicle mode")
+
 	LOGGER = Logger(ARGS)
@@ -2,15 +2,17 @@
 """ Interface for publishing to turtle """
 
 import os
+import sys
 import rospy
 from geometry_msgs.msg import Twist
 
 import move_helper
 from move_strategy import MoveStrategy
 
-
-BASE_PATH = os.path.expanduser("~/ros")
-STOP_FILE_PATH = os.path.join(BASE_PATH, "STOP")
+# The helpers shared by all nodes live in the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+# pylint: disable-msg=C0413; (Import should be placed at the top)
+from stop_watch import StopWatch
 
 
 class TurtleControl(object):
@@ -34,6 +36,8 @@ class TurtleControl(object):
 	def run(self):
 		""" Generate new velocity from movement strategy until exited """
 
+		stop_watch = StopWatch.get_shared()
+
 		# While loop to assure that Ctrl-C can exit the app
 		while not rospy.is_shutdown():
 			vel_msg = self.move_strategy.get_next()
@@ -41,7 +45,7 @@ class TurtleControl(object):
 			if vel_msg is None:
 				break
 
-			if os.path.lexists(STOP_FILE_PATH):
+			if stop_watch.is_set():
 				rospy.logerr("!!! STOP FILE DETECTED !!! KILLED !!!")
 				break
 
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+""" Background sender for the requests to the logging API """
+
+import Queue
+import threading
+import time
+
+import requests
+import requests.adapters
+
+
+class RequestSender(object):
+	"""
+	Posts requests on background threads over persistent keep-alive connections.
+	send() never blocks: When the queue is full, the request is dropped and counted.
+	"""
+
+	SENT = "sent"
+	DROPPED = "dropped"
+	RETRIED = "retried"
+	FAILED = "failed"
+
+
+	def __init__(self, url, queue_size=1000, connections=2, retries=2):
+		"""
+		Ctor
+		*queue_size: Maximum number of requests waiting to be sent.
+		*connections: Number of sender threads, each keeping one connection to the server open.
+		The API has no batch endpoint and requests doesn't support HTTP pipelining, so this
+		is how several requests are in flight at a time.
+		*retries: Number of further attempts on connection errors and server errors.
+		"""
+
+		object.__init__(self)
+
+		if queue_size <= 0 or connections <= 0 or retries < 0:
+			raise ValueError("Queue size and connections must be positive and retries non-negative!")
+
+		self.url = url
+		self.retries = retries
+
+		self._queue = Queue.Queue(maxsize=queue_size)
+		self._stop_event = threading.Event()
+
+		self._session = requests.Session()
+		adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=connections)
+		self._session.mount("http://", adapter)
+
+		self._counts_lock = threading.Lock()
+		self._counts = {
+			RequestSender.SENT : 0,
+			RequestSender.DROPPED : 0,
+			RequestSender.RETRIED : 0,
+			RequestSender.FAILED : 0
+		}
+
+		self._threads = []
+		for index in range(connections):
+			thread = threading.Thread(target=self._send_loop, name="sender-%s" % index)
+			# Don't keep the node alive when it's killed
+			thread.daemon = True
+			thread.start()
+			self._threads.append(thread)
+
+
+	def send(self, path, data):
+		""" Queue the given request to <url>/<path>. Returns False if it was dropped. """
+
+		try:
+			self._queue.put_nowait((path, data))
+		except Queue.Full:
+			self._count(RequestSender.DROPPED)
+			return False
+
+		return True
+
+
+	def get_counts(self):
+		""" Get a copy of the sent, dropped, retried and failed counts. """
+
+		with self._counts_lock:
+			return dict(self._counts)
+
+
+	def close(self, timeout=2):
+		""" Send the queued requests for up to <timeout> seconds and stop the threads. """
+
+		end_time = time.time() + timeout
+		while not self._queue.empty() and time.time() < end_time:
+			time.sleep(0.05)
+
+		self._stop_event.set()
+		for thread in self._threads:
+			thread.join(max(0, end_time - time.time()))
+
+		self._session.close()
+
+
+	def _send_loop(self):
+		""" Sender thread: Post queued requests until stopped. """
+
+		while not self._stop_event.is_set():
+			try:
+				path, data = self._queue.get(timeout=0.1)
+			except Queue.Empty:
+				continue
+
+			self._post(path, data)
+
+
+	def _post(self, path, data):
+		""" Post one request, retrying with back-off on connection and server errors. """
+
+		for attempt in range(self.retries + 1):
+			if attempt > 0:
+				self._count(RequestSender.RETRIED)
+				time.sleep(0.1 * 2 ** (attempt - 1))
+
+			try:
+				response = self._session.post(self.url + "/" + path, data)
+			except requests.ConnectionError:
+				continue
+
+			if response.status_code < 500:
+				self._count(RequestSender.SENT)
+				return
+
+		self._count(RequestSender.FAILED)
+
+
+	def _count(self, key):
+		with self._counts_lock:
+			self._counts[key] += 1
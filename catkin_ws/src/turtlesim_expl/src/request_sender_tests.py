@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+""" Unit tests for the RequestSender class """
+
+import time
+import unittest
+
+from request_sender import RequestSender
+
+
+class Tests(unittest.TestCase):
+	""" All tests """
+
+	def test_unreachable_server(self):
+		""" Sending doesn't block while the server is down and every request is accounted for """
+
+		# Nothing listens on port 9
+		sender = RequestSender("http://localhost:9", queue_size=5, connections=1, retries=1)
+
+		start_time = time.time()
+		sent = [sender.send("log/colour", {"vin" : "TEST"}) for _ in range(100)]
+		self.assertLess(time.time() - start_time, 0.5)
+
+		sender.close(timeout=5)
+		counts = sender.get_counts()
+
+		self.assertEqual(counts[RequestSender.SENT], 0)
+		self.assertEqual(counts[RequestSender.DROPPED], sent.count(False))
+		self.assertGreater(counts[RequestSender.DROPPED], 0)
+		# Each queued request was tried twice and then failed
+		self.assertEqual(counts[RequestSender.FAILED], sent.count(True))
+		self.assertEqual(counts[RequestSender.RETRIED], sent.count(True))
+
+
+if __name__ == "__main__":
+	unittest.main()
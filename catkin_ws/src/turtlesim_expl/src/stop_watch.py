@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+""" Event-driven watch for the STOP file that halts all running nodes """
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import threading
+import time
+
+
+BASE_PATH = os.path.expanduser("~/ros")
+STOP_FILE_PATH = os.path.join(BASE_PATH, "STOP")
+
+# From <sys/inotify.h>
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class StopWatch(object):
+	"""
+	Watches for the STOP file on a background thread. Checking is_set() costs no system call.
+	The directory is watched with inotify; if that fails (not on Linux, directory missing,
+	fs.inotify.max_user_instances reached), the file is polled every <poll_interval> seconds instead.
+	"""
+
+	_SHARED = None
+	_SHARED_LOCK = threading.Lock()
+
+
+	def __init__(self, file_path=STOP_FILE_PATH, poll_interval=2):
+		""" Ctor """
+
+		object.__init__(self)
+
+		if poll_interval <= 0:
+			raise ValueError("Poll interval must be positive valued!")
+
+		self.file_path = file_path
+		self.poll_interval = poll_interval
+		self.mode = None
+
+		self._event = threading.Event()
+
+		inotify_fd = self._create_inotify_fd()
+		self.mode = "inotify" if inotify_fd is not None else "polling"
+
+		thread = threading.Thread(target=self._watch, args=(inotify_fd,), name="stop-watch")
+		# Don't keep the node alive when it's killed
+		thread.daemon = True
+		thread.start()
+
+
+	@staticmethod
+	def get_shared():
+		""" Get the watch for the default STOP file shared by all users in this process. """
+
+		with StopWatch._SHARED_LOCK:
+			if StopWatch._SHARED is None:
+				StopWatch._SHARED = StopWatch()
+			return StopWatch._SHARED
+
+
+	def is_set(self):
+		""" Check whether the STOP file was detected. """
+		return self._event.is_set()
+
+
+	def _create_inotify_fd(self):
+		""" Watch the directory of the file for created and moved-in files. Returns None on failure. """
+
+		library_name = ctypes.util.find_library("c")
+		if library_name is None:
+			return None
+
+		try:
+			libc = ctypes.CDLL(library_name, use_errno=True)
+			inotify_fd = libc.inotify_init1(_IN_CLOEXEC)
+		except (AttributeError, OSError):
+			return None
+
+		if inotify_fd < 0:
+			return None
+
+		directory_path = os.path.dirname(self.file_path) or "."
+		watch = libc.inotify_add_watch(inotify_fd, directory_path, _IN_CREATE | _IN_MOVED_TO)
+		if watch < 0:
+			os.close(inotify_fd)
+			return None
+
+		return inotify_fd
+
+
+	def _watch(self, inotify_fd):
+		""" Watch thread: Set the event when the file appears. """
+
+		if inotify_fd is None:
+			self._poll()
+			return
+
+		try:
+			self._read_events(inotify_fd)
+		finally:
+			os.close(inotify_fd)
+
+
+	def _read_events(self, inotify_fd):
+		""" Block on the inotify events until the file is created. """
+
+		file_name = os.path.basename(self.file_path)
+
+		# The file might have been created before the watch was added
+		if os.path.lexists(self.file_path):
+			self._event.set()
+			return
+
+		while True:
+			try:
+				events = os.read(inotify_fd, 4096)
+			except OSError as error:
+				if error.errno == errno.EINTR:
+					continue
+				raise
+
+			offset = 0
+			while offset < len(events):
+				_, _, _, name_length = _EVENT_HEADER.unpack_from(events, offset)
+				offset += _EVENT_HEADER.size
+				name = events[offset:offset + name_length].rstrip("\0")
+				offset += name_length
+
+				if name == file_name:
+					self._event.set()
+					return
+
+
+	def _poll(self):
+		""" Fallback: Check for the file every <poll_interval> seconds. """
+
+		while not os.path.lexists(self.file_path):
+			time.sleep(self.poll_interval)
+
+		self._event.set()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+""" Unit tests for the StopWatch class """
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from stop_watch import StopWatch
+
+
+class Tests(unittest.TestCase):
+	""" All tests """
+
+	def setUp(self):
+		self.directory_path = tempfile.mkdtemp()
+
+
+	def tearDown(self):
+		shutil.rmtree(self.directory_path)
+
+
+	def test_inotify(self):
+		""" Creating the file in the watched directory sets the watch """
+
+		watch = StopWatch(os.path.join(self.directory_path, "STOP"))
+		self.assertEqual(watch.mode, "inotify")
+
+		open(os.path.join(self.directory_path, "OTHER"), "a").close()
+		self._wait(watch, 0.2)
+		self.assertFalse(watch.is_set())
+
+		open(watch.file_path, "a").close()
+		self._wait(watch, 2)
+		self.assertTrue(watch.is_set())
+
+
+	def test_polling_fallback(self):
+		""" A missing directory can't be watched, so the file is polled for """
+
+		directory_path = os.path.join(self.directory_path, "ros")
+		watch = StopWatch(os.path.join(directory_path, "STOP"), poll_interval=0.05)
+		self.assertEqual(watch.mode, "polling")
+		self.assertFalse(watch.is_set())
+
+		os.mkdir(directory_path)
+		open(watch.file_path, "a").close()
+		self._wait(watch, 2)
+		self.assertTrue(watch.is_set())
+
+
+	@staticmethod
+	def _wait(watch, timeout):
+		end_time = time.time() + timeout
+		while not watch.is_set() and time.time() < end_time:
+			time.sleep(0.01)
+
+
+if __name__ == "__main__":
+	unittest.main()
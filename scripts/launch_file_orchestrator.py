@@ -23,6 +23,11 @@ class LaunchFileOrchestrator(object):
 
 	_GEN_DEFS_FILE_PATH = "~/ros/gens"
 
+	# Pose and colour rates of turtle worlds: Every 7th and every 4th step of 16 ms, so the loggers
+	# log poses and colours as often as with one turtlesim per namespace (see TurtleWorld)
+	_WORLD_POSE_RATE_IN_HZ = 1 / 0.112
+	_WORLD_COLOUR_RATE_IN_HZ = 1 / 0.064
+
 	### Instance variables
 	# self._file_path = ""
 	# self._dump_mode = False
@@ -32,6 +37,10 @@ class LaunchFileOrchestrator(object):
 	# self._namespace_count = None
 	# self._intrusion_definition = None
 	# self._label_intrusions = None
+	# self._vehicles_per_logger = None
+	# self._multi_logger_vehicles = []
+	# self._turtles_per_sim = None
+	# self._world_vehicles = []
 
 
 	def __init__(self):
@@ -61,6 +70,12 @@ class LaunchFileOrchestrator(object):
 			metavar="NS_COUNT", default=1, help="Number of namespaces to create")
 		optionals_group.add_argument("--dont-label", "-l", action="store_false", dest="label_intrusions",
 			help="Advise logger to not label intrusions (might improve performance when scoring).")
+		optionals_group.add_argument("--vehicles-per-logger", "-k", type=int, dest="vehicles_per_logger",
+			metavar="K", default=1,
+			help="Log K namespaces from one multi-vehicle logger node instead of one logger per namespace")
+		optionals_group.add_argument("--turtles-per-sim", "-w", type=int, dest="turtles_per_sim",
+			metavar="W", default=1,
+			help="Simulate the turtles of W namespaces in one batched py_turtlesim world instead of one per namespace")
 		optionals_group.add_argument("--random-gen-args", "-r", action="store_true",
 			dest="random_gen_args", help="Force use of the default generator arguments.")
 		optionals_group.add_argument("--dont-seed-gens", "-e", action="store_false", dest="seed_gens",
@@ -114,6 +129,15 @@ class LaunchFileOrchestrator(object):
 			self._print_and_exit(
 				"When using manual mode, no identifier file or namespace count > 1 can be used")
 
+		if args.vehicles_per_logger < 1:
+			self._print_and_exit("At least one vehicle per logger is needed")
+
+		if args.turtles_per_sim < 1:
+			self._print_and_exit("At least one turtle per simulator is needed")
+
+		if args.manual_turtle_mode and args.turtles_per_sim > 1:
+			self._print_and_exit("When using manual mode, no batched turtle simulation can be used")
+
 		# File mode: Sanity check and fix supplied path argument
 		if not args.dump_mode:
 			path_expanded = os.path.expanduser(args.file_path)
@@ -163,6 +187,10 @@ class LaunchFileOrchestrator(object):
 		self._manual_turtle_mode = _raise_on_none_else_return(args.manual_turtle_mode)
 		self._namespace_count = _raise_on_none_else_return(args.namespace_count)
 		self._label_intrusions = _raise_on_none_else_return(args.label_intrusions)
+		self._vehicles_per_logger = _raise_on_none_else_return(args.vehicles_per_logger)
+		self._multi_logger_vehicles = []
+		self._turtles_per_sim = _raise_on_none_else_return(args.turtles_per_sim)
+		self._world_vehicles = []
 		self._random_gen_args = _raise_on_none_else_return(args.random_gen_args)
 		self._seed_gens = _raise_on_none_else_return(args.seed_gens)
 		self._current_seed = 0 if self._seed_gens else None
@@ -251,6 +279,36 @@ class LaunchFileOrchestrator(object):
 		for vin, intruded_bool in vin_tuples:
 			root_element.append(self._create_unit(vin, rand_gen, intruded=intruded_bool))
 
+		# Batched turtle worlds in the root namespace for the vehicles collected in the units
+		if self._world_vehicles:
+			root_element.append(self._create_padded_comment(
+				"Turtle simulation ({} vehicles per simulator)".format(self._turtles_per_sim)))
+
+		for index in range(0, len(self._world_vehicles), self._turtles_per_sim):
+			world_args = "--pose-rate {:.2f} --colour-rate {:.2f} --world {}".format(
+				LaunchFileOrchestrator._WORLD_POSE_RATE_IN_HZ, LaunchFileOrchestrator._WORLD_COLOUR_RATE_IN_HZ,
+				" ".join(self._world_vehicles[index:index + self._turtles_per_sim]))
+
+			root_element.append(self._create_node_element(
+				"turtlesim_{}".format(index // self._turtles_per_sim), "py_turtlesim.py", "py_turtlesim",
+				n_args=world_args))
+
+		# Multi-vehicle loggers in the root namespace for the vehicles collected in the units
+		if self._multi_logger_vehicles:
+			root_element.append(self._create_padded_comment(
+				"Logging ({} vehicles per logger)".format(self._vehicles_per_logger)))
+
+		for index in range(0, len(self._multi_logger_vehicles), self._vehicles_per_logger):
+			logger_args = "--vehicles " + " ".join(
+				self._multi_logger_vehicles[index:index + self._vehicles_per_logger])
+
+			if self._label_intrusions:
+				logger_args += " --label"
+
+			root_element.append(self._create_node_element(
+				"logger_{}".format(index // self._vehicles_per_logger), "logger.py", "turtlesim_expl",
+				n_args=logger_args))
+
 		# Add header comments at top of file
 		header_comment = self._create_padded_comment(
 			"{} namespaces {}| {} | {} | {}".format(
@@ -309,8 +367,15 @@ class LaunchFileOrchestrator(object):
 		# [Intrusions] Intruded turtle: Get turtle args
 		turtle_args = self._intrusion_definition.get_turtle_args(intruded=intruded)
 
-		group_element.append(
-			self._create_turtle_group(control_node, turtle_args))
+		# Batched turtle worlds: Only collect the vehicle, the simulators are created for all units at once
+		# VIN[:INTRUSION]
+		if self._turtles_per_sim > 1:
+			turtle_intrusion = self._intrusion_definition.get_turtle_intrusion_level(intruded)
+			self._world_vehicles.append(vin + (":" + turtle_intrusion if turtle_intrusion else ""))
+			group_element.append(self._create_group([control_node], n_ns="turtle"))
+		else:
+			group_element.append(
+				self._create_turtle_group(control_node, turtle_args))
 
 		if self._manual_turtle_mode:
 			return group_element
@@ -374,6 +439,15 @@ class LaunchFileOrchestrator(object):
 
 		assert(len(selected_generator_tuples) == len(selected_generator_keys))
 
+		# Multi-vehicle logging: Only collect the vehicle, the loggers are created for all units at once
+		# VIN:INTRUSION:GEN_KEY,GEN_KEY
+		if self._vehicles_per_logger > 1:
+			self._multi_logger_vehicles.append("{}:{}:{}".format(
+				vin,
+				self._intrusion_definition.get_logger_intrusion_level(intruded),
+				",".join(selected_generator_keys)))
+			return group_element
+
 		# Logging node
 		group_element.append(self._create_padded_comment("Logging"))
 		# <node ns="log" name="logger" pkg="turtlesim_expl" type="logger.py"
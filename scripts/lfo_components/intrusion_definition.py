@@ -81,6 +81,15 @@ class IntrusionDefinition(object):
 		return self._get_arg(condition=(intruded and self._intrude_turtle))
 
 
+	def get_turtle_intrusion_level(self, intruded):
+		""" Return the intrusion level string or empty string for batched turtle world definitions. """
+
+		if not intruded or not self._intrude_turtle:
+			return ""
+
+		return IntrusionDefinition._LEVELS[self._intrusion_level]
+
+
 	def get_logger_arg(self, intruded):
 		""" Return the intrusion arg or empty string based on the specified intrusion level. """
 
@@ -88,6 +97,15 @@ class IntrusionDefinition(object):
 		return (" " + arg) if arg is not None else ""
 
 
+	def get_logger_intrusion_level(self, intruded):
+		""" Return the intrusion level string or empty string for multi-vehicle logger definitions. """
+
+		if not intruded:
+			return ""
+
+		return IntrusionDefinition._LEVELS[self._intrusion_level]
+
+
 	def _get_arg(self, condition):
 		""" Return the intrusion arg or None based on the given boolean. """
 
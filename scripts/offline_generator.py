@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+"""
+Offline data generator
+Simulates vehicles as the launch files of the orchestrator define them and writes the log entries the
+web API would have stored - without ROS, HTTP or waiting for real time.
+For usage see --help output.
+"""
+
+# pylint: disable-msg=C0413; (Imports not at top - the paths have to be set first)
+
+import os
+import sys
+
+# The simulation reuses the code of the ROS nodes and the web API
+_REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_REPO_PATH, "webapp"))
+sys.path.insert(0, os.path.join(_REPO_PATH, "catkin_ws", "src", "turtlesim_expl", "src"))
+
+import argparse
+import random
+import time
+import uuid
+
+import numpy
+
+from generator import generators as GENS
+from pipes.pose_pipe import PosePipe
+from pipes.pose_processor import PoseProcessor, CC_STR, POI_STR, TSP_STR
+from lfo_components.intrusion_definition import IntrusionDefinition
+from lfo_components.vin_generator import VinGenerator
+
+from functionality.country_code_mapper import CountryCodeMapper
+from functionality.poi_mapper import PoiMapper
+from functionality.routing_mapper import RoutingMapper
+from ids.ids_converter import IdsConverter
+from log_entry import LogEntry
+import idse_dao
+
+
+class OfflineGenerator(object):
+	""" Simulates all vehicles at once in steps of the py_turtlesim update interval """
+
+	# py_turtlesim update interval
+	TICK = 0.016
+	# Interval of new random velocities (random_mover runs at 2 Hz)
+	MOVE_INTERVAL = 0.5
+	# Logger rate limits (see logger.py)
+	COLOUR_INTERVAL = 0.7
+	POSE_INTERVAL = 0.1
+
+	SIZE = 500
+
+	# See py_turtlesim.util.Rgb: Pastel purple, yellow, green and blue; strong, medium and light red
+	PALETTE = numpy.array([
+		(150, 140, 200), (170, 250, 140), (120, 180, 130), (120, 180, 200),
+		(255, 0, 0), (200, 50, 50), (170, 80, 80)
+	])
+	_RED_INDICES = {"easy" : 4, "med" : 5, "hard" : 6}
+	# The random_mover's "stay" intelligence only reacts to this colour
+	_ILLEGAL_INDEX = 4
+
+	# random_mover: Each velocity is chosen from 0 and random integers of these ranges
+	_LINEAR_RANGES = [5, 7, 10]
+
+	_INTRUSION_FIELD = "intrusion"
+
+	# Values drawn at once per generator - kept small, as there are many generators
+	_BLOCK_SIZE = 256
+
+
+	def __init__(self, vehicle_count, intrusion_definition, label=True, seed=0, start_time=1514764800):
+		""" Ctor """
+
+		object.__init__(self)
+
+		self._label = label
+		self._start_time = start_time
+
+		random.seed(seed)
+		self._rand = numpy.random.RandomState(seed)
+
+		vin_tuples = intrusion_definition.create_vin_tuples(VinGenerator.generate_vins(vehicle_count))
+		count = len(vin_tuples)
+
+		### Per-vehicle tables ###
+
+		self.vins = [vin for vin, _ in vin_tuples]
+		# Logger intrusion level or None
+		self._intrusions = [
+			intrusion_definition.get_logger_intrusion_level(intruded) or None for _, intruded in vin_tuples]
+		self._client_times = [None] * count
+
+		self._positions = self._rand.uniform(0, OfflineGenerator.SIZE, size=(count, 2))
+		self._velocities = numpy.zeros((count, 2))
+		# Last pose the logger saw - the colour is logged with it
+		self._logged_positions = numpy.zeros((count, 2), dtype=int)
+
+		# Intruded turtles: The whole background is red (see TurtleFrame._draw_red)
+		self._red_indices = numpy.full(count, -1)
+		# random_mover intelligence
+		self._dont_move = numpy.zeros(count, dtype=bool)
+		self._stay_on_illegal = numpy.zeros(count, dtype=bool)
+
+		for vehicle, (_, intruded) in enumerate(vin_tuples):
+			if intrusion_definition.get_turtle_args(intruded) is not None:
+				self._red_indices[vehicle] = OfflineGenerator._RED_INDICES[
+					intrusion_definition.get_logger_intrusion_level(True)]
+
+			intelligence = intrusion_definition.get_turtle_intelligence(intruded, legal_choices=["return"])
+			self._dont_move[vehicle] = intelligence == "dont-move"
+			self._stay_on_illegal[vehicle] = intelligence == "stay"
+
+		# Logger rate limits start one or two seconds late
+		offsets = self._rand.randint(1, 3, size=count).astype(float)
+		self._next_colour = offsets + OfflineGenerator.COLOUR_INTERVAL
+		self._next_pose = offsets + OfflineGenerator.POSE_INTERVAL
+
+		### Per-generator tables ###
+
+		# [(vehicle, app_id, DistributionGenerator)]
+		self._generators = []
+		self._create_generators(vin_tuples, intrusion_definition, seed)
+		next_values = self._rand.uniform(0, 1, size=len(self._generators))
+		self._next_values = next_values / [g.rate_in_hz for _, _, g in self._generators]
+
+		self._background = self._create_background()
+
+
+	def _create_generators(self, vin_tuples, intrusion_definition, seed):
+		""" Select the generators of each vehicle as the orchestrator does. """
+
+		current_seed = seed
+		for vehicle, (_, intruded) in enumerate(vin_tuples):
+			selected_generators = [
+				random.choice(GENS.get_generator_names()) for _ in range(random.randint(1, 10))]
+			selected_generator_frequency = dict([(name, 0) for name in selected_generators])
+
+			for gen_name, intrusion_mode in intrusion_definition.create_generator_tuples(
+				intruded, selected_generators):
+				selected_generator_frequency[gen_name] += 1
+				gen_key = "{}_{}".format(gen_name, selected_generator_frequency[gen_name])
+
+				generator = GENS.GENERATORS[gen_name].copy()
+				if intrusion_mode is not None:
+					generator.activate_intrusion(
+						intrusion_mode, intrusion_definition.get_logger_intrusion_level(True))
+
+				current_seed += 1
+				generator.seed(current_seed)
+				generator.start_buffered(block_size=OfflineGenerator._BLOCK_SIZE)
+
+				# The web API uses the upper-cased topic as app_id
+				self._generators.append((vehicle, gen_key.upper(), generator))
+
+
+	def _create_background(self):
+		""" Create the palette indices of the TurtleFrame background (x, y). """
+
+		background = numpy.empty((OfflineGenerator.SIZE, OfflineGenerator.SIZE), dtype=numpy.uint8)
+		half = OfflineGenerator.SIZE // 2
+
+		# Top left, top right, bottom left, bottom right
+		background[:half, half:] = 0
+		background[half:, half:] = 1
+		background[:half, :half] = 2
+		background[half:, :half] = 3
+
+		return background
+
+
+	def run(self, duration, chunk_size=10000):
+		""" Simulate <duration> seconds and yield the created LogEntry objects in chunks. """
+
+		chunk = []
+		next_move = 0.0
+
+		for step in xrange(int(duration / OfflineGenerator.TICK)):
+			now = step * OfflineGenerator.TICK
+
+			colour_indices = self._get_colour_indices()
+
+			if now >= next_move:
+				self._choose_velocities(colour_indices)
+				next_move += OfflineGenerator.MOVE_INTERVAL
+
+			self._move()
+
+			# Generator values
+			due_generators = numpy.nonzero(self._next_values <= now)[0]
+			for index in due_generators:
+				vehicle, app_id, generator = self._generators[index]
+				self._next_values[index] += 1.0 / generator.rate_in_hz
+				chunk.append(self._create_generator_entry(now, vehicle, app_id, generator))
+
+			# Colours - logged with the last logged position
+			due_colours = numpy.nonzero(self._next_colour <= now)[0]
+			self._next_colour[due_colours] = now + OfflineGenerator.COLOUR_INTERVAL
+			for vehicle in due_colours:
+				chunk.append(self._create_colour_entry(now, vehicle, colour_indices[vehicle]))
+
+			# Poses
+			due_poses = numpy.nonzero(self._next_pose <= now)[0]
+			self._next_pose[due_poses] = now + OfflineGenerator.POSE_INTERVAL
+			self._logged_positions[due_poses] = self._positions[due_poses].astype(int)
+			for vehicle in due_poses:
+				chunk.append(self._create_pose_entry(now, vehicle))
+
+			if len(chunk) >= chunk_size:
+				yield chunk
+				chunk = []
+
+		if chunk:
+			yield chunk
+
+
+	### Simulation ###
+
+
+	def _get_colour_indices(self):
+		""" Look up the colour under each turtle. """
+
+		pixels = self._positions.astype(int)
+		colour_indices = self._background[pixels[:, 0], pixels[:, 1]]
+		return numpy.where(self._red_indices >= 0, self._red_indices, colour_indices)
+
+
+	def _choose_velocities(self, colour_indices):
+		""" Choose the next random velocities of all turtles like the random_mover does. """
+
+		count = len(self.vins)
+		ranges = numpy.array([0] + OfflineGenerator._LINEAR_RANGES)
+
+		bounds = ranges[self._rand.randint(0, len(ranges), size=(count, 2))]
+		self._velocities = numpy.floor(self._rand.uniform(-bounds, bounds + 1))
+
+		stopped = self._dont_move | (self._stay_on_illegal & (colour_indices == OfflineGenerator._ILLEGAL_INDEX))
+		self._velocities[stopped] = 0
+
+
+	def _move(self):
+		""" Integrate all velocities over one tick and clamp to the screen. """
+
+		self._positions += self._velocities * OfflineGenerator.TICK
+		numpy.clip(self._positions, 0, OfflineGenerator.SIZE - 1, out=self._positions)
+
+
+	### Log entries ###
+
+
+	def _create_generator_entry(self, now, vehicle, app_id, generator):
+		""" Create the entry of the next value of the given generator. """
+
+		value, intrusion = generator.generate()
+
+		# Sent as float32 (GenValue) and posted as str()
+		return self._create_entry(now, vehicle, app_id, str(float(numpy.float32(value))),
+			intrusion=intrusion)
+
+
+	def _create_colour_entry(self, now, vehicle, colour_index):
+		""" Create the colour entry of the given vehicle. """
+
+		colour_string = "%s,%s,%s" % tuple(OfflineGenerator.PALETTE[colour_index])
+		pos_x, pos_y = self._logged_positions[vehicle]
+
+		return self._create_entry(now, vehicle, "COLOUR", colour_string,
+			gps_position="{},{}".format(pos_x, pos_y),
+			intrusion="red" if colour_index >= OfflineGenerator._ILLEGAL_INDEX else "normal")
+
+
+	def _create_pose_entry(self, now, vehicle):
+		""" Process the pose of the given vehicle like the logger and map it like the web API. """
+
+		pose_pipe = PosePipe.create(
+			intrusion=self._intrusions[vehicle], intrusion_field=OfflineGenerator._INTRUSION_FIELD,
+			cc=1, poi=1, tsp=1)
+
+		pos_x, pos_y = self._logged_positions[vehicle]
+		request = PoseProcessor.add_to_request({}, pos_x, pos_y)
+		request = pose_pipe.process(request, label=self._label)
+
+		crd_x = request["x"]
+		crd_y = request["y"]
+		intrusion = request.get(OfflineGenerator._INTRUSION_FIELD, "")
+		gps_position = "{},{}".format(crd_x, crd_y)
+
+		processor_name = pose_pipe.get_processor_name()
+		if processor_name == CC_STR:
+			return self._create_entry(now, vehicle, "COUNTRYCODE", str(CountryCodeMapper.map(crd_x, crd_y)),
+				gps_position=gps_position, intrusion=intrusion)
+		elif processor_name == POI_STR:
+			poi_result = PoiMapper.map(request["type"], crd_x, crd_y)
+			level = LogEntry.LEVEL_ERROR if poi_result == "Invalid" else LogEntry.LEVEL_DEFAULT
+			return self._create_entry(now, vehicle, "POI", "{},{}".format(request["type"], poi_result),
+				gps_position=gps_position, intrusion=intrusion, level=level)
+		elif processor_name == TSP_STR:
+			return self._create_entry(now, vehicle, "TSPROUTING",
+				RoutingMapper.map(crd_x, crd_y, request["targ_x"], request["targ_y"]),
+				gps_position=gps_position, intrusion=intrusion)
+
+		raise NotImplementedError("Choice not implemented")
+
+
+	# pylint: disable-msg=R0913; (Too many arguments)
+	def _create_entry(self, now, vehicle, app_id, log_message, gps_position="", intrusion="",
+		level=LogEntry.LEVEL_DEFAULT):
+		""" Create a LogEntry with the client time and a reproducible log ID. """
+
+		if not self._label:
+			intrusion = ""
+
+		return LogEntry(vin=self.vins[vehicle], app_id=app_id, level=level, log_message=log_message,
+			gps_position=gps_position, time_unix=self._create_client_time(now, vehicle),
+			log_id=str(uuid.UUID(int=random.getrandbits(128), version=4)), intrusion=intrusion)
+
+
+	def _create_client_time(self, now, vehicle):
+		""" Create the client time like the web API: Randomly increments time with 5 % chance. """
+
+		client_time = self._client_times[vehicle]
+
+		if client_time is None:
+			client_time = self._start_time + now
+		else:
+			client_time = random.choice([client_time] * 19 + [client_time + random.randint(3600, 57600)])
+
+		self._client_times[vehicle] = client_time
+		return client_time
+
+
+
+### Output ###
+
+
+def _write_log_file(file_path, chunks):
+	""" Write the entries as log lines. returns: The number of entries. """
+
+	count = 0
+	with open(file_path, "w") as file_handle:
+		for chunk in chunks:
+			file_handle.writelines([entry.get_log_string() + "\n" for entry in chunk])
+			count += len(chunk)
+
+	return count
+
+
+def _write_idse_file(file_path, chunks):
+	""" Convert the entries chunk by chunk and write them to an IDSE file. returns: The number of entries. """
+
+	converter = IdsConverter()
+	counter = [0]
+
+	def _yield_ids_entries():
+		for chunk in chunks:
+			counter[0] += len(chunk)
+			ids_entries_dict = converter.log_entries_to_ids_entries_dict(chunk)
+			yield [ids_entry for app_id in sorted(ids_entries_dict) for ids_entry in ids_entries_dict[app_id]]
+
+	idse_dao.save_entry_chunks(file_path, _yield_ids_entries())
+	return counter[0]
+
+
+def _main(args):
+	output_path = args.log_file_path or idse_dao.add_idse_extension(args.idse_file_path)
+	if os.path.lexists(output_path):
+		print("File {} exists already".format(output_path))
+		exit()
+
+	intrusion_definition = IntrusionDefinition(
+		intrusion_percentage=args.intrusion_percentage, intrusion_level=args.intrusion_level,
+		intrude_turtle=args.intrude_turtle, intrude_generators=args.intrude_generators,
+		duplicate_vins=args.duplicate_vins)
+
+	start_time = time.time()
+
+	generator = OfflineGenerator(args.vehicle_count, intrusion_definition, label=args.label_intrusions,
+		seed=args.seed, start_time=args.start_time)
+
+	chunks = generator.run(args.duration)
+	if args.log_file_path:
+		count = _write_log_file(args.log_file_path, chunks)
+	else:
+		count = _write_idse_file(args.idse_file_path, chunks)
+
+	seconds = time.time() - start_time
+	print("Simulated {} vehicles for {} s: {} entries in {:.1f} s ({:.0f} entries/s). Saved to {}".format(
+		len(generator.vins), args.duration, count, seconds, count / max(seconds, 1e-9), output_path))
+
+
+
+if __name__ == "__main__":
+	PARSER = argparse.ArgumentParser(prog="offgen", description="Generate log data without ROS")
+
+	OUTPUT_GROUP = PARSER.add_mutually_exclusive_group(required=True)
+	OUTPUT_GROUP.add_argument("--log", metavar="/FILE/PATH", dest="log_file_path",
+		help="Write log entries to the specified file")
+	OUTPUT_GROUP.add_argument("--idse", metavar="/FILE/PATH", dest="idse_file_path",
+		help="Write IDS entries to the specified IDSE file")
+
+	PARSER.add_argument("--vehicles", "-n", type=int, dest="vehicle_count", metavar="COUNT", default=1,
+		help="Number of vehicles (namespaces) to simulate")
+	PARSER.add_argument("--duration", "-d", type=float, metavar="SECONDS", default=60,
+		help="Simulated time in seconds")
+	PARSER.add_argument("--seed", "-s", type=int, default=0, help="Seed for all random decisions")
+	PARSER.add_argument("--start-time", type=float, default=1514764800, metavar="UNIX_TIME",
+		help="Client time of the first entry of each vehicle")
+	PARSER.add_argument("--dont-label", "-l", action="store_false", dest="label_intrusions",
+		help="Don't label intrusions")
+
+	# Intrusions - see launch_file_orchestrator.py
+	PARSER.add_argument("--intrusions", "-p", type=int, dest="intrusion_percentage",
+		metavar="INTR_PERCENT", default=0, choices=range(1, 101),
+		help="Percentage of intruded vehicles")
+	PARSER.add_argument("--intrusion-level", "-i", dest="intrusion_level",
+		default=IntrusionDefinition.get_intrusion_levels()[0],
+		choices=IntrusionDefinition.get_intrusion_levels(),
+		help="Specify the intrusion level (difficulty)")
+	PARSER.add_argument("--dont-intrude-turtle", "-t", action="store_false", dest="intrude_turtle",
+		help="Disallow turtle intrusions")
+	PARSER.add_argument("--dont-intrude-generators", "-g", action="store_false", dest="intrude_generators",
+		help="Disallow generator intrusions")
+	PARSER.add_argument("--allow-duplicate-vins", "-v", action="store_true", dest="duplicate_vins",
+		help="Allow duplicate VINs")
+
+	_main(PARSER.parse_args())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+""" Unit tests for the offline data generator """
+
+# pylint: disable-msg=W0212; (Illegal access to private members)
+
+import unittest
+
+from offline_generator import OfflineGenerator
+from lfo_components.intrusion_definition import IntrusionDefinition
+from log_entry import LogEntry
+
+
+def _generate_entries(seed):
+	""" Simulate four vehicles, half of them intruded, for six seconds. """
+
+	intrusion_definition = IntrusionDefinition(intrusion_percentage=50, intrusion_level="easy")
+	generator = OfflineGenerator(4, intrusion_definition, seed=seed)
+
+	return [entry for chunk in generator.run(6, chunk_size=100) for entry in chunk]
+
+
+class Tests(unittest.TestCase):
+	""" Tests for the OfflineGenerator """
+
+	def test_same_seed_same_output(self):
+		""" Equal arguments produce identical entries, other seeds different ones """
+
+		to_log_strings = lambda entries: [entry.get_log_string() for entry in entries]
+		log_strings = to_log_strings(_generate_entries(seed=1))
+
+		self.assertGreater(len(log_strings), 100)
+		self.assertEqual(log_strings, to_log_strings(_generate_entries(seed=1)))
+		self.assertNotEqual(log_strings, to_log_strings(_generate_entries(seed=2)))
+
+
+	def test_labels_follow_logger_rules(self):
+		""" Only red colours are labelled red and generators don't log positions """
+
+		entries = _generate_entries(seed=1)
+		red_colours = ["%s,%s,%s" % tuple(colour)
+			for colour in OfflineGenerator.PALETTE[OfflineGenerator._ILLEGAL_INDEX:]]
+
+		colour_entries = [entry for entry in entries if entry.data[LogEntry.APP_ID_FIELD] == "COLOUR"]
+		self.assertEqual(set([entry.intrusion for entry in colour_entries]), set(["red", "normal"]))
+
+		for entry in colour_entries:
+			self.assertEqual(entry.intrusion == "red", entry.data[LogEntry.LOG_MESSAGE_FIELD] in red_colours)
+			self.assertNotEqual(entry.data[LogEntry.GPS_POSITION_FIELD], "")
+
+		generator_entries = [entry for entry in entries
+			if entry.data[LogEntry.APP_ID_FIELD] not in ["COLOUR", "COUNTRYCODE", "POI", "TSPROUTING"]]
+		self.assertGreater(len(generator_entries), 0)
+
+		for entry in generator_entries:
+			self.assertEqual(entry.data[LogEntry.GPS_POSITION_FIELD], "")
+
+
+if __name__ == "__main__":
+	unittest.main()
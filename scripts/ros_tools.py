@@ -1,12 +1,17 @@
 #!/usr/bin/env python
 """ Easy-use interface for ROS control. """
 
+# pylint: disable-msg=C0413; (Imports not at top - the paths have to be set first)
+
 import argparse
 import os
+import sys
 
+# The nodes watch for the STOP file with the StopWatch of the turtlesim_expl package
+_REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_REPO_PATH, "catkin_ws", "src", "turtlesim_expl", "src"))
 
-BASE_PATH = os.path.expanduser("~/ros")
-STOP_FILE_PATH = os.path.join(BASE_PATH, "STOP")
+from stop_watch import BASE_PATH, STOP_FILE_PATH
 
 
 # pylint: disable-msg=W0613; (Unused argument)
@@ -21,6 +26,9 @@ def _stop():
 	if os.path.lexists(STOP_FILE_PATH):
 		print("STOP file exists already.")
 	else:
+		if not os.path.lexists(BASE_PATH):
+			os.makedirs(BASE_PATH)
+		# Creating the file notifies all nodes watching the directory
 		open(STOP_FILE_PATH, "a").close()
 		print("STOP file created.")
 
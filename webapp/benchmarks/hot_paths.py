@@ -0,0 +1,395 @@
+#!/usr/bin/env python
+"""
+Benchmarks of the ingestion and detection hot paths on synthetic entries.
+Run from the webapp folder: python -m benchmarks.hot_paths run|compare ...
+"""
+
+import argparse
+from collections import OrderedDict
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy
+import sklearn.svm as sk_svm
+
+from log_entry import LogEntry
+from state_dao import StateDao
+from functionality.country_code_mapper import CountryCodeMapper
+from ids.intrusion_classifier import IntrusionClassifier
+import ids.ids_converter as ids_converter
+import ids.ids_data as ids_data
+import ids.ids_tools as ids_tools
+import idse_dao
+import util.outp
+import util.prtr
+
+
+VERSION = "1.0"
+
+# Slow-down (current / baseline - 1) from which a benchmark counts as a regression
+DEFAULT_TOLERANCE = 0.2
+
+_PRINTER = util.prtr.Printer(name="BM")
+
+
+### Benchmarks ###
+
+
+# [(name, create)]: create(entries) returns (function to time, number of operations per call)
+_BENCHMARKS = []
+
+
+def benchmark(name):
+	""" Register the decorated creator function as the benchmark with the given name. """
+
+	def _register(create):
+		_BENCHMARKS.append((name, create))
+		return create
+
+	return _register
+
+
+@benchmark("log_entry.construct")
+def _bm_construct(entries):
+	arguments = [(e.data, e.intrusion) for e in entries]
+
+	def _run():
+		for data, intrusion in arguments:
+			LogEntry(vin=data[LogEntry.VIN_FIELD], app_id=data[LogEntry.APP_ID_FIELD],
+				level=data[LogEntry.LEVEL_FIELD], log_message=data[LogEntry.LOG_MESSAGE_FIELD],
+				gps_position=data[LogEntry.GPS_POSITION_FIELD], time_unix=data[LogEntry.TIME_UNIX_FIELD],
+				log_id=data[LogEntry.LOG_ID_FIELD], intrusion=intrusion)
+
+	return (_run, len(entries))
+
+
+@benchmark("log_entry.get_log_string")
+def _bm_get_log_string(entries):
+	return (lambda: [e.get_log_string() for e in entries], len(entries))
+
+
+@benchmark("log_entry.from_log_string")
+def _bm_from_log_string(entries):
+	log_strings = [e.get_log_string() for e in entries]
+	return (lambda: [LogEntry.from_log_string(s) for s in log_strings], len(entries))
+
+
+def _bm_log_entries_to_vectors(app_id):
+	""" Create the conversion benchmark of one app_id. """
+
+	def _create(entries):
+		converter = ids_converter.IdsConverter()
+		app_entries = [e for e in entries if ids_tools.log_entry_to_app_id(e) == app_id]
+		return (lambda: converter.log_entries_to_vectors(app_id, app_entries), len(app_entries))
+
+	return _create
+
+
+for _app_id in ids_data.get_app_ids():
+	benchmark("ids_converter.log_entries_to_vectors." + _app_id)(_bm_log_entries_to_vectors(_app_id))
+
+
+@benchmark("intrusion_classifier.classify")
+def _bm_classify(entries):
+	classifier = IntrusionClassifier.get_singleton()
+
+	# Without models on disk, fit small ones to measure the same code path
+	# pylint: disable-msg=W0212; (Access to a protected member)
+	if classifier._models is None:
+		converter = ids_converter.IdsConverter()
+		classifier._models = {}
+		for app_id in ids_data.get_app_ids():
+			app_entries = [e for e in entries if ids_tools.log_entry_to_app_id(e) == app_id]
+			model = sk_svm.OneClassSVM()
+			model.fit(converter.log_entries_to_vectors(app_id, app_entries[:1000]))
+			classifier._models[app_id] = model
+
+	return (lambda: [classifier.classify(e) for e in entries], len(entries))
+
+
+@benchmark("state_dao.append_to_log")
+def _bm_append_to_log(entries):
+	dao = _create_temporary_state_dao()
+
+	def _run():
+		dao._new_log_entries = []
+		for log_entry in entries:
+			dao.append_to_log(log_entry)
+
+	return (_run, len(entries))
+
+
+@benchmark("state_dao.flush_log")
+def _bm_flush_log(entries):
+	dao = _create_temporary_state_dao()
+
+	def _run():
+		# Fill the in-memory log directly to only time the flush
+		dao._new_log_entries.extend(entries)
+		dao.flush_log()
+
+	return (_run, len(entries))
+
+
+@benchmark("idse_dao.save_entries")
+def _bm_save_entries(entries):
+	ids_entries = _entries_to_ids_entries(entries)
+	temp_dir = _create_temporary_dir()
+	file_paths = (os.path.join(temp_dir, "entries_%s" % i) for i in itertools.count())
+
+	return (lambda: idse_dao.save_entries(next(file_paths), ids_entries), len(ids_entries))
+
+
+@benchmark("idse_dao.yield_entries")
+def _bm_yield_entries(entries):
+	ids_entries = _entries_to_ids_entries(entries)
+	file_path = idse_dao.save_entries(os.path.join(_create_temporary_dir(), "entries"), ids_entries)
+
+	def _run():
+		for _ in idse_dao.yield_entries(file_path):
+			pass
+
+	return (_run, len(ids_entries))
+
+
+@benchmark("mapper.map")
+def _bm_map(entries):
+	positions = _entries_to_positions(entries)
+	return (lambda: [CountryCodeMapper.map(x, y) for x, y in positions], len(positions))
+
+
+@benchmark("mapper.map_many")
+def _bm_map_many(entries):
+	crds_x, crds_y = zip(*_entries_to_positions(entries))
+	return (lambda: CountryCodeMapper.map_many(crds_x, crds_y), len(crds_x))
+
+
+# Functions to call after all benchmarks ran
+_CLEAN_UPS = []
+
+
+def _create_temporary_dir():
+	""" Create a folder which is removed after all benchmarks ran. """
+
+	temp_dir = tempfile.mkdtemp()
+	_CLEAN_UPS.append(lambda: shutil.rmtree(temp_dir))
+	return temp_dir
+
+
+def _create_temporary_state_dao():
+	""" Create a StateDao working in a temporary folder. """
+
+	# The DAO uses paths relative to the working directory
+	cwd = os.getcwd()
+	temp_dir = _create_temporary_dir()
+	os.chdir(temp_dir)
+
+	try:
+		dao = StateDao(verbose=False).__enter__()
+	finally:
+		os.chdir(cwd)
+		# Allow more than one DAO at a time
+		StateDao._INSTANCE = None
+
+	dao._printer = util.prtr.Printer(squelch=True)
+	dao._log_file_path = os.path.join(temp_dir, dao._log_file_path)
+
+	return dao
+
+
+### Running ###
+
+
+def run(entry_count, repeat, name_filter=None):
+	"""
+	Run all benchmarks whose name contains the given filter on the same synthetic entries.
+	returns: The result dict as it is stored as JSON.
+	"""
+
+	entries = _generate_entries(entry_count)
+
+	results = OrderedDict()
+	try:
+		for name, create in _BENCHMARKS:
+			if name_filter is not None and name_filter not in name:
+				continue
+
+			_PRINTER.prt("Running {}... ".format(name), newline=False)
+
+			function, operations = create(entries)
+			times = []
+			for _ in range(repeat):
+				start_time = time.time()
+				function()
+				times.append(time.time() - start_time)
+
+			best_seconds = min(times)
+			results[name] = OrderedDict([
+				("operations", operations),
+				("best_seconds", best_seconds),
+				("median_seconds", float(numpy.median(times))),
+				("operations_per_second", None if best_seconds == 0 else operations / best_seconds)
+			])
+
+			_PRINTER.prt("{:,.0f} ops/s".format(results[name]["operations_per_second"] or 0), preface=False)
+	finally:
+		for clean_up in reversed(_CLEAN_UPS):
+			clean_up()
+		del _CLEAN_UPS[:]
+
+	return OrderedDict([
+		("version", VERSION),
+		("python", platform.python_version()),
+		("entries", entry_count),
+		("repeat", repeat),
+		("results", results)
+	])
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+	"""
+	Compare the best times of the benchmarks both results contain.
+	returns: (table rows including a header, names of the regressed benchmarks)
+	"""
+
+	if baseline["version"] != current["version"]:
+		raise ValueError("Can't compare results of versions {} and {}".format(
+			baseline["version"], current["version"]))
+
+	table = [["Benchmark", "Baseline (ops/s)", "Current (ops/s)", "Change", ""]]
+	regressions = []
+
+	for name, current_result in current["results"].items():
+		if name not in baseline["results"]:
+			continue
+
+		baseline_result = baseline["results"][name]
+		if not baseline_result["best_seconds"] or not current_result["best_seconds"]:
+			continue
+
+		# Normalise per operation - the number of entries may differ between runs
+		baseline_time = baseline_result["best_seconds"] / baseline_result["operations"]
+		current_time = current_result["best_seconds"] / current_result["operations"]
+		slow_down = current_time / baseline_time - 1
+
+		regressed = slow_down > tolerance
+		if regressed:
+			regressions.append(name)
+
+		table.append([
+			name,
+			"{:,.0f}".format(1 / baseline_time),
+			"{:,.0f}".format(1 / current_time),
+			"{:+.1f} %".format((baseline_time / current_time - 1) * 100),
+			"REGRESSION" if regressed else ""
+		])
+
+	return (table, regressions)
+
+
+### Calls ###
+
+
+def _run_call(args):
+	result = run(args.entries, args.repeat, args.filter)
+
+	if args.output:
+		with open(args.output, "w") as output_file:
+			json.dump(result, output_file, indent=1)
+		_PRINTER.prt("Saved result to {}".format(args.output))
+	else:
+		print(json.dumps(result, indent=1))
+
+	if args.baseline:
+		_compare_and_exit(_load_result(args.baseline), result, args.tolerance)
+
+
+def _compare_call(args):
+	_compare_and_exit(_load_result(args.baseline), _load_result(args.result), args.tolerance)
+
+
+def _compare_and_exit(baseline, current, tolerance):
+	""" Print the comparison and exit with an error code on regressions. """
+
+	table, regressions = compare(baseline, current, tolerance)
+
+	if len(table) < 2:
+		util.outp.exit_on_error("The results don't have any benchmarks in common.")
+
+	util.outp.print_table(table, headline="Comparison with baseline (tolerance: {:.0f} %)".format(
+		tolerance * 100))
+
+	if regressions:
+		_PRINTER.prt("")
+		_PRINTER.prt("{} regression(s) found: {}".format(len(regressions), ", ".join(regressions)))
+		sys.exit(1)
+
+	_PRINTER.prt("")
+	_PRINTER.prt("No regressions found.")
+
+
+### Helpers ###
+
+
+def _generate_entries(entry_count):
+	""" Generate the same convertible entries for each run. """
+
+	random.seed(0)
+	return ids_tools.generate_log_entries(entry_count)
+
+
+def _entries_to_ids_entries(entries):
+	""" Convert the given log entries to IdsEntry objects. """
+
+	converter = ids_converter.IdsConverter()
+	ids_entries_dict = converter.log_entries_to_ids_entries_dict(entries, binary=True)
+	return [e for ids_entries in ids_entries_dict.values() for e in ids_entries]
+
+
+def _entries_to_positions(entries):
+	""" Get the (x, y) string tuples of the entries that logged a position. """
+
+	return [tuple(e.data[LogEntry.GPS_POSITION_FIELD].split(","))
+		for e in entries if e.data[LogEntry.GPS_POSITION_FIELD]]
+
+
+def _load_result(file_path):
+	if not os.path.lexists(file_path):
+		util.outp.exit_on_error("File not found: {}".format(file_path))
+
+	with open(file_path, "r") as result_file:
+		return json.load(result_file, object_pairs_hook=OrderedDict)
+
+
+if __name__ == "__main__":
+	PARSER = argparse.ArgumentParser(description="Benchmark the ingestion and detection hot paths")
+	SUBPARSERS = PARSER.add_subparsers(title="Commands")
+
+	RUN_PARSER = SUBPARSERS.add_parser("run", help="Run the benchmarks and emit the result as JSON")
+	RUN_PARSER.add_argument("--entries", "-n", type=int, default=10000, metavar="NUMBER",
+		help="Number of synthetic entries (default: 10000)")
+	RUN_PARSER.add_argument("--repeat", "-r", type=int, default=5, metavar="NUMBER",
+		help="Runs per benchmark, the best one counts (default: 5)")
+	RUN_PARSER.add_argument("--filter", "-f", metavar="TEXT", help="Only run benchmarks containing TEXT")
+	RUN_PARSER.add_argument("--output", "-o", metavar="FILE", help="Store the result instead of printing it")
+	RUN_PARSER.add_argument("--baseline", "-b", metavar="FILE", help="Compare the result with FILE")
+	RUN_PARSER.add_argument("--tolerance", "-t", type=float, default=DEFAULT_TOLERANCE, metavar="FRACTION",
+		help="Slow-down counting as a regression (default: {})".format(DEFAULT_TOLERANCE))
+	RUN_PARSER.set_defaults(function=_run_call)
+
+	COMPARE_PARSER = SUBPARSERS.add_parser("compare", help="Compare a stored result with a baseline")
+	COMPARE_PARSER.add_argument("baseline", metavar="BASELINE", help="The baseline result file")
+	COMPARE_PARSER.add_argument("result", metavar="RESULT", help="The result file to check")
+	COMPARE_PARSER.add_argument("--tolerance", "-t", type=float, default=DEFAULT_TOLERANCE, metavar="FRACTION",
+		help="Slow-down counting as a regression (default: {})".format(DEFAULT_TOLERANCE))
+	COMPARE_PARSER.set_defaults(function=_compare_call)
+
+	ARGS = PARSER.parse_args()
+	ARGS.function(ARGS)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+""" Unit tests for the hot path benchmarks """
+
+import unittest
+
+import benchmarks.hot_paths as hot_paths
+
+
+def _create_result(best_seconds_per_name, operations=1000):
+	""" Create a result with the given best times. """
+
+	results = dict([
+		(name, {"operations" : operations, "best_seconds" : best_seconds})
+		for name, best_seconds in best_seconds_per_name.items()])
+
+	return {"version" : hot_paths.VERSION, "results" : results}
+
+
+class Tests(unittest.TestCase):
+	""" Tests for hot_paths """
+
+	def test_compare(self):
+		""" Only slow-downs above the tolerance count, per operation """
+
+		baseline = _create_result({"same" : 1.0, "slower" : 1.0, "faster" : 1.0, "new" : 1.0})
+		current = _create_result({"same" : 2.0, "slower" : 2.6, "faster" : 1.0, "gone" : 1.0}, 2000)
+		del baseline["results"]["new"]
+
+		table, regressions = hot_paths.compare(baseline, current, tolerance=0.2)
+
+		self.assertEqual(regressions, ["slower"])
+		self.assertEqual(sorted([row[0] for row in table[1:]]), ["faster", "same", "slower"])
+
+
+	def test_compare_versions(self):
+		""" Results of different versions can't be compared """
+
+		baseline = _create_result({"a" : 1.0})
+		baseline["version"] = "0.0"
+
+		with self.assertRaises(ValueError):
+			hot_paths.compare(baseline, _create_result({"a" : 1.0}))
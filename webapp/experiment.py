@@ -2,6 +2,8 @@
 """ The Experiment class and program. """
 
 import argparse
+import csv
+import json
 import os
 import random
 import time
@@ -9,10 +11,12 @@ from collections import namedtuple
 import warnings
 
 import sklearn.metrics as sk_metr
+from sklearn.externals import joblib
 
 import experiment_modules
 from ids.dir_utils import Dir
 from ids.ids_converter import IdsConverter
+import ids.dataset_cache as dataset_cache
 import idse_dao
 import log_file_analysis
 import util.fmtr
@@ -23,6 +27,8 @@ import util.seqr
 
 ITEM_LIMIT = 5000000
 EXPERIMENTS_HOME = "experiments"
+CHECKPOINT_DIR = "checkpoints"
+CHECKPOINT_META_FILE = "experiment.json"
 
 
 ClassifierResultGroup = namedtuple("ClassifierResultGroup", "name classifier result")
@@ -32,13 +38,18 @@ ResultFileGroup = namedtuple("ResultFileGroup", "file_name lines")
 class Experiment(object):
 	""" Do experiments. Start with a(). """
 
-	def __init__(self, file_path, store_title):
-		""" Ctor """
+	def __init__(self, file_path, store_title, processes=None, resume_dir=None):
+		"""
+		Ctor
+		*processes: Number of worker processes for the experiment tasks. None for all cores, 1 to disable.
+		*resume_dir: Directory of an interrupted experiment on the same file. Its finished tasks are skipped.
+		"""
 
 		object.__init__(self)
 
 		# State
 		self.title = None
+		self.processes = processes
 		# Time
 		self.start_time = time.time()
 		self.end_time = None
@@ -46,6 +57,10 @@ class Experiment(object):
 		self.entries = []
 		# ClassifierResultGroup objects (name, classifier, result)
 		self.classifier_results = []
+		# Metrics records (OrderedDict) of the tasks run by the experiment_executor
+		self.task_metrics = []
+		# Time spent loading and converting the input file
+		self.load_time = None
 		# OtherResult objects (file_name lines)
 		self.other_result_files = []
 
@@ -61,6 +76,10 @@ class Experiment(object):
 		if not os.path.lexists(self.file_path):
 			util.outp.exit_on_error("Input file not found: %s" % self.file_path)
 
+		if resume_dir is not None:
+			self.resume_from(resume_dir)
+			return
+
 		self.title = store_title
 		if self.title is None:
 			random_num_str = "".join(str(x) for x in (random.sample(range(0, 15), 5)))
@@ -112,7 +131,11 @@ class Experiment(object):
 		result_file_path = os.path.join(self.experiment_dir_path, "result")
 		stdout_file_path = os.path.join(self.experiment_dir_path, "stdout")
 		classifiers_file_path = os.path.join(self.experiment_dir_path, "classifiers")
-		file_paths = [entry_file_path, result_file_path, stdout_file_path, classifiers_file_path]
+		metrics_csv_file_path = os.path.join(self.experiment_dir_path, "metrics.csv")
+		metrics_json_file_path = os.path.join(self.experiment_dir_path, "metrics.json")
+		metrics_summary_file_path = os.path.join(self.experiment_dir_path, "metrics_summary")
+		file_paths = [entry_file_path, result_file_path, stdout_file_path, classifiers_file_path,
+			metrics_csv_file_path, metrics_json_file_path, metrics_summary_file_path]
 		other_result_files_paths = []
 		for file_name, _ in self.other_result_files:
 			oth_res_path_creation = os.path.join(self.experiment_dir_path, file_name)
@@ -144,6 +167,10 @@ class Experiment(object):
 		result_lines = self.create_result_lines()
 		Dir.write_lines(result_file_path, result_lines)
 
+		if self.task_metrics:
+			self.storer_printer.prt("Saving task metrics...")
+			self.store_metrics(metrics_csv_file_path, metrics_json_file_path, metrics_summary_file_path)
+
 		if self.other_result_files:
 			for oth_res_path, (oth_res_name, oth_res_lines) in zip(other_result_files_paths, self.other_result_files):
 				self.storer_printer.prt("Saving others: %s..." % oth_res_name)
@@ -157,6 +184,92 @@ class Experiment(object):
 		Dir.write_lines(stdout_file_path, stdout_lines)
 
 
+	def resume_from(self, experiment_dir):
+		""" Continue the interrupted experiment in the given directory. """
+
+		meta_path = os.path.join(experiment_dir, CHECKPOINT_DIR, CHECKPOINT_META_FILE)
+
+		if not os.path.lexists(meta_path):
+			util.outp.exit_on_error("No checkpoints found in: %s" % experiment_dir)
+
+		if os.path.lexists(os.path.join(experiment_dir, "result")):
+			util.outp.exit_on_error("Experiment is already complete: %s" % experiment_dir)
+
+		with open(meta_path, "r") as meta_file:
+			meta = json.load(meta_file)
+
+		if meta["dataset_key"] != dataset_cache.get_key(self.file_path, ITEM_LIMIT):
+			util.outp.exit_on_error("Experiment in %s was run on a different file." % experiment_dir)
+
+		self.title = meta["title"]
+		self.experiment_dir_path = experiment_dir
+
+		finished_count = len([f for f in os.listdir(os.path.dirname(meta_path)) if f.endswith(".pickle")])
+		self.storer_printer.prt("Resuming experiment \"%s\" with %s finished tasks..."
+			% (self.title, finished_count))
+
+
+	def store_metrics(self, csv_file_path, json_file_path, summary_file_path):
+		""" Store the task metrics as CSV and JSON and a summary per cycle and classifier. """
+
+		with open(csv_file_path, "wb") as csv_file:
+			writer = csv.DictWriter(csv_file, fieldnames=self.task_metrics[0].keys())
+			writer.writeheader()
+			writer.writerows(self.task_metrics)
+
+		with open(json_file_path, "w") as json_file:
+			json.dump({"load_seconds" : self.load_time, "tasks" : self.task_metrics}, json_file, indent=1)
+
+		storer = util.prtr.Storer()
+		util.outp.print_table(self.create_metrics_summary_table(),
+			headline="Task metrics | Loading took %s" % util.fmtr.format_time_passed(self.load_time or 0),
+			printer=storer)
+
+		summary_lines = storer.get_messages()
+		Dir.write_lines(summary_file_path, summary_lines)
+
+		for line in summary_lines:
+			self.storer_printer.prt(line)
+
+
+	def create_metrics_summary_table(self):
+		""" Sum the task metrics up per cycle and classifier, in order of appearance. """
+
+		# { (name, classifier) : [metrics] }
+		metrics_per_group = {}
+		groups = []
+		for metrics in self.task_metrics:
+			group = (metrics["name"], metrics["classifier"])
+			if group not in metrics_per_group:
+				metrics_per_group[group] = []
+				groups.append(group)
+			metrics_per_group[group].append(metrics)
+
+		total = lambda group_metrics, key: sum([m[key] or 0 for m in group_metrics])
+		per_second = lambda rows, seconds: "-" if seconds == 0 else "{:,.0f}".format(rows / seconds)
+		seconds_str = lambda seconds: "{:.2f}".format(seconds)
+
+		table = [["Name", "Classifier", "Tasks", "Convert (s)", "Fit (s)", "Predict (s)",
+			"Fit rows/s", "Predict rows/s", "Peak RSS (MB)", "SVs", "Model size (KB)"]]
+
+		for name, classifier in groups:
+			group_metrics = metrics_per_group[(name, classifier)]
+			table.append([
+				name, classifier, len(group_metrics),
+				seconds_str(total(group_metrics, "convert_seconds")),
+				seconds_str(total(group_metrics, "fit_seconds")),
+				seconds_str(total(group_metrics, "predict_seconds")),
+				per_second(total(group_metrics, "train_rows"), total(group_metrics, "fit_seconds")),
+				per_second(total(group_metrics, "test_rows"), total(group_metrics, "predict_seconds")),
+				"{:.0f}".format(max([m["peak_rss_mb"] for m in group_metrics])),
+				("-" if all([m["support_vectors"] is None for m in group_metrics])
+					else "{:,}".format(total(group_metrics, "support_vectors"))),
+				"{:,.0f}".format(total(group_metrics, "model_bytes") / 1024.0)
+			])
+
+		return table
+
+
 	def retrieve_experiment(self, experiment_dir):
 		raise NotImplementedError()
 		# return (test_set, score_set, classifier, result)
@@ -264,6 +377,54 @@ class Experiment(object):
 		)
 
 
+	def has_checkpoint(self, task):
+		""" Check whether the given experiment_executor.Task finished in an earlier run. """
+		return os.path.lexists(self.get_checkpoint_path(task))
+
+
+	def save_checkpoint(self, task):
+		""" Store the latest classifier result as the result of the given task. """
+
+		checkpoint_dir = os.path.join(self.experiment_dir_path, CHECKPOINT_DIR)
+		meta_path = os.path.join(checkpoint_dir, CHECKPOINT_META_FILE)
+
+		if not os.path.lexists(meta_path):
+			Dir.ensure_folder_exists(checkpoint_dir)
+			meta = {"title" : self.title, "dataset_key" : dataset_cache.get_key(self.file_path, ITEM_LIMIT)}
+			with open(meta_path, "w") as meta_file:
+				json.dump(meta, meta_file)
+
+		# Write to a temporary path first to never leave a broken checkpoint behind
+		checkpoint_path = self.get_checkpoint_path(task)
+		temp_path = checkpoint_path + ".tmp"
+		joblib.dump((tuple(self.classifier_results[-1]), self.task_metrics[-1]), temp_path)
+		os.rename(temp_path, checkpoint_path)
+
+
+	def load_checkpoint(self, task):
+		""" Add the stored result of the given task. """
+
+		self.storer_printer.prt("Restored [%s] for app_id [%s] and classifier [%s]"
+			% (task.name, task.app_id, task.classifier_name))
+
+		result_group, metrics = joblib.load(self.get_checkpoint_path(task))
+		self.classifier_results.append(ClassifierResultGroup(*result_group))
+		self.task_metrics.append(metrics)
+
+
+	def get_checkpoint_path(self, task):
+		""" Get the checkpoint path of the given task. Includes the result and the confusion matrix. """
+
+		file_name = Dir.remove_disallowed_characters(
+			"%s_%s_%s" % (task.name, task.app_id, task.classifier_name))
+		return os.path.join(self.experiment_dir_path, CHECKPOINT_DIR, file_name + ".pickle")
+
+
+	def add_task_metrics(self, metrics):
+		""" Add the metrics record of a finished experiment_executor task. """
+		self.task_metrics.append(metrics)
+
+
 	def add_result_file(self, file_name, lines):
 		""" Add an arbitrary result file to the result file list. """
 
@@ -271,20 +432,19 @@ class Experiment(object):
 
 
 	def read_convert(self, file_path):
-		""" Read IDS entries from the given file and convert the result. """
+		""" Read IDS entries from the given file and convert the result. Uses the dataset cache. """
 
 		converter = IdsConverter()
+		start_time = time.time()
 
-		self.entries = []
-
-		for entry in idse_dao.yield_entries(file_path):
-			self.entries.append(entry)
+		dataset = dataset_cache.load_dataset(file_path, ITEM_LIMIT, self.storer_printer)
+		if len(dataset.app_ids) >= ITEM_LIMIT:
+			warnings.warn("Skipping remaining entries - limit of %s reached!" % ITEM_LIMIT)
 
-			if len(self.entries) >= 5000000:
-				warnings.warn("Skipping remaining entries - limit of 5000000 reached!")
-				break
+		self.entries = dataset_cache.dataset_to_ids_entries(dataset)
 
 		ids_entries_dict = converter.ids_entries_to_dict(self.entries)
+		self.load_time = time.time() - start_time
 
 		return ids_entries_dict
 
@@ -310,10 +470,14 @@ if __name__ == "__main__":
 		PARSER = argparse.ArgumentParser()
 		PARSER.add_argument("file_path", metavar="PATH/FILE", help="Log file")
 		PARSER.add_argument("--store", "-s", metavar="TITLE", help="Experiment title")
+		PARSER.add_argument("--processes", "-p", type=int, metavar="NUMBER",
+			help="Number of worker processes (default: all cores)")
+		PARSER.add_argument("--resume", "-r", metavar="DIR",
+			help="Continue the interrupted experiment in the given directory")
 
 		ARGS = PARSER.parse_args()
 
-		EXPERIMENT = Experiment(ARGS.file_path, ARGS.store)
+		EXPERIMENT = Experiment(ARGS.file_path, ARGS.store, ARGS.processes, ARGS.resume)
 		EXPERIMENT.run()
 
 		exit()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+""" Run the (cycle, app_id, classifier) tasks of an experiment on a process pool """
+
+from collections import namedtuple, OrderedDict
+import contextlib
+import cPickle
+import multiprocessing
+import random
+import resource
+import time
+
+import numpy
+import sklearn.ensemble as sk_ens
+import sklearn.svm as sk_svm
+
+import ids.ids_tools as ids_tools
+import util.prtr
+
+
+# name: The cycle, e.g. "CLeN"; classifier_name: A key of CLASSIFIERS; arguments: Passed to the task function
+Task = namedtuple("Task", "name app_id classifier_name seed arguments")
+
+# Each factory receives the seed of its task
+CLASSIFIERS = {
+	"OneClassSVM" : lambda seed: sk_svm.OneClassSVM(),
+	"IsolationForest" : lambda seed: sk_ens.IsolationForest(random_state=seed)
+}
+
+
+# Set before the pool is created: The forked workers share them without copying.
+_SHARED_DATA = None
+_TASK_FUNCTION = None
+
+# Phases of the running task: { phase : (seconds, rows) }
+_PHASES = None
+# Output of the running task
+_TASK_PRINTER = None
+
+
+def create_task(name, app_id, classifier_name, arguments=None):
+	"""
+	Create a task. The seed is derived from the cycle name and app_id only: Tasks of the same
+	cycle and app draw the same random numbers, so their classifiers see the same split.
+	"""
+
+	if classifier_name not in CLASSIFIERS:
+		raise ValueError("Unknown classifier: %s" % classifier_name)
+
+	seed = int(ids_tools.get_md5_hex([name, app_id])[:8], 16)
+	return Task(name, app_id, classifier_name, seed, arguments)
+
+
+def create_classifier(task):
+	""" Create the unfitted classifier of the given task. """
+	return CLASSIFIERS[task.classifier_name](task.seed)
+
+
+def get_task_printer():
+	"""
+	Get the printer of the running task. Used by the task functions instead of the experiment's
+	printer, which the pool workers only have a copy of: The lines are printed by the experiment
+	once the task's result is stored, so the stored output doesn't depend on the process count.
+	"""
+	return _TASK_PRINTER
+
+
+@contextlib.contextmanager
+def timed(phase, rows=0):
+	"""
+	Measure the wall time of a phase of the running task. Used by the task functions.
+	*phase: "convert", "fit" or "predict"
+	*rows: Number of rows handled in the phase
+	"""
+
+	start_time = time.time()
+	yield
+
+	seconds, previous_rows = _PHASES.get(phase, (0.0, 0))
+	_PHASES[phase] = (seconds + time.time() - start_time, previous_rows + rows)
+
+
+def run_tasks(experiment, tasks, task_function, shared_data):
+	"""
+	Run all tasks and store their results in the given experiment in task order. Each result is
+	checkpointed as soon as it is stored; tasks with a checkpoint from an earlier run are skipped.
+	*task_function: Module-level or static function (shared_data, task) -> (classifier, y_true, y_pred).
+	Wrap its phases in timed() to include them in the task's metrics.
+	Its output goes to get_task_printer() and is printed before its result is stored.
+	*shared_data: Passed to each call of the task function, e.g. the converted entries.
+	"""
+
+	global _SHARED_DATA, _TASK_FUNCTION
+
+	finished = [experiment.has_checkpoint(task) for task in tasks]
+	pending_tasks = [task for task, is_finished in zip(tasks, finished) if not is_finished]
+
+	processes = experiment.processes
+	if processes is None:
+		processes = multiprocessing.cpu_count()
+	processes = max(1, min(processes, len(pending_tasks)))
+
+	experiment.storer_printer.prt("Running {} of {} tasks with {} process{}...".format(
+		len(pending_tasks), len(tasks), processes, "es" if processes > 1 else ""))
+
+	_SHARED_DATA = shared_data
+	_TASK_FUNCTION = task_function
+	pool = None
+
+	try:
+		results = None
+		if processes == 1:
+			results = (_run_task(task) for task in pending_tasks)
+		else:
+			pool = multiprocessing.Pool(processes=processes)
+			# imap keeps the order of the tasks while yielding each result as soon as it's available
+			results = pool.imap(_run_task, pending_tasks)
+
+		for task, is_finished in zip(tasks, finished):
+			if is_finished:
+				experiment.load_checkpoint(task)
+				continue
+
+			classifier, y_true, y_pred, metrics, messages = next(results)
+			for message in messages:
+				experiment.storer_printer.prt(message)
+			experiment.visualise_store(task.name, task.app_id, classifier, y_true, y_pred)
+			experiment.add_task_metrics(metrics)
+			experiment.save_checkpoint(task)
+	finally:
+		if pool is not None:
+			pool.terminate()
+			pool.join()
+
+		_SHARED_DATA = None
+		_TASK_FUNCTION = None
+
+
+def _run_task(task):
+	"""
+	Pool worker: Seed all random number generators and run the given task.
+	returns: (classifier, y_true, y_pred, metrics, messages)
+	"""
+
+	global _PHASES, _TASK_PRINTER
+	_PHASES = {}
+	_TASK_PRINTER = util.prtr.Storer()
+
+	random.seed(task.seed)
+	numpy.random.seed(task.seed)
+
+	classifier, y_true, y_pred = _TASK_FUNCTION(_SHARED_DATA, task)
+
+	return (classifier, y_true, y_pred, _create_metrics(task, classifier), _TASK_PRINTER.get_messages())
+
+
+def _create_metrics(task, classifier):
+	""" Create the metrics record of the given finished task from the measured phases. """
+
+	get_seconds = lambda phase: _PHASES.get(phase, (0.0, 0))[0]
+	get_rows = lambda phase: _PHASES.get(phase, (0.0, 0))[1]
+	get_rows_per_second = lambda phase: (
+		None if get_seconds(phase) == 0 else get_rows(phase) / get_seconds(phase))
+
+	metrics = OrderedDict()
+	metrics["name"] = task.name
+	metrics["app_id"] = task.app_id
+	metrics["classifier"] = task.classifier_name
+	metrics["train_rows"] = get_rows("fit")
+	metrics["test_rows"] = get_rows("predict")
+	metrics["convert_seconds"] = get_seconds("convert")
+	metrics["fit_seconds"] = get_seconds("fit")
+	metrics["predict_seconds"] = get_seconds("predict")
+	metrics["fit_rows_per_second"] = get_rows_per_second("fit")
+	metrics["predict_rows_per_second"] = get_rows_per_second("predict")
+	# Peak of the whole (worker) process so far - Linux reports kilobytes
+	metrics["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+	metrics["support_vectors"] = len(classifier.support_) if hasattr(classifier, "support_") else None
+	# The pickled classifier is what a saved model takes up on disk
+	metrics["model_bytes"] = len(cPickle.dumps(classifier, cPickle.HIGHEST_PROTOCOL))
+
+	return metrics
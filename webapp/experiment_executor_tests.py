@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+""" Unit tests for the experiment executor """
+
+import random
+import unittest
+import warnings
+
+import numpy
+
+import experiment_executor
+
+
+class FakeExperiment(object):
+	""" Collects the stored results instead of scoring them. """
+
+	def __init__(self, processes):
+		object.__init__(self)
+		self.processes = processes
+		self.storer_printer = FakePrinter()
+		self.results = []
+		self.checkpoints = {}
+		self.task_metrics = []
+
+
+	def visualise_store(self, name, app_id, classifier, y_true, y_pred):
+		self.results.append((name, app_id, type(classifier).__name__, list(y_true), list(y_pred)))
+
+
+	def add_task_metrics(self, metrics):
+		self.task_metrics.append(metrics)
+
+
+	def has_checkpoint(self, task):
+		return task in self.checkpoints
+
+
+	def save_checkpoint(self, task):
+		self.checkpoints[task] = self.results[-1]
+
+
+	def load_checkpoint(self, task):
+		self.results.append(self.checkpoints[task])
+
+
+	def messages_of_tasks(self):
+		return [m for m in self.storer_printer.messages if m.startswith("Fitting")]
+
+
+class FakePrinter(object):
+	""" Collects all output. """
+
+	def __init__(self):
+		object.__init__(self)
+		self.messages = []
+
+
+	def prt(self, message, *_, **__):
+		self.messages.append(message)
+
+
+def _fit_random_data(shared_data, task):
+	""" Fit the task's classifier on random data of the shared size. """
+
+	experiment_executor.get_task_printer().prt("Fitting {} {}".format(task.name, task.app_id))
+
+	X = numpy.random.rand(shared_data, 2)
+	y_true = [random.choice([1, -1]) for _ in range(shared_data)]
+
+	classifier = experiment_executor.create_classifier(task)
+	with experiment_executor.timed("fit", len(X)):
+		classifier.fit(X)
+
+	return (classifier, y_true, classifier.predict(X))
+
+
+def _create_tasks():
+	""" Create tasks for two cycles, three apps and both classifiers. """
+
+	tasks = []
+	for name in ["CLeN", "DS10"]:
+		for app_id in ["GAUSSIAN", "COLOUR", "POI"]:
+			for classifier_name in ["OneClassSVM", "IsolationForest"]:
+				tasks.append(experiment_executor.create_task(name, app_id, classifier_name))
+
+	return tasks
+
+
+class Tests(unittest.TestCase):
+	""" Tests for experiment_executor """
+
+	def test_parallel_equals_sequential(self):
+		""" Seeded tasks give the same results in the same order in- and out-of-process """
+
+		tasks = _create_tasks()
+
+		sequential = FakeExperiment(processes=1)
+		parallel = FakeExperiment(processes=3)
+
+		with warnings.catch_warnings():
+			warnings.simplefilter("ignore")
+			experiment_executor.run_tasks(sequential, tasks, _fit_random_data, 50)
+			experiment_executor.run_tasks(parallel, tasks, _fit_random_data, 50)
+
+		self.assertEqual(sequential.results, parallel.results)
+		self.assertEqual(
+			[(t.name, t.app_id, t.classifier_name) for t in tasks],
+			[(name, app_id, clf) for name, app_id, clf, _, _ in sequential.results])
+
+		# The output of the tasks is printed by the experiment in task order
+		task_messages = ["Fitting {} {}".format(t.name, t.app_id) for t in tasks]
+		self.assertEqual(sequential.messages_of_tasks(), task_messages)
+		self.assertEqual(parallel.messages_of_tasks(), task_messages)
+
+		# Both classifiers of a cycle and app see the same data
+		self.assertEqual(sequential.results[0][3], sequential.results[1][3])
+		self.assertNotEqual(sequential.results[0][3], sequential.results[2][3])
+
+		for task, metrics in zip(tasks, parallel.task_metrics):
+			self.assertEqual((task.name, task.app_id), (metrics["name"], metrics["app_id"]))
+			self.assertEqual(metrics["train_rows"], 50)
+			self.assertEqual(metrics["test_rows"], 0)
+			self.assertGreater(metrics["fit_rows_per_second"], 0)
+			self.assertGreater(metrics["model_bytes"], 0)
+			self.assertEqual(metrics["support_vectors"] is None, task.classifier_name == "IsolationForest")
+
+
+	def test_resume(self):
+		""" Checkpointed tasks are restored in order instead of being run again """
+
+		tasks = _create_tasks()
+
+		complete = FakeExperiment(processes=1)
+		resumed = FakeExperiment(processes=2)
+		resumed.checkpoints = {tasks[0] : "first", tasks[3] : "fourth"}
+
+		with warnings.catch_warnings():
+			warnings.simplefilter("ignore")
+			experiment_executor.run_tasks(complete, tasks, _fit_random_data, 50)
+			experiment_executor.run_tasks(resumed, tasks, _fit_random_data, 50)
+
+		self.assertEqual(resumed.results[0], "first")
+		self.assertEqual(resumed.results[3], "fourth")
+		self.assertEqual(resumed.results[1:3] + resumed.results[4:], complete.results[1:3] + complete.results[4:])
+		self.assertEqual(len(resumed.checkpoints), len(tasks))
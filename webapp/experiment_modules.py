@@ -11,6 +11,7 @@ import sklearn.ensemble as sk_ens
 import sklearn.svm as sk_svm
 import sklearn.model_selection as sk_mod
 
+import experiment_executor
 from ids.dir_utils import Dir
 from ids.ids_converter import IdsConverter
 from ids.ids_one_hot_vs_mapping_converter import OneHotVsMappingConverter
@@ -122,6 +123,7 @@ class CleanTrainingVsDistorted(ModuleInterface):
 	"""
 
 	LIMIT_PER_APP = 100000
+	PERCENTAGES = [0, 0.1, 0.2, 0.3, 0.4, 0.5]
 
 	@staticmethod
 	def run(experiment):
@@ -131,12 +133,16 @@ class CleanTrainingVsDistorted(ModuleInterface):
 
 		experiment.storer_printer.prt("Running experiment...")
 
-		CleanTrainingVsDistorted.run_cycle(ids_entries_dict, 0, experiment)
-		CleanTrainingVsDistorted.run_cycle(ids_entries_dict, 0.1, experiment)
-		CleanTrainingVsDistorted.run_cycle(ids_entries_dict, 0.2, experiment)
-		CleanTrainingVsDistorted.run_cycle(ids_entries_dict, 0.3, experiment)
-		CleanTrainingVsDistorted.run_cycle(ids_entries_dict, 0.4, experiment)
-		CleanTrainingVsDistorted.run_cycle(ids_entries_dict, 0.5, experiment)
+		tasks = []
+		for percentage_intruded_training in CleanTrainingVsDistorted.PERCENTAGES:
+			name = CleanTrainingVsDistorted.get_name(percentage_intruded_training)
+
+			for app_id in sorted(ids_entries_dict.keys()):
+				tasks.append(experiment_executor.create_task(
+					name, app_id, "OneClassSVM", percentage_intruded_training))
+
+		experiment_executor.run_tasks(
+			experiment, tasks, CleanTrainingVsDistorted.run_task, (ids_entries_dict, IdsConverter()))
 
 		experiment.add_result_file("run_iterations", ["Ran iterations with 0, 10, 20, 30, 40, 50 %"])
 
@@ -144,40 +150,40 @@ class CleanTrainingVsDistorted(ModuleInterface):
 
 
 	@staticmethod
-	def run_cycle(ids_entries_dict, percentage_intruded_training, experiment):
-		""" Full cycle for all apps with the given percentage. """
+	def run_task(shared_data, task):
+		""" One app with the percentage of intruded training entries given in the task's arguments. """
+
+		ids_entries_dict, converter = shared_data
+		ids_entries = ids_entries_dict[task.app_id]
+		percentage_intruded_training = task.arguments
+		printer = experiment_executor.get_task_printer()
+
+		verify_ids_entries(ids_entries, task.app_id, printer)
 
 		if percentage_intruded_training < 0:
 			raise ValueError("percentage_intruded_training needs to be > 0")
 		elif percentage_intruded_training == 0:
-			experiment.storer_printer.prt("Scoring clean classifier...")
+			printer.prt("Scoring clean classifier for %s..." % task.app_id)
 		else:
-			experiment.storer_printer.prt("Scoring distorted classifier (%s)..."
-				% util.fmtr.format_percentage(percentage_intruded_training))
-
-		for app_id, ids_entries in util.seqr.yield_items_in_key_order(ids_entries_dict):
-			CleanTrainingVsDistorted.run_cycle_for_app(
-				ids_entries, app_id, percentage_intruded_training, experiment)
-
-
-	@staticmethod
-	def run_cycle_for_app(ids_entries, app_id, percentage_intruded_training, experiment):
-		""" One app with the given percentage. """
-
-		verify_ids_entries(ids_entries, app_id, experiment.storer_printer)
+			printer.prt("Scoring distorted classifier (%s) for %s..."
+				% (util.fmtr.format_percentage(percentage_intruded_training), task.app_id))
 
 		training, scoring = CleanTrainingVsDistorted.custom_train_test_split(
 			ids_entries, percentage_intruded_training)
 
-		X_train, _ = IdsConverter().ids_entries_to_X_y(training)
-		X_test, y_true = IdsConverter().ids_entries_to_X_y(scoring)
+		with experiment_executor.timed("convert", len(training) + len(scoring)):
+			X_train, _ = converter.ids_entries_to_X_y(training)
+			X_test, y_true = converter.ids_entries_to_X_y(scoring)
+
+		classifier = experiment_executor.create_classifier(task)
+
+		with experiment_executor.timed("fit", len(X_train)):
+			classifier.fit(X_train)
 
-		classifier = sk_svm.OneClassSVM()
-		name = CleanTrainingVsDistorted.get_name(percentage_intruded_training)
+		with experiment_executor.timed("predict", len(X_test)):
+			y_pred = classifier.predict(X_test)
 
-		classifier.fit(X_train)
-		y_pred = classifier.predict(X_test)
-		experiment.visualise_store(name, app_id, classifier, y_true, y_pred)
+		return (classifier, y_true, y_pred)
 
 
 	@staticmethod
@@ -305,8 +311,15 @@ class AllVsSpecSvmVsIso(ModuleInterface):
 		# ids_entries: { app_id, vector, my_class }
 		ids_entries_dict = experiment.read_convert(experiment.file_path)
 
+		tasks = []
 		for app_id, ids_entries in util.seqr.yield_items_in_key_order(ids_entries_dict):
-			AllVsSpecSvmVsIso.handle_app(app_id, ids_entries, experiment)
+			verify_ids_entries(ids_entries, app_id, experiment.storer_printer)
+
+			for classifier_name in ["OneClassSVM", "IsolationForest"]:
+				tasks.append(experiment_executor.create_task("SPEC", app_id, classifier_name))
+
+		experiment_executor.run_tasks(
+			experiment, tasks, AllVsSpecSvmVsIso.handle_app, (ids_entries_dict, IdsConverter()))
 
 		experiment.storer_printer.prt("Done.")
 
@@ -351,23 +364,26 @@ class AllVsSpecSvmVsIso(ModuleInterface):
 
 
 	@staticmethod
-	def handle_app(app_id, ids_entries, experiment):
-		""" Full flow for one classifier. """
+	def handle_app(shared_data, task):
+		""" Full flow for one specialised classifier. Both classifiers of an app see the same split. """
 
-		verify_ids_entries(ids_entries, app_id, experiment.storer_printer)
+		ids_entries_dict, converter = shared_data
 
-		training, scoring = ids_tools.ids_entries_to_train_test(ids_entries)
-		X_train, _ = IdsConverter().ids_entries_to_X_y(training)
-		X_test, y_true = IdsConverter().ids_entries_to_X_y(scoring)
+		training, scoring = ids_tools.ids_entries_to_train_test(ids_entries_dict[task.app_id])
 
-		classifiers = [
-			sk_svm.OneClassSVM(),
-			sk_ens.IsolationForest()
-		]
-		for classifier in classifiers:
+		with experiment_executor.timed("convert", len(training) + len(scoring)):
+			X_train, _ = converter.ids_entries_to_X_y(training)
+			X_test, y_true = converter.ids_entries_to_X_y(scoring)
+
+		classifier = experiment_executor.create_classifier(task)
+
+		with experiment_executor.timed("fit", len(X_train)):
 			classifier.fit(X_train)
+
+		with experiment_executor.timed("predict", len(X_test)):
 			y_pred = classifier.predict(X_test)
-			experiment.visualise_store("SPEC", app_id, classifier, y_true, y_pred)
+
+		return (classifier, y_true, y_pred)
 
 
 # _, _ = self.preprocess_fit_score(app_id, ids_entries,
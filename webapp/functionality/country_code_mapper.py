@@ -14,8 +14,17 @@ class CountryCodeMapper(MapperBase):
 		["FR", "FR", "DE", "IT", "IT"]
 	]
 
+	_codes_grid = MapperBase._compile(codes)
+
 	@staticmethod
 	def map(crd_x, crd_y):
 		""" Maps given coordinates to country code """
 
-		return MapperBase._map(CountryCodeMapper.codes, crd_x, crd_y)
+		return CountryCodeMapper._codes_grid.map(crd_x, crd_y)
+
+
+	@staticmethod
+	def map_many(crds_x, crds_y):
+		""" Maps the given coordinate sequences pairwise to country codes (numpy array). """
+
+		return CountryCodeMapper._codes_grid.map_many(crds_x, crds_y)
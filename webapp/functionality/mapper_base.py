@@ -4,6 +4,8 @@
 import collections
 import math
 
+import numpy
+
 
 class MapperBase(object):
 	""" Base class for mappers """
@@ -18,21 +20,9 @@ class MapperBase(object):
 
 
 	@staticmethod
-	def _map(matrix, crd_x, crd_y):
-		""" Maps given coordinates to the given matrix """
-
-		# Throws if incorrect size
-		MapperBase._assert_matrix_validity(matrix)
-
-		# Both throw if invalid value
-		crd_x = float(crd_x)
-		crd_y = float(crd_y)
-
-		# Both throw if invalid value
-		mapped_x = MapperBase._map_coordinate(crd_x, MapperBase._get_width())
-		mapped_y = MapperBase._map_coordinate(crd_y, MapperBase._get_height())
-
-		return matrix[mapped_x][mapped_y]
+	def _compile(matrix):
+		""" Compile the given matrix into a LookupGrid. Throws if incorrect size. """
+		return LookupGrid(matrix)
 
 
 	@staticmethod
@@ -91,3 +81,98 @@ class MapperBase(object):
 	@staticmethod
 	def _get_height():
 		return MapperBase._SUB_SPACE_SIZE[MapperBase._X_FIELD]
+
+
+
+class LookupGrid(object):
+	"""
+	A matrix compiled into flat lookup tables: The cell of every integer coordinate is computed once,
+	so mapping a coordinate is two int conversions and an index instead of float arithmetic.
+	"""
+
+	def __init__(self, matrix):
+		""" Ctor """
+
+		object.__init__(self)
+
+		# Throws if incorrect size
+		MapperBase._assert_matrix_validity(matrix)
+
+		width = MapperBase._get_width()
+		height = MapperBase._get_height()
+
+		# Truncating a coordinate only yields its cell if the cells start at integer coordinates
+		if 500 % (width - 1) != 0 or 500 % (height - 1) != 0:
+			raise ValueError("Cells must start at integer coordinates")
+
+		# All coordinates mapping into the matrix are in [0, limit)
+		self._limit_x = LookupGrid._count_coordinates(width)
+		self._limit_y = LookupGrid._count_coordinates(height)
+
+		# matrix[x][y] is at x * len(matrix[0]) + y
+		self._values = [value for column in matrix for value in column]
+		self._x_offsets = [
+			MapperBase._map_coordinate(crd, width) * len(matrix[0]) for crd in range(self._limit_x)]
+		self._y_cells = [MapperBase._map_coordinate(crd, height) for crd in range(self._limit_y)]
+
+		self._values_array = numpy.array(self._values, dtype=object)
+		self._x_offsets_array = numpy.array(self._x_offsets)
+		self._y_cells_array = numpy.array(self._y_cells)
+
+
+	def map(self, crd_x, crd_y):
+		""" Map the given coordinates to the value of their cell. """
+
+		# Both throw if invalid value
+		crd_x = float(crd_x)
+		crd_y = float(crd_y)
+
+		if not (0 <= crd_x < self._limit_x and 0 <= crd_y < self._limit_y):
+			LookupGrid._raise_invalid(crd_x, crd_y)
+
+		return self._values[self._x_offsets[int(crd_x)] + self._y_cells[int(crd_y)]]
+
+
+	def map_many(self, crds_x, crds_y):
+		"""
+		Map the given coordinate sequences pairwise.
+		returns: A numpy object array of the values
+		"""
+
+		# Both throw if invalid value
+		crds_x = numpy.asarray(crds_x, dtype=float)
+		crds_y = numpy.asarray(crds_y, dtype=float)
+
+		if crds_x.shape != crds_y.shape:
+			raise ValueError("Got {} x and {} y coordinates".format(crds_x.shape, crds_y.shape))
+
+		# Written this way round to catch NaN
+		valid = (0 <= crds_x) & (crds_x < self._limit_x) & (0 <= crds_y) & (crds_y < self._limit_y)
+		if not valid.all():
+			invalid_index = numpy.argmin(valid)
+			LookupGrid._raise_invalid(crds_x.flat[invalid_index], crds_y.flat[invalid_index])
+
+		indices = self._x_offsets_array[crds_x.astype(int)] + self._y_cells_array[crds_y.astype(int)]
+		return self._values_array[indices]
+
+
+	@staticmethod
+	def _count_coordinates(size_bound):
+		""" Count the integer coordinates from 0 on that map into a dimension of the given size. """
+
+		count = 0
+		while not MapperBase._dimension_invalid(
+			int(math.floor((size_bound - 1) * (count / 500.0))), size_bound):
+			count += 1
+
+		return count
+
+
+	@staticmethod
+	def _raise_invalid(crd_x, crd_y):
+		""" Raise the error of MapperBase._map_coordinate for the invalid one of the given coordinates. """
+
+		for crd, size_bound in [(crd_x, MapperBase._get_width()), (crd_y, MapperBase._get_height())]:
+			MapperBase._map_coordinate(crd, size_bound)
+
+		raise ArithmeticError("Resulting coordinate is invalid - was the given value from an invalid space?")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+""" Unit tests for the compiled mapper lookup grids """
+
+import math
+import random
+import unittest
+
+from functionality.country_code_mapper import CountryCodeMapper
+from functionality.poi_mapper import PoiMapper
+
+
+def _map_by_formula(matrix, crd_x, crd_y):
+	""" Map like MapperBase did before compiling the matrices. """
+
+	mapped_x = int(math.floor(4 * (float(crd_x) / 500.0)))
+	mapped_y = int(math.floor(4 * (float(crd_y) / 500.0)))
+
+	if not (0 <= mapped_x < 5 and 0 <= mapped_y < 5):
+		raise ArithmeticError()
+
+	return matrix[mapped_x][mapped_y]
+
+
+class Tests(unittest.TestCase):
+	""" Tests for the mappers """
+
+	def test_map(self):
+		""" The lookup grid maps like the formula, from numbers and strings """
+
+		rand_gen = random.Random(0)
+		coordinates = [0, 124, 124.99, 125, 249.5, 250, 375, 499, 500, 624, 624.99]
+		coordinates += [rand_gen.uniform(0, 625) for _ in range(500)]
+
+		for crd_x in coordinates:
+			crd_y = rand_gen.choice(coordinates)
+			expected = _map_by_formula(CountryCodeMapper.codes, crd_x, crd_y)
+			self.assertEqual(CountryCodeMapper.map(crd_x, crd_y), expected)
+			self.assertEqual(CountryCodeMapper.map(str(crd_x), str(crd_y)), expected)
+
+			self.assertEqual(PoiMapper.map(PoiMapper.restaurants_field, crd_x, crd_y),
+				_map_by_formula(PoiMapper.restaurants, crd_x, crd_y))
+
+		self.assertEqual(PoiMapper.map("cinema", 1, 1), "Invalid")
+
+
+	def test_map_invalid(self):
+		""" Coordinates outside of the space raise, also in batches """
+
+		for crd_x, crd_y in [(-0.5, 1), (1, -1), (625, 1), (1, 1e9)]:
+			self.assertRaises(ArithmeticError, CountryCodeMapper.map, crd_x, crd_y)
+			self.assertRaises(ArithmeticError, CountryCodeMapper.map_many, [1, crd_x], [1, crd_y])
+
+		self.assertRaises(ValueError, CountryCodeMapper.map, "x", 1)
+		self.assertRaises(ValueError, CountryCodeMapper.map_many, [1, 2], [1])
+
+
+	def test_map_many(self):
+		""" Batches map like single coordinates """
+
+		rand_gen = random.Random(1)
+		crds_x = [rand_gen.uniform(0, 625) for _ in range(1000)]
+		crds_y = [str(rand_gen.uniform(0, 625)) for _ in range(1000)]
+
+		self.assertEqual(CountryCodeMapper.map_many(crds_x, crds_y).tolist(),
+			[CountryCodeMapper.map(x, y) for x, y in zip(crds_x, crds_y)])
+		self.assertEqual(PoiMapper.map_many(PoiMapper.gas_stations_field, crds_x, crds_y).tolist(),
+			[PoiMapper.map(PoiMapper.gas_stations_field, x, y) for x, y in zip(crds_x, crds_y)])
+		self.assertEqual(PoiMapper.map_many("cinema", crds_x[:2], crds_y[:2]).tolist(), ["Invalid"] * 2)
+
+
+if __name__ == "__main__":
+	unittest.main()
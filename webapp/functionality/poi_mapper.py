@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 """ POI mapper """
 
+import numpy
+
 from functionality.mapper_base import MapperBase
 
 class PoiMapper(MapperBase):
@@ -38,6 +40,13 @@ class PoiMapper(MapperBase):
 		gas_stations_field: gas_stations
 	}
 
+	_poi_grids = {
+		restaurants_field: MapperBase._compile(restaurants),
+		gas_stations_field: MapperBase._compile(gas_stations)
+	}
+
+	_invalid = "Invalid"
+
 	@staticmethod
 	def map(poi_type, crd_x, crd_y):
 		"""
@@ -45,7 +54,20 @@ class PoiMapper(MapperBase):
 		returns: "Invalid" for invalid types.
 		"""
 
-		if poi_type not in PoiMapper.pois:
-			return "Invalid"
+		if poi_type not in PoiMapper._poi_grids:
+			return PoiMapper._invalid
+
+		return PoiMapper._poi_grids[poi_type].map(crd_x, crd_y)
+
+
+	@staticmethod
+	def map_many(poi_type, crds_x, crds_y):
+		"""
+		Map the given coordinate sequences pairwise to POIs of the given type (numpy array).
+		returns: "Invalid" for each coordinate pair for invalid types.
+		"""
+
+		if poi_type not in PoiMapper._poi_grids:
+			return numpy.full(len(crds_x), PoiMapper._invalid, dtype=object)
 
-		return MapperBase._map(PoiMapper.pois[poi_type], crd_x, crd_y)
+		return PoiMapper._poi_grids[poi_type].map_many(crds_x, crds_y)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+""" In-memory cross-validation of the app_id based classifiers """
+
+import multiprocessing
+
+import sklearn.metrics as sk_met
+import sklearn.svm as sk_svm
+
+
+# Set before the pool is created: The forked workers share the matrices without copying them.
+_SHARED_DATASET = None
+
+
+def cross_validate(dataset, splits, processes=None):
+	"""
+	Fit and score a model per app_id and split of the given dataset_cache.Dataset in a process pool.
+	Each model learns from the inliers of its training rows and is scored on all of its scoring rows.
+	*splits: (train_indices, score_indices) tuples with indices of the converted entries.
+	*processes: Number of worker processes. None for all cores, 1 to disable.
+	returns: { app_id : [accuracy per split] } with the splits in the given order.
+	"""
+
+	global _SHARED_DATASET
+
+	tasks = []
+	split_count = 0
+
+	for train_indices, score_indices in splits:
+		for app_id in dataset.X_y_per_app_id:
+			train_rows = dataset.rows[train_indices[dataset.app_ids[train_indices] == app_id]]
+			score_rows = dataset.rows[score_indices[dataset.app_ids[score_indices] == app_id]]
+			tasks.append((split_count, app_id, train_rows, score_rows))
+
+		split_count += 1
+
+	if processes is None:
+		processes = multiprocessing.cpu_count()
+
+	_SHARED_DATASET = dataset
+	pool = None
+
+	try:
+		if processes <= 1:
+			results = [_fit_and_score(task) for task in tasks]
+		else:
+			pool = multiprocessing.Pool(processes=min(processes, len(tasks)))
+			results = pool.map(_fit_and_score, tasks)
+	finally:
+		if pool is not None:
+			pool.terminate()
+			pool.join()
+
+		_SHARED_DATASET = None
+
+	scores = dict([(app_id, [None] * split_count) for app_id in dataset.X_y_per_app_id])
+	for split_index, app_id, score in results:
+		scores[app_id][split_index] = score
+
+	# Splits without inliers to train with or entries to score are left out
+	for app_id in scores:
+		scores[app_id] = [score for score in scores[app_id] if score is not None]
+
+	return scores
+
+
+def _fit_and_score(task):
+	"""
+	Pool worker: Fit and score the model of a (split_index, app_id, train_rows, score_rows) task.
+	returns: (split_index, app_id, accuracy), with None as accuracy if the task can't be run.
+	"""
+
+	split_index, app_id, train_rows, score_rows = task
+
+	# pylint: disable-msg=C0103; (Invalid variable name)
+	X, y = _SHARED_DATASET.X_y_per_app_id[app_id]
+
+	# Ensure the classifier has only samples for normal behaviour to learn from
+	X_train = X[train_rows][y[train_rows] == 1]
+
+	if len(X_train) == 0 or len(score_rows) == 0:
+		return (split_index, app_id, None)
+
+	clf = sk_svm.OneClassSVM(random_state=0)
+	clf.fit(X_train)
+
+	predictions = clf.predict(X[score_rows])
+	accuracy = sk_met.accuracy_score(y_true=y[score_rows], y_pred=predictions)
+
+	return (split_index, app_id, accuracy)
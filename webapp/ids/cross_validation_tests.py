@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+""" Unit tests for the in-memory cross-validation """
+
+import unittest
+import warnings
+
+import sklearn.model_selection as sk_mod
+
+import ids.cross_validation as cross_validation
+import ids.dataset_cache as dataset_cache
+import ids.ids_tools as ids_tools
+
+
+class Tests(unittest.TestCase):
+	""" Tests for cross_validation """
+
+	def test_parallel_equals_sequential(self):
+		""" The pool returns the same scores in the same order as the in-process run """
+
+		log_entries = ids_tools.generate_log_entries(1500)
+		dataset = dataset_cache.log_entries_to_dataset(log_entries)
+
+		for app_id, (X, y) in dataset.X_y_per_app_id.items():
+			self.assertEqual(len(X), len(y))
+			self.assertEqual(len(X), (dataset.app_ids == app_id).sum())
+
+		splits = list(sk_mod.KFold(n_splits=3).split(log_entries))
+
+		with warnings.catch_warnings():
+			warnings.simplefilter("ignore")
+			sequential = cross_validation.cross_validate(dataset, splits, processes=1)
+			parallel = cross_validation.cross_validate(dataset, splits, processes=3)
+
+		self.assertEqual(sequential, parallel)
+		self.assertEqual(sorted(sequential.keys()), sorted(dataset.X_y_per_app_id.keys()))
+		for scores in sequential.values():
+			self.assertEqual(len(scores), 3)
+			self.assertTrue(all([0 <= score <= 1 for score in scores]))
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+""" Convert once, reuse many: Cache of converted per-app_id datasets on disk """
+
+from collections import namedtuple
+import json
+import md5
+import os
+import shutil
+
+import numpy
+
+from log_entry import LogEntry
+import idse_dao
+import util.prtr
+
+from dir_utils import Dir, DatasetDir
+from ids_entry import IdsEntry
+import ids_converter
+import ids_data
+import ids_tools
+
+
+VERSION = "1.0"
+
+# Bytes at the start of the input file which are part of the cache key
+HASH_PREFIX_SIZE = 1024 * 1024
+
+# X_y_per_app_id: { app_id : (X, y) } with numpy arrays and binary classes
+# app_ids: The app_id of each entry; rows: The row of each entry in the matrix of its app_id
+Dataset = namedtuple("Dataset", "X_y_per_app_id app_ids rows")
+
+
+def load_dataset(file_path, limit=None, printer=None):
+	"""
+	Load the converted dataset of the given log or IDSE file. Cached datasets are memory-mapped;
+	others are converted and added to the cache.
+	*limit: Optional maximum number of entries to read.
+	returns: A read-only Dataset with the entries in file order.
+	"""
+
+	if printer is None:
+		printer = util.prtr.Printer(squelch=True)
+
+	key = get_key(file_path, limit)
+	dataset_path = DatasetDir.get_dataset_path_for(key)
+
+	if os.path.lexists(dataset_path):
+		printer.prt("Loading cached dataset {}...".format(key))
+		return _load(dataset_path)
+
+	printer.prt("Converting entries (not cached yet)...")
+
+	dataset = None
+	if idse_dao.detect_type(file_path) == idse_dao.FileType.IDSE_FILE:
+		dataset = ids_entries_to_dataset(idse_dao.yield_entries(file_path, limit))
+	else:
+		log_entries = [LogEntry.from_log_string(line) for line in Dir.yield_lines(file_path, limit)]
+		dataset = log_entries_to_dataset(log_entries)
+
+	printer.prt("Caching dataset {}...".format(key))
+	_save(dataset, dataset_path)
+
+	return _load(dataset_path)
+
+
+def get_key(file_path, limit=None):
+	"""
+	Create the cache key of the given file: Its size, mtime and first bytes as well as the
+	versions of the cache and the converter and the ids_data hashes.
+	"""
+
+	stat = os.stat(file_path)
+
+	with open(file_path, "rb") as file_handle:
+		prefix_hash = md5.new(file_handle.read(HASH_PREFIX_SIZE)).hexdigest()
+
+	key_data = [
+		VERSION, ids_converter.IdsConverter.VERSION,
+		ids_data.APP_IDS_MD5, ids_data.LEVEL_MAPPING_MD5, ids_data.POI_TYPE_MAPPING_MD5,
+		ids_data.POI_RESULT_MAPPING_MD5, ids_data.LABEL_INT_MAPPING_MD5, ids_data.INT_LABEL_MAPPING_MD5,
+		stat.st_size, repr(stat.st_mtime), prefix_hash, limit
+	]
+
+	return ids_tools.get_md5_hex(key_data)
+
+
+def log_entries_to_dataset(log_entries):
+	""" Convert the given labelled LogEntry objects to per-app_id matrices. """
+
+	converter = ids_converter.IdsConverter()
+
+	log_entries_per_app_id = {}
+	app_ids = []
+	rows = []
+
+	for log_entry in log_entries:
+		app_id = ids_tools.log_entry_to_app_id(log_entry)
+
+		if app_id not in log_entries_per_app_id:
+			log_entries_per_app_id[app_id] = []
+
+		app_ids.append(app_id)
+		rows.append(len(log_entries_per_app_id[app_id]))
+		log_entries_per_app_id[app_id].append(log_entry)
+
+	X_y_per_app_id = {}
+	for app_id, app_log_entries in log_entries_per_app_id.items():
+		# pylint: disable-msg=C0103; (Invalid variable name)
+		X = numpy.array(converter.log_entries_to_vectors(app_id, app_log_entries))
+		y = numpy.array([converter.log_entry_to_class(e, binary=True) for e in app_log_entries])
+		X_y_per_app_id[app_id] = (X, y)
+
+	return Dataset(X_y_per_app_id, numpy.array(app_ids), numpy.array(rows))
+
+
+def ids_entries_to_dataset(ids_entries):
+	""" Store the given IdsEntry objects in per-app_id matrices. """
+
+	# { app_id : ([vectors], [classes]) }
+	vectors_classes_per_app_id = {}
+	app_ids = []
+	rows = []
+
+	for ids_entry in ids_entries:
+		if ids_entry.app_id not in vectors_classes_per_app_id:
+			vectors_classes_per_app_id[ids_entry.app_id] = ([], [])
+
+		vectors, classes = vectors_classes_per_app_id[ids_entry.app_id]
+
+		app_ids.append(ids_entry.app_id)
+		rows.append(len(vectors))
+		vectors.append(ids_entry.vector)
+		classes.append(ids_entry.vclass)
+
+	X_y_per_app_id = dict([
+		(app_id, (numpy.array(vectors), numpy.array(classes)))
+		for app_id, (vectors, classes) in vectors_classes_per_app_id.items()])
+
+	return Dataset(X_y_per_app_id, numpy.array(app_ids), numpy.array(rows))
+
+
+def dataset_to_ids_entries(dataset):
+	""" Create IdsEntry objects in file order. The vectors are views into the dataset. """
+
+	ids_entries = []
+	for app_id, row in zip(dataset.app_ids, dataset.rows):
+		X, y = dataset.X_y_per_app_id[app_id]
+		ids_entries.append(IdsEntry(str(app_id), X[row], int(y[row])))
+
+	return ids_entries
+
+
+### Persistence ###
+
+
+def _save(dataset, dataset_path):
+	""" Store the given dataset as .npy files. A folder is only in place once it is complete. """
+
+	temp_path = Dir.uniquify(dataset_path + "_tmp")
+	os.mkdir(temp_path)
+
+	try:
+		numpy.save(os.path.join(temp_path, "app_ids.npy"), dataset.app_ids)
+		numpy.save(os.path.join(temp_path, "rows.npy"), dataset.rows)
+
+		for app_id, (X, y) in dataset.X_y_per_app_id.items():
+			numpy.save(os.path.join(temp_path, "{}.X.npy".format(app_id)), X)
+			numpy.save(os.path.join(temp_path, "{}.y.npy".format(app_id)), y)
+
+		with open(os.path.join(temp_path, "meta.json"), "w") as meta_file:
+			json.dump({"version" : VERSION, "app_ids" : sorted(dataset.X_y_per_app_id.keys())}, meta_file)
+
+		os.rename(temp_path, dataset_path)
+	except Exception:
+		shutil.rmtree(temp_path)
+		raise
+
+
+def _load(dataset_path):
+	""" Memory-map the dataset stored in the given folder. """
+
+	with open(os.path.join(dataset_path, "meta.json"), "r") as meta_file:
+		meta = json.load(meta_file)
+
+	load = lambda name: numpy.load(os.path.join(dataset_path, name), mmap_mode="r")
+
+	X_y_per_app_id = {}
+	for app_id in meta["app_ids"]:
+		app_id = str(app_id)
+		X_y_per_app_id[app_id] = (load("{}.X.npy".format(app_id)), load("{}.y.npy".format(app_id)))
+
+	return Dataset(X_y_per_app_id, load("app_ids.npy"), load("rows.npy"))
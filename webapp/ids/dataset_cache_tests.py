@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+""" Unit tests for the dataset cache """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import ids.dataset_cache as dataset_cache
+import ids.ids_tools as ids_tools
+
+
+class Tests(unittest.TestCase):
+	""" Tests for dataset_cache """
+
+	def setUp(self):
+		self.temp_dir = tempfile.mkdtemp()
+
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+
+	def test_save_load_round_trip(self):
+		""" A stored dataset is loaded memory-mapped with the same contents and entry order """
+
+		log_entries = ids_tools.generate_log_entries(500)
+		dataset = dataset_cache.log_entries_to_dataset(log_entries)
+		dataset_path = os.path.join(self.temp_dir, "dataset")
+
+		dataset_cache._save(dataset, dataset_path)
+		loaded = dataset_cache._load(dataset_path)
+
+		self.assertEqual(sorted(loaded.X_y_per_app_id.keys()), sorted(dataset.X_y_per_app_id.keys()))
+		for app_id, (X, y) in dataset.X_y_per_app_id.items():
+			loaded_X, loaded_y = loaded.X_y_per_app_id[app_id]
+			self.assertIsInstance(loaded_X, numpy.memmap)
+			self.assertTrue(numpy.array_equal(X, loaded_X))
+			self.assertTrue(numpy.array_equal(y, loaded_y))
+
+		original_entries = dataset_cache.dataset_to_ids_entries(dataset)
+		loaded_entries = dataset_cache.dataset_to_ids_entries(loaded)
+
+		self.assertEqual(len(loaded_entries), len(log_entries))
+		for original, loaded_entry in zip(original_entries, loaded_entries):
+			self.assertEqual(original.app_id, loaded_entry.app_id)
+			self.assertEqual(original.vclass, loaded_entry.vclass)
+			self.assertTrue(numpy.array_equal(original.vector, loaded_entry.vector))
+
+
+	def test_key_changes_with_file(self):
+		""" The key depends on the contents of the file and the limit """
+
+		file_path = os.path.join(self.temp_dir, "file.log")
+		with open(file_path, "w") as file_handle:
+			file_handle.write("first\n")
+
+		key = dataset_cache.get_key(file_path)
+		self.assertEqual(key, dataset_cache.get_key(file_path))
+		self.assertNotEqual(key, dataset_cache.get_key(file_path, limit=10))
+
+		with open(file_path, "a") as file_handle:
+			file_handle.write("second\n")
+
+		self.assertNotEqual(key, dataset_cache.get_key(file_path))
@@ -3,6 +3,7 @@
 
 import os
 import random
+import shutil
 import string
 import time
 import uuid
@@ -318,6 +319,39 @@ class ModelDir(object):
 
 
 
+
+class DatasetDir(object):
+	""" Directory of the cached converted datasets in the IDS. """
+
+	_DATASET_DIR = "datasets"
+
+
+	@staticmethod
+	def reset_dir():
+		""" Delete all cached datasets and return a status message. """
+
+		dataset_dir = DatasetDir.get_dataset_dir()
+		dataset_paths = [os.path.join(dataset_dir, name) for name in os.listdir(dataset_dir)]
+
+		for dataset_path in dataset_paths:
+			shutil.rmtree(dataset_path)
+
+		return "Deleted {} cached dataset{}.".format(
+			len(dataset_paths), "" if len(dataset_paths) == 1 else "s")
+
+
+	@staticmethod
+	def get_dataset_dir():
+		""" Return the dataset directory. Makes sure the folder exists. """
+		return _get_cwd(_for=DatasetDir._DATASET_DIR, mk_if_nonexistent=True)
+
+
+	@staticmethod
+	def get_dataset_path_for(key):
+		""" Build a path to the folder of the dataset with the given key. """
+		return os.path.join(DatasetDir.get_dataset_dir(), key)
+
+
 ### Shared private util methods ###
 
 
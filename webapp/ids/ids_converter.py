@@ -15,6 +15,9 @@ import ids_tools
 class IdsConverter(object):
 	""" Conversion of LogEntry objects. """
 
+	# Change when the vectors change - cached datasets depend on it
+	VERSION = "1.0"
+
 	def __init__(self):
 		""" Ctor. """
 
@@ -83,4 +83,4 @@ LEVEL_MAPPING_MD5 = "49942f0268aa668e146e533b676f03d0"
 POI_TYPE_MAPPING_MD5 = "f2fba0ed17e382e274f53bbcb142565b"
 POI_RESULT_MAPPING_MD5 = "dd1c18c7188a48a686619fef8007fc64"
 LABEL_INT_MAPPING_MD5 = "69a262192b246d16e8411b6db06e237b"
-INT_LABEL_MAPPING_MD5 = "c29a85dae460b57fac78db12e72ae24a"
+INT_LABEL_MAPPING_MD5 = "58cbf815cf0af9a93443ad8d3b518355"
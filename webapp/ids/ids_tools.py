@@ -2,9 +2,12 @@
 """ IDS tools """
 
 from __future__ import print_function
+import itertools
+import math
 import md5
 import random
 import re
+import sys
 import warnings
 
 import sklearn.model_selection as sk_mod
@@ -112,6 +115,12 @@ def get_md5_hex(obj):
 ### LogEntry handling ###
 
 
+# The app_id value in a log string follows this key
+_APP_ID_KEY = "\"{}\": \"".format(LogEntry.APP_ID_FIELD)
+# { raw app_id : stripped app_id }
+_STRIPPED_APP_IDS = {}
+
+
 def log_entry_to_app_id(log_entry):
 	""" Extract and sanitize the app_id from the given LogEntry object. """
 
@@ -119,6 +128,36 @@ def log_entry_to_app_id(log_entry):
 	return _strip_app_id(app_id)
 
 
+def log_string_to_app_id(log_string):
+	"""
+	Extract and sanitize the app_id from the given log string without parsing it.
+	Falls back to parsing for strings not written by LogEntry.get_log_string().
+	"""
+
+	start = log_string.find(_APP_ID_KEY)
+	if start == -1:
+		return log_entry_to_app_id(LogEntry.from_log_string(log_string.rstrip("\n")))
+
+	start += len(_APP_ID_KEY)
+	app_id = log_string[start:log_string.index("\"", start)]
+
+	if app_id not in _STRIPPED_APP_IDS:
+		_STRIPPED_APP_IDS[app_id] = _strip_app_id(app_id)
+
+	return _STRIPPED_APP_IDS[app_id]
+
+
+def log_string_to_class(log_string):
+	""" Extract the label from the given log string without parsing it. None if unlabelled. """
+
+	label = log_string[log_string.rfind("}") + 1:].rstrip("\n")
+	if not label:
+		return None
+
+	# Remove the separating comma
+	return label[1:]
+
+
 def _strip_app_id(app_id):
 	""" Strip the given app_id of its ID. """
 
@@ -314,34 +353,55 @@ def reservoir_sample_limit(item_generator, sample_size, limit_to):
 		line
 		for line
 		in item_generator
-		# Convert line to LogEntry, check that app_id is in the allowed limits
-		if log_entry_to_app_id(LogEntry.from_log_string(line)) in limit_to
+		# Check that the app_id of the line is in the allowed limits
+		if log_string_to_app_id(line) in limit_to
 	)
 
 	return reservoir_sample(limited_generator, sample_size)
 
 
 def reservoir_sample(item_generator, sample_size):
-	""" Sample with 'Reservoir Sampling' from the given generator the given number of elements. """
-
-	reservoir = []
-	index = 0
-	for item in item_generator:
-		if index < sample_size:
-			reservoir.append(item)
-		else:
-			m = random.randint(0, index)
-			if m < sample_size:
-				reservoir[m] = item
+	"""
+	Sample with 'Reservoir Sampling' from the given generator the given number of elements.
+	Uses Algorithm L: The items between two replacements are skipped without being looked at.
+	"""
 
-		index += 1
+	iterator = iter(item_generator)
+	reservoir = list(itertools.islice(iterator, sample_size))
 
 	if len(reservoir) < sample_size:
 		raise ValueError("Given generator exceeded before sample_size was reached!")
 
+	if sample_size == 0:
+		return reservoir
+
+	weight = math.exp(math.log(_random_exclusive()) / sample_size)
+
+	while True:
+		# Number of items to skip until the next replacement (geometric distribution)
+		skip = int(math.log(_random_exclusive()) / math.log1p(-weight))
+		skip = min(skip, sys.maxint)
+
+		next_items = list(itertools.islice(iterator, skip, skip + 1))
+		if not next_items:
+			break
+
+		reservoir[random.randrange(sample_size)] = next_items[0]
+		weight *= math.exp(math.log(_random_exclusive()) / sample_size)
+
 	return reservoir
 
 
+def _random_exclusive():
+	""" Random float in the open interval (0, 1). """
+
+	value = 0.0
+	while value == 0.0:
+		value = random.random()
+
+	return value
+
+
 ### Generating log entries ###
 
 
@@ -368,7 +428,10 @@ def generate_log_entries(number):
 		vin = vins[i]
 		app_id = random.choice(ids_data.get_app_ids())
 		level = random.choice(ids_data.get_levels())
-		gps_position = "{},{}".format(tsp_gen(), tsp_gen())
+		# Generators don't log positions
+		gps_position = ""
+		if app_id not in ids_data.get_generators():
+			gps_position = "{},{}".format(tsp_gen(), tsp_gen())
 
 		log_message = None
 		for keys, gen in log_msg_gens:
@@ -1,14 +1,18 @@
 #!/usr/bin/env python
 """ Classifier """
 
+import time
+
 import sklearn.metrics as sk_met
 import sklearn.model_selection as sk_mod
 import sklearn.svm as sk_svm
 
 from log_entry import LogEntry
 import util.fmtr
+import util.metrics
 import util.prtr
 
+import ids_data
 import ids_tools
 import ids_converter
 from dir_utils import ModelDir
@@ -43,10 +47,13 @@ class IntrusionClassifier(object):
 
 		self._int_label_mapping = ids_tools.flip_dict(
 			self._converter.label_int_mapping,
-			verify_hash="c29a85dae460b57fac78db12e72ae24a")
+			verify_hash=ids_data.INT_LABEL_MAPPING_MD5)
 
 		self._load_models()
 
+		# { app_id : (convert histogram, predict histogram) }
+		self._histograms = {}
+
 		IntrusionClassifier._INSTANCE = self
 
 
@@ -101,10 +108,17 @@ class IntrusionClassifier(object):
 			raise IOError("Some or all model files are missing.")
 
 		app_id = ids_tools.log_entry_to_app_id(log_entry)
+		convert_histogram, predict_histogram = self._get_histograms(app_id)
+
+		start_time = time.time()
 		vector = self._converter.log_entry_to_vector(app_id, log_entry)
+		converted_time = time.time()
 
 		predicted_class = self._models[app_id].predict([vector])[0]
 
+		convert_histogram.observe(converted_time - start_time)
+		predict_histogram.observe(time.time() - converted_time)
+
 		classification = Classification.normal
 		if self._converter.class_means_intruded(predicted_class):
 			classification = Classification.intrusion
@@ -113,6 +127,20 @@ class IntrusionClassifier(object):
 
 
 
+	def _get_histograms(self, app_id):
+		""" Get the conversion and prediction time histograms of the given app_id. """
+
+		if app_id not in self._histograms:
+			self._histograms[app_id] = (
+				util.metrics.REGISTRY.histogram(
+					"ids_convert_seconds", "Time to convert an entry to a vector", app_id=app_id),
+				util.metrics.REGISTRY.histogram(
+					"ids_predict_seconds", "Time for the model to classify a vector", app_id=app_id))
+
+		return self._histograms[app_id]
+
+
+
 	### Train ###
 
 
@@ -220,6 +248,21 @@ class IntrusionClassifier(object):
 
 		app_id_datasets = self._converter.log_entries_to_train_dict(log_entries, printer)
 
+		return self.score_converted(app_id_datasets, do_return, squelch_output)
+
+
+	def score_converted(self, app_id_datasets, do_return=False, squelch_output=False):
+		"""
+		Score the models' prediction for the given converted entries.
+		: param app_id_datasets : { app_id : (X, y) } as created by the IdsConverter or the dataset cache.
+		: param do_return : Return a machine-readable { app_id: score } dict.
+		"""
+
+		printer = util.prtr.Printer(squelch=squelch_output, name="IC")
+
+		if not self._has_models():
+			raise ValueError("The classifier has no trained models! Train first, then score.")
+
 		# Verify
 		printer.prt("Verifying data...")
 		for app_id, score_set in app_id_datasets.items():
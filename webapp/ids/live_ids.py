@@ -4,11 +4,19 @@
 import os
 import time
 
+import util.metrics
+
 from intrusion_classifier import IntrusionClassifier
 from ids_classification import Classification
 from dir_utils import LogDir, ModelDir
 
 
+_INTRUSIONS = util.metrics.REGISTRY.counter(
+	"ids_intrusions_total", "Number of detected intrusions written to the intrusion log")
+_INTRUSION_WRITE_SECONDS = util.metrics.REGISTRY.histogram(
+	"ids_intrusion_write_seconds", "Time to write a detected intrusion to its log file")
+
+
 class LiveIds(object):
 	""" Live intrusion detection """
 
@@ -28,7 +36,9 @@ class LiveIds(object):
 		if result.classification == Classification.normal and result.confidence > 0:
 			return
 
-		file_path = self._write_intrusion_to_file(log_entry, result)
+		with _INTRUSION_WRITE_SECONDS.time():
+			file_path = self._write_intrusion_to_file(log_entry, result)
+		_INTRUSIONS.inc()
 
 		message = "INTRUSION DETECTED. Log file saved at: {}".format(file_path)
 		if self._verbose:
@@ -102,6 +102,25 @@ def save_entries(file_path, entry_generator):
 	return file_path_full
 
 
+def save_entry_chunks(file_path, chunk_generator):
+	"""
+	Store the IdsEntry objects of all chunks in one IDSE file, holding only one chunk in memory.
+	returns: The file path in which the file was saved.
+	"""
+
+	file_path_full = add_idse_extension(file_path)
+
+	if os.path.lexists(file_path_full):
+		_raise_file_exists(file_path_full)
+
+	with open(file_path_full, "w") as file_handle:
+		file_handle.write(HEADER + "\n")
+		for chunk in chunk_generator:
+			file_handle.writelines([_ids_entry_to_idse_string(e) + "\n" for e in chunk])
+
+	return file_path_full
+
+
 def convert(input_path):
 	""" Convert the given file do a IDSE file. """
 
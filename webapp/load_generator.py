@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+""" Replay log entries as HTTP requests against the web API and measure the latency """
+
+# Monkey-patch before anything imports socket - only when run, importing must not patch the importer
+if __name__ == "__main__":
+	from gevent import monkey
+	monkey.patch_all()
+
+# pylint: disable-msg=C0411,C0413
+import argparse
+import random
+import time
+
+import gevent
+import gevent.pool
+import numpy
+import requests
+
+from log_entry import LogEntry
+from ids.dir_utils import Dir
+import ids.ids_data as ids_data
+import ids.ids_tools as ids_tools
+import util.fmtr
+import util.outp
+import util.prtr
+
+
+DEFAULT_URL = "http://localhost:5000"
+
+CLOSED_LOOP = "closed"
+OPEN_LOOP = "open"
+
+# Maximum number of requests in flight in open-loop mode
+MAX_IN_FLIGHT = 1000
+
+# Seconds to wait for the server to connect or respond before a request fails
+DEFAULT_TIMEOUT = 10.0
+
+_PRINTER = util.prtr.Printer(name="LG")
+
+
+### Requests ###
+
+
+def log_entry_to_request(log_entry, vin):
+	"""
+	Create the request the given entry's app would have sent for it.
+	returns: (path, params)
+	"""
+
+	data = log_entry.data
+	app_id = ids_tools.log_entry_to_app_id(log_entry)
+
+	params = {"vin" : vin}
+	if log_entry.intrusion:
+		params["intrusion"] = log_entry.intrusion
+
+	if app_id in ids_data.get_generators():
+		params["generated"] = data[LogEntry.LOG_MESSAGE_FIELD]
+		# The generator path keeps the instance index of the unstripped ID, e.g. gaussian_1
+		return ("/log/data/" + data[LogEntry.APP_ID_FIELD].lower(), params)
+
+	crd_x, crd_y = data[LogEntry.GPS_POSITION_FIELD].split(",")
+	params["x"] = crd_x
+	params["y"] = crd_y
+
+	if app_id in ids_data.get_colours():
+		params["colour"] = data[LogEntry.LOG_MESSAGE_FIELD]
+		return ("/log/colour", params)
+	elif app_id == ids_data.POSE_CC:
+		return ("/get/country-code", params)
+	elif app_id == ids_data.POSE_POI:
+		params["type"] = data[LogEntry.LOG_MESSAGE_FIELD].split(",")[0]
+		return ("/get/poi", params)
+	elif app_id == ids_data.POSE_TSP:
+		_, _, params["targ_x"], params["targ_y"] = data[LogEntry.LOG_MESSAGE_FIELD].split(",")
+		return ("/get/tsp", params)
+
+	raise NotImplementedError("App ID not implemented: %s" % app_id)
+
+
+### Load generation ###
+
+
+class LoadGenerator(object):
+	""" Send requests in closed- or open-loop mode and record their latencies. """
+
+	def __init__(self, url, mode, vins, rate=None, timeout=DEFAULT_TIMEOUT):
+		"""
+		Ctor
+		*mode: CLOSED_LOOP: Each virtual VIN sends its next request after the last response.
+		OPEN_LOOP: Requests are sent on a fixed schedule, no matter how fast the server responds.
+		*vins: Number of virtual VINs the entries are distributed to.
+		*rate: Target requests per second over all VINs. Required for OPEN_LOOP.
+		*timeout: Seconds until a request without response is recorded as failed.
+		"""
+
+		object.__init__(self)
+
+		if mode not in [CLOSED_LOOP, OPEN_LOOP]:
+			raise ValueError("Invalid mode: %s" % mode)
+
+		if mode == OPEN_LOOP and not rate:
+			raise ValueError("Open-loop mode needs a target rate.")
+
+		if vins <= 0 or (rate is not None and rate <= 0) or timeout <= 0:
+			raise ValueError("VINs, rate and timeout must be positive valued!")
+
+		self.url = url
+		self.mode = mode
+		self.vins = ["LG{:06d}".format(i) for i in range(vins)]
+		self.rate = rate
+		self.timeout = timeout
+
+		self._session = requests.Session()
+		adapter = requests.adapters.HTTPAdapter(
+			pool_connections=1, pool_maxsize=vins if mode == CLOSED_LOOP else MAX_IN_FLIGHT)
+		self._session.mount("http://", adapter)
+
+		# [(path, seconds, succeeded)]
+		self.samples = []
+		self.duration = None
+
+
+	def run(self, log_entries):
+		""" Send one request per entry. Entry i is sent by VIN i % vins. """
+
+		# [(vin index, path, params)]
+		requests_to_send = []
+		for index, log_entry in enumerate(log_entries):
+			vin_index = index % len(self.vins)
+			path, params = log_entry_to_request(log_entry, self.vins[vin_index])
+			requests_to_send.append((vin_index, path, params))
+
+		start_time = time.time()
+
+		if self.mode == CLOSED_LOOP:
+			self._run_closed_loop(requests_to_send, start_time)
+		else:
+			self._run_open_loop(requests_to_send, start_time)
+
+		self.duration = time.time() - start_time
+
+
+	def _run_closed_loop(self, requests_to_send, start_time):
+		""" One greenlet per VIN sends its requests one after another. """
+
+		requests_per_vin = [[] for _ in self.vins]
+		for vin_index, path, params in requests_to_send:
+			requests_per_vin[vin_index].append((path, params))
+
+		# Each VIN gets its share of the target rate
+		interval = None if self.rate is None else float(len(self.vins)) / self.rate
+
+		def _send_all(vin_requests):
+			for index, (path, params) in enumerate(vin_requests):
+				if interval is not None:
+					gevent.sleep(max(0, start_time + index * interval - time.time()))
+				self._send(path, params, time.time())
+
+		gevent.joinall([gevent.spawn(_send_all, vin_requests) for vin_requests in requests_per_vin])
+
+
+	def _run_open_loop(self, requests_to_send, start_time):
+		"""
+		Spawn each request at its scheduled time. The latency counts from the scheduled time,
+		so time spent waiting for a free slot because the server is too slow is included.
+		"""
+
+		pool = gevent.pool.Pool(MAX_IN_FLIGHT)
+		interval = 1.0 / self.rate
+
+		for index, (_, path, params) in enumerate(requests_to_send):
+			scheduled_time = start_time + index * interval
+			gevent.sleep(max(0, scheduled_time - time.time()))
+			pool.spawn(self._send, path, params, scheduled_time)
+
+		pool.join()
+
+
+	def _send(self, path, params, start_time):
+		""" Post the given request and record its latency. """
+
+		succeeded = False
+		try:
+			response = self._session.post(self.url + path, data=params, timeout=self.timeout)
+			succeeded = response.status_code == 200
+		except requests.RequestException:
+			# Timeouts and broken connections are recorded as failed requests
+			pass
+
+		self.samples.append((path, time.time() - start_time, succeeded))
+
+
+	def create_report_table(self):
+		""" Create a table with throughput and latency percentiles overall and per endpoint. """
+
+		table = [["Endpoint", "Requests", "Errors", "Req/s", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)"]]
+
+		paths = sorted(set([path for path, _, _ in self.samples]))
+		for path in [None] + paths:
+			samples = [s for s in self.samples if path is None or s[0] == path]
+			latencies = numpy.array([seconds for _, seconds, _ in samples]) * 1000
+			errors = len([s for s in samples if not s[2]])
+			p50, p95, p99 = numpy.percentile(latencies, [50, 95, 99])
+
+			table.append([
+				"All" if path is None else path,
+				"{:,}".format(len(samples)),
+				"{:,}".format(errors),
+				"{:,.1f}".format(len(samples) / self.duration),
+				"{:.1f}".format(p50), "{:.1f}".format(p95), "{:.1f}".format(p99),
+				"{:.1f}".format(latencies.max())
+			])
+
+		return table
+
+
+### Main ###
+
+
+def _read_entries(args):
+	""" Read the entries from the given log file or generate them. """
+
+	if args.synthetic:
+		random.seed(0)
+		return ids_tools.generate_log_entries(args.synthetic)
+
+	return [LogEntry.from_log_string(line) for line in Dir.yield_lines(args.log, args.limit)]
+
+
+def _main(args):
+	if args.mode == OPEN_LOOP and not args.rate:
+		util.outp.exit_on_error("Open-loop mode needs a target rate (--rate).")
+
+	log_entries = _read_entries(args)
+
+	generator = LoadGenerator(args.url, args.mode, args.vins, args.rate, args.timeout)
+
+	_PRINTER.prt("Sending {:,} requests to {} with {} VINs in {}-loop mode (target rate: {})...".format(
+		len(log_entries), args.url, args.vins, args.mode,
+		"{:,} req/s".format(args.rate) if args.rate else "none"))
+
+	generator.run(log_entries)
+
+	_PRINTER.prt("Done in {}.".format(util.fmtr.format_time_passed(generator.duration)))
+
+	util.outp.print_table(generator.create_report_table(), headline="Latency and throughput")
+
+
+if __name__ == "__main__":
+	PARSER = argparse.ArgumentParser(description="Replay log entries against the web API")
+
+	SOURCE_GROUP = PARSER.add_mutually_exclusive_group(required=True)
+	SOURCE_GROUP.add_argument("--log", "-l", metavar="FILE", help="Replay the entries of the log file")
+	SOURCE_GROUP.add_argument("--synthetic", "-s", type=int, metavar="NUMBER",
+		help="Replay NUMBER generated entries")
+
+	PARSER.add_argument("--limit", type=int, metavar="NUMBER", help="Maximum number of entries to read")
+	PARSER.add_argument("--url", "-u", default=DEFAULT_URL, help="Server URL (default: %s)" % DEFAULT_URL)
+	PARSER.add_argument("--vins", "-v", type=int, default=10, metavar="NUMBER",
+		help="Number of concurrent virtual VINs (default: 10)")
+	PARSER.add_argument("--rate", "-r", type=float, metavar="REQ/S",
+		help="Target requests per second (default: as fast as possible in closed-loop mode)")
+	PARSER.add_argument("--timeout", "-t", type=float, default=DEFAULT_TIMEOUT, metavar="SECONDS",
+		help="Seconds until a request without response fails (default: %s)" % DEFAULT_TIMEOUT)
+	PARSER.add_argument("--mode", "-m", choices=[CLOSED_LOOP, OPEN_LOOP], default=CLOSED_LOOP,
+		help="Wait for responses before sending (closed) or follow a fixed schedule (open)")
+
+	_main(PARSER.parse_args())
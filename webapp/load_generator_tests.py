@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+""" Unit tests for the load generator """
+
+import unittest
+
+import requests
+
+from log_entry import LogEntry
+import ids.ids_data as ids_data
+import load_generator
+
+
+def _create_entry(app_id, log_message, gps_position="", intrusion=""):
+	""" Create a LogEntry for the given app. """
+	return LogEntry(vin="A123456", app_id=app_id, level="0", gps_position=gps_position,
+		log_message=log_message, intrusion=intrusion)
+
+
+class FakeSession(object):
+	""" Raises the given exception for every request. """
+
+	def __init__(self, exception):
+		object.__init__(self)
+		self.exception = exception
+		self.timeouts = []
+
+
+	def post(self, _, data=None, timeout=None):
+		self.timeouts.append(timeout)
+		raise self.exception
+
+
+class Tests(unittest.TestCase):
+	""" Tests for load_generator """
+
+	def test_log_entry_to_request(self):
+		""" Each app's entries are sent to its endpoint with the parameters it would have sent """
+
+		to_request = lambda entry: load_generator.log_entry_to_request(entry, "LG000001")
+
+		self.assertEqual(to_request(_create_entry("GAUSSIAN_1", "-1.0", intrusion="huge-error")),
+			("/log/data/gaussian_1", {"vin" : "LG000001", "generated" : "-1.0", "intrusion" : "huge-error"}))
+
+		self.assertEqual(to_request(_create_entry("COLOUR", "255,0,0", "12,34", intrusion="red")),
+			("/log/colour",
+			{"vin" : "LG000001", "x" : "12", "y" : "34", "colour" : "255,0,0", "intrusion" : "red"}))
+
+		self.assertEqual(to_request(_create_entry(ids_data.POSE_CC, "DE", "12,34")),
+			("/get/country-code", {"vin" : "LG000001", "x" : "12", "y" : "34"}))
+
+		self.assertEqual(to_request(_create_entry(ids_data.POSE_POI, "gas station,Shell", "12,34")),
+			("/get/poi", {"vin" : "LG000001", "x" : "12", "y" : "34", "type" : "gas station"}))
+
+		self.assertEqual(to_request(_create_entry(ids_data.POSE_TSP, "12,34,56,78", "12,34")),
+			("/get/tsp", {"vin" : "LG000001", "x" : "12", "y" : "34", "targ_x" : "56", "targ_y" : "78"}))
+
+
+	def test_failed_requests_are_recorded(self):
+		""" Requests time out after the given timeout and are recorded as failed instead of lost """
+
+		generator = load_generator.LoadGenerator("http://localhost:1", load_generator.CLOSED_LOOP, 2,
+			timeout=0.5)
+
+		for exception in [requests.Timeout(), requests.exceptions.ChunkedEncodingError()]:
+			generator._session = FakeSession(exception)
+			generator.run([
+				_create_entry("GAUSSIAN", "1.0"), _create_entry(ids_data.POSE_TSP, "1,2,3,4", "1,2")])
+
+			self.assertEqual(generator._session.timeouts, [0.5, 0.5])
+
+		self.assertEqual(len(generator.samples), 4)
+		self.assertFalse(any([succeeded for _, _, succeeded in generator.samples]))
+
+
+if __name__ == "__main__":
+	unittest.main()
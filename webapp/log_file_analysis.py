@@ -1,34 +1,62 @@
 #!/usr/bin/env python
 """ Analyse a log file """
 
+import json
 import md5
+import multiprocessing
 import os
 
 from log_entry import LogEntry
 import util.fmtr
 import util.outp
+import util.hll
 import util.prtr
 import util.stat
-from ids.dir_utils import Dir
 import ids.ids_tools as ids_tools
 import ids.ids_data as ids_data
 import idse_dao
 
 
-VERSION = "1.3"
+VERSION = "1.4"
 
+# Files below this size are analysed in-process; forking is not worth it.
+PARALLEL_MIN_FILE_SIZE = 64 * 1024 * 1024
+# Each worker receives about this many bytes per task.
+RANGE_SIZE = 32 * 1024 * 1024
+# Bytes at the start and the end of an analysed prefix that are checksummed to detect file changes.
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
 
-def analyse(file_path, to_file, output_printer):
-	""" Analyse the given log file. """
+
+def analyse(file_path, to_file, output_printer, processes=None, use_state=True,
+	global_duplicates=False):
+	"""
+	Analyse the given log file.
+	When saving to file, the analysis state is stored next to the output. If the log only grew since,
+	the next run continues from that state and only analyses the appended lines.
+	*processes: Number of worker processes for big files. None for all cores, 1 to disable.
+	*use_state: Pass False to ignore an existing analysis state and analyse the whole file.
+	*global_duplicates: Additionally estimate duplicates among all entries of each app id.
+	"""
 
 	# Check output file if requested #
 
 	output_path = file_path + ".analysis"
+	state_path = file_path + ".analysis_state"
+
+	accumulator, offset = None, 0
+	if use_state:
+		accumulator, offset = load_state(file_path, state_path, output_printer)
 
-	if to_file and os.path.lexists(output_path):
+	if accumulator is not None and accumulator.global_duplicates != global_duplicates:
+		output_printer.prt("Analysis state was saved with{} global duplicates - analysing the whole file."
+			.format("" if accumulator.global_duplicates else "out"))
+		accumulator, offset = None, 0
+
+	# An existing analysis can only be updated from its state
+	if to_file and os.path.lexists(output_path) and accumulator is None:
 		raise IOError("Output file {} exists already! (Re)Move it and try again.".format(output_path))
 
-	output_printer.prt("Analysing...")
+	output_printer.prt("Analysing..." if offset == 0 else "Analysing from byte {:,}...".format(offset))
 
 	# Get file access #
 
@@ -39,18 +67,25 @@ def analyse(file_path, to_file, output_printer):
 	elif file_type != idse_dao.FileType.LOG_FILE:
 		raise NotImplementedError("File type \"%s\" not implemented!" % file_type)
 
-	log_entry_generator = (LogEntry.from_log_string(line) for line in  Dir.yield_lines(file_path))
-
 	# Analysis #
 
 	all_app_ids = ids_data.get_app_ids()
 	all_classes = ids_data.get_labels()
 
+	end = find_last_line_end(file_path)
+	if end < os.path.getsize(file_path):
+		output_printer.prt("Ignoring incomplete last line.")
+
+	if accumulator is None:
+		accumulator = AnalysisAccumulator(global_duplicates)
+
+	accumulator = accumulate_range(file_path, offset, end, processes, accumulator)
+
 	(
 		total_entries, found_app_ids, entry_count_per_app_id, elements_per_class_per_app_id,
 		found_classes, entry_count_per_class, app_ids_per_class, duplicate_elements_per_app_id,
 		scorable_app_ids, dispersion_index, duplicate_index
-	) = analyse_entries(log_entry_generator)
+	) = accumulator.get_result()
 
 	# Output #
 
@@ -168,6 +203,25 @@ def analyse(file_path, to_file, output_printer):
 
 		util.outp.print_table(duplicates, headline="Duplicates per app ID", printer=printer)
 
+	if global_duplicates:
+		# "Estimated global duplicates per app ID" table
+		global_dupes = []
+		global_dupes.append(["App ID", "All", "Est. unique", "Est. duplicates", "Est. duplicate %"])
+		for app_id, (all_count, unique_count) in accumulator.get_global_duplicate_estimates():
+			duplicate_count = all_count - unique_count
+
+			duplicate_percent = 0
+			if all_count > 0:
+				duplicate_percent = float(duplicate_count) / all_count
+
+			new_line = [app_id]
+			new_line.extend(["{:,}".format(x) for x in [all_count, unique_count, duplicate_count]])
+			new_line.append(util.fmtr.format_percentage(duplicate_percent, True, 3))
+			global_dupes.append(new_line)
+
+		util.outp.print_table(global_dupes, headline="Estimated global duplicates per app ID",
+			printer=printer)
+
 	printer.prt("\nScores for %s scorable app ids: Dispersion index = %s | Duplicate index = %s"
 		% (len(scorable_app_ids), round(dispersion_index, 3), round(duplicate_index, 3))
 	)
@@ -178,6 +232,8 @@ def analyse(file_path, to_file, output_printer):
 			for line in printer.get_messages():
 				output_file.write(line + "\n")
 
+		save_state(file_path, state_path, accumulator, end)
+
 		output_printer.prt("Successfully saved analysis to \"{}\".".format(output_path))
 
 	# harmonious? all labelled / some / none?
@@ -185,6 +241,189 @@ def analyse(file_path, to_file, output_printer):
 	return
 
 
+def analyse_file(file_path, processes=None, global_duplicates=False):
+	"""
+	Analyse the log file at the given path. Big files are split into byte ranges which are
+	analysed in a process pool; the partial results are merged in file order.
+	returns: See analyse_entries()
+	"""
+
+	accumulator = AnalysisAccumulator(global_duplicates)
+	return accumulate_range(
+		file_path, 0, os.path.getsize(file_path), processes, accumulator).get_result()
+
+
+def accumulate_range(file_path, start, end, processes=None, accumulator=None):
+	"""
+	Analyse the lines in [start, end) of the given file, in parallel for big ranges.
+	*accumulator: Optional AnalysisAccumulator of the lines before start to continue from.
+	returns: The AnalysisAccumulator of all lines up to end.
+	"""
+
+	if processes is None:
+		processes = multiprocessing.cpu_count()
+
+	if accumulator is None:
+		accumulator = AnalysisAccumulator()
+
+	global_duplicates = accumulator.global_duplicates
+
+	if processes <= 1 or end - start < PARALLEL_MIN_FILE_SIZE:
+		accumulator.merge(_analyse_range((file_path, start, end, global_duplicates)))
+		return accumulator
+
+	ranges = split_in_ranges(file_path, RANGE_SIZE, start, end)
+	pool = multiprocessing.Pool(processes=min(processes, len(ranges)))
+
+	try:
+		# imap() keeps the order of the ranges, which the duplicate merge relies on
+		range_tuples = [(file_path, s, e, global_duplicates) for s, e in ranges]
+		for partial in pool.imap(_analyse_range, range_tuples):
+			accumulator.merge(partial)
+	finally:
+		pool.terminate()
+		pool.join()
+
+	return accumulator
+
+
+def _analyse_range(range_tuple):
+	"""
+	Pool worker: Analyse the (file_path, start, end, global_duplicates) byte range.
+	returns: The AnalysisAccumulator of the range.
+	"""
+
+	file_path, start, end, global_duplicates = range_tuple
+
+	accumulator = AnalysisAccumulator(global_duplicates)
+	for entry in yield_log_entries_in_range(file_path, start, end):
+		accumulator.add(entry)
+
+	return accumulator
+
+
+def split_in_ranges(file_path, range_size, start=0, end=None):
+	"""
+	Split [start, end) of the given file into (start, end) byte ranges of roughly range_size bytes.
+	start needs to be the beginning of a line. Every range ends after a newline (or at end).
+	"""
+
+	if end is None:
+		end = os.path.getsize(file_path)
+
+	ranges = []
+
+	with open(file_path, "rb") as file_handle:
+		while start < end:
+			range_end = start + range_size
+
+			if range_end < end:
+				# Move the boundary behind the next newline
+				file_handle.seek(range_end)
+				file_handle.readline()
+				range_end = file_handle.tell()
+
+			range_end = min(range_end, end)
+
+			ranges.append((start, range_end))
+			start = range_end
+
+	return ranges
+
+
+def find_last_line_end(file_path):
+	""" Return the offset behind the last newline of the given file (0 if there is none). """
+
+	file_size = os.path.getsize(file_path)
+	block_size = 64 * 1024
+
+	with open(file_path, "rb") as file_handle:
+		block_end = file_size
+		while block_end > 0:
+			block_start = max(0, block_end - block_size)
+			file_handle.seek(block_start)
+			block = file_handle.read(block_end - block_start)
+
+			newline_index = block.rfind("\n")
+			if newline_index != -1:
+				return block_start + newline_index + 1
+
+			block_end = block_start
+
+	return 0
+
+
+def load_state(file_path, state_path, printer):
+	"""
+	Load the analysis state saved for the given file, if it still matches the file.
+	returns: (accumulator, offset) or (None, 0) if there is no usable state.
+	"""
+
+	if not os.path.lexists(state_path):
+		return (None, 0)
+
+	with open(state_path, "r") as state_file:
+		state = json.loads(state_file.read())
+
+	offset = state["offset"]
+
+	if state["version"] != VERSION:
+		printer.prt("Analysis state is of version {} - analysing the whole file.".format(state["version"]))
+		return (None, 0)
+
+	if (os.path.getsize(file_path) < offset
+		or _get_prefix_checksum(file_path, offset) != state["checksum"]):
+		printer.prt("The file has changed since the last analysis - analysing the whole file.")
+		return (None, 0)
+
+	return (AnalysisAccumulator.from_dict(state["accumulator"]), offset)
+
+
+def save_state(file_path, state_path, accumulator, offset):
+	""" Save the analysis state of the first <offset> bytes of the given file. """
+
+	state = {
+		"version" : VERSION,
+		"offset" : offset,
+		"checksum" : _get_prefix_checksum(file_path, offset),
+		"accumulator" : accumulator.to_dict()
+	}
+
+	with open(state_path, "w") as state_file:
+		state_file.write(json.dumps(state))
+
+
+def _get_prefix_checksum(file_path, offset):
+	""" Checksum the start and the end of the first <offset> bytes of the given file. """
+
+	checksum = md5.new(str(offset))
+
+	with open(file_path, "rb") as file_handle:
+		checksum.update(file_handle.read(min(offset, CHECKSUM_BLOCK_SIZE)))
+
+		tail_start = max(0, offset - CHECKSUM_BLOCK_SIZE)
+		file_handle.seek(tail_start)
+		checksum.update(file_handle.read(offset - tail_start))
+
+	return checksum.hexdigest()
+
+
+def yield_log_entries_in_range(file_path, start, end):
+	""" Yield LogEntry objects for all lines starting in [start, end) of the given file. """
+
+	with open(file_path, "rb") as file_handle:
+		file_handle.seek(start)
+		position = start
+
+		while position < end:
+			line = file_handle.readline()
+			if not line:
+				return
+
+			position += len(line)
+			yield LogEntry.from_log_string(line.rstrip("\n"))
+
+
 def analyse_entries(log_entry_generator):
 	"""
 	Analyse the LogEntry objects from the given generator.
@@ -193,91 +432,253 @@ def analyse_entries(log_entry_generator):
 	scorable_app_ids, dispersion_index, duplicate_index
 	"""
 
-	total_entries = 0
+	accumulator = AnalysisAccumulator()
 
-	all_app_ids = ids_data.get_app_ids()
-	found_app_ids = set()
-	entry_count_per_app_id = {}
-	elements_per_class_per_app_id = {}
+	for entry in log_entry_generator:
+		accumulator.add(entry)
 
-	all_classes = ids_data.get_labels()
-	found_classes = set()
-	entry_count_per_class = {}
-	app_ids_per_class = {}
+	return accumulator.get_result()
 
-	duplicate_elements_per_app_id = {}
-	last_hash_per_app_id = {}
 
-	for app_id in all_app_ids:
-		entry_count_per_app_id[app_id] = 0
-		elements_per_class_per_app_id[app_id] = {}
+class AnalysisAccumulator(object):
+	"""
+	Counters of the analysis for a consecutive range of log entries.
+	Accumulators of adjacent ranges can be merged in file order.
+	"""
 
-		# Unique, Duplicates
-		duplicate_elements_per_app_id[app_id] = dict(uniq=0, dupe=0)
-		last_hash_per_app_id[app_id] = None
+	def __init__(self, global_duplicates=False):
+		"""
+		Ctor
+		*global_duplicates: Estimate the unique contents per app id (HyperLogLog, 16 KB per app id).
+		"""
 
-	for a_class in all_classes:
-		entry_count_per_class[a_class] = 0
-		app_ids_per_class[a_class] = set()
+		object.__init__(self)
+
+		self.global_duplicates = global_duplicates
+
+		self.total_entries = 0
+
+		self.entry_count_per_app_id = {}
+		self.elements_per_class_per_app_id = {}
+
+		self.entry_count_per_class = {}
+		self.app_ids_per_class = {}
+
+		self.duplicate_elements_per_app_id = {}
+		# The first content is needed to detect duplicates across range boundaries when merging
+		self.first_content_per_app_id = {}
+		self.last_content_per_app_id = {}
+		# { app_id : HyperLogLog } or None
+		self.unique_content_per_app_id = {} if global_duplicates else None
+
+		for app_id in ids_data.get_app_ids():
+			self.entry_count_per_app_id[app_id] = 0
+			self.elements_per_class_per_app_id[app_id] = {}
+
+			# Unique, Duplicates
+			self.duplicate_elements_per_app_id[app_id] = dict(uniq=0, dupe=0)
+			self.first_content_per_app_id[app_id] = None
+			self.last_content_per_app_id[app_id] = None
+
+			if global_duplicates:
+				self.unique_content_per_app_id[app_id] = util.hll.HyperLogLog()
+
+		for a_class in ids_data.get_labels():
+			self.entry_count_per_class[a_class] = 0
+			self.app_ids_per_class[a_class] = set()
+
+
+	def add(self, entry):
+		""" Count the given LogEntry. """
 
-	for entry in log_entry_generator:
 		if not entry.intrusion:
 			raise NotImplementedError("Entries without labels can currently not be handled")
 
-		total_entries += 1
+		self.total_entries += 1
 
 		app_id = ids_tools.log_entry_to_app_id(entry)
 		its_class = entry.intrusion
 
-		found_app_ids.add(app_id)
-		found_classes.add(its_class)
-
-		entry_count_per_app_id[app_id] += 1
+		self.entry_count_per_app_id[app_id] += 1
 
-		if its_class not in elements_per_class_per_app_id[app_id]:
-			elements_per_class_per_app_id[app_id][its_class] = 1
+		elements_per_class = self.elements_per_class_per_app_id[app_id]
+		if its_class not in elements_per_class:
+			elements_per_class[its_class] = 1
 		else:
-			elements_per_class_per_app_id[app_id][its_class] += 1
+			elements_per_class[its_class] += 1
 
-		entry_count_per_class[its_class] += 1
-		app_ids_per_class[its_class].add(app_id)
+		self.entry_count_per_class[its_class] += 1
+		self.app_ids_per_class[its_class].add(app_id)
 
-		entry_hash = get_content_hash(entry)
-		if entry_hash == last_hash_per_app_id[app_id]:
-			duplicate_elements_per_app_id[app_id]["dupe"] += 1
+		content = get_content(entry)
+		if content == self.last_content_per_app_id[app_id]:
+			self.duplicate_elements_per_app_id[app_id]["dupe"] += 1
 		else:
-			duplicate_elements_per_app_id[app_id]["uniq"] += 1
-		last_hash_per_app_id[app_id] = entry_hash
+			self.duplicate_elements_per_app_id[app_id]["uniq"] += 1
+
+		if self.first_content_per_app_id[app_id] is None:
+			self.first_content_per_app_id[app_id] = content
+		self.last_content_per_app_id[app_id] = content
+
+		if self.global_duplicates:
+			self.unique_content_per_app_id[app_id].add("\n".join(content))
+
+
+	def merge(self, following):
+		""" Merge the accumulator of the range directly following this one into this one. """
+
+		if following.global_duplicates != self.global_duplicates:
+			raise ValueError("Can't merge accumulators with and without global duplicates.")
+
+		self.total_entries += following.total_entries
+
+		for app_id in ids_data.get_app_ids():
+			if self.global_duplicates:
+				self.unique_content_per_app_id[app_id].merge(following.unique_content_per_app_id[app_id])
+
+			self.entry_count_per_app_id[app_id] += following.entry_count_per_app_id[app_id]
+
+			elements_per_class = self.elements_per_class_per_app_id[app_id]
+			for its_class, count in following.elements_per_class_per_app_id[app_id].items():
+				elements_per_class[its_class] = elements_per_class.get(its_class, 0) + count
+
+			duplicates = self.duplicate_elements_per_app_id[app_id]
+			following_duplicates = following.duplicate_elements_per_app_id[app_id]
+			duplicates["uniq"] += following_duplicates["uniq"]
+			duplicates["dupe"] += following_duplicates["dupe"]
 
-	scorable_app_ids = []
-	scorable_entry_counts = []
-	scorable_duplicate_percentages = []
+			following_first_content = following.first_content_per_app_id[app_id]
+			if following_first_content is None:
+				continue
 
-	for app_id in all_app_ids:
-		entry_count = entry_count_per_app_id[app_id]
-		dupe_count = duplicate_elements_per_app_id[app_id]["dupe"]
-		if entry_count > 0:
-			scorable_app_ids.append(app_id)
-			scorable_entry_counts.append(entry_count)
-			scorable_duplicate_percentages.append(float(dupe_count)/entry_count)
-
-	dispersion_index = util.stat.index_of_dispersion(scorable_entry_counts)
-	duplicate_index = (util.stat.avg(scorable_duplicate_percentages)
-		+ max(scorable_duplicate_percentages) / float(len(scorable_duplicate_percentages)))
-
-	return (total_entries, found_app_ids, entry_count_per_app_id, elements_per_class_per_app_id,
-		found_classes, entry_count_per_class, app_ids_per_class, duplicate_elements_per_app_id,
-		scorable_app_ids, dispersion_index, duplicate_index)
+			# The first entry of the following range was counted as unique without knowing its predecessor
+			if following_first_content == self.last_content_per_app_id[app_id]:
+				duplicates["uniq"] -= 1
+				duplicates["dupe"] += 1
+
+			if self.first_content_per_app_id[app_id] is None:
+				self.first_content_per_app_id[app_id] = following_first_content
+			self.last_content_per_app_id[app_id] = following.last_content_per_app_id[app_id]
+
+		for a_class in ids_data.get_labels():
+			self.entry_count_per_class[a_class] += following.entry_count_per_class[a_class]
+			self.app_ids_per_class[a_class] |= following.app_ids_per_class[a_class]
+
+
+	def to_dict(self):
+		""" Convert the counters to a JSON-serialisable dict. """
+
+		app_ids_per_class = {}
+		for a_class, app_ids in self.app_ids_per_class.items():
+			app_ids_per_class[a_class] = sorted(app_ids)
+
+		unique_content_per_app_id = None
+		if self.global_duplicates:
+			unique_content_per_app_id = dict([
+				(app_id, hll.to_dict()) for app_id, hll in self.unique_content_per_app_id.items()])
+
+		return {
+			"global_duplicates" : self.global_duplicates,
+			"total_entries" : self.total_entries,
+			"entry_count_per_app_id" : self.entry_count_per_app_id,
+			"elements_per_class_per_app_id" : self.elements_per_class_per_app_id,
+			"entry_count_per_class" : self.entry_count_per_class,
+			"app_ids_per_class" : app_ids_per_class,
+			"duplicate_elements_per_app_id" : self.duplicate_elements_per_app_id,
+			"first_content_per_app_id" : self.first_content_per_app_id,
+			"last_content_per_app_id" : self.last_content_per_app_id,
+			"unique_content_per_app_id" : unique_content_per_app_id
+		}
+
+
+	@staticmethod
+	def from_dict(data):
+		""" Create an AnalysisAccumulator from the dict produced by to_dict(). """
+
+		# JSON decodes strings as unicode
+		to_str_keys = lambda d: dict([(str(k), v) for k, v in d.items()])
+		to_content = lambda v: tuple([str(x) for x in v]) if v is not None else None
 
+		accumulator = AnalysisAccumulator(data["global_duplicates"])
+		accumulator.total_entries = data["total_entries"]
+		accumulator.entry_count_per_app_id = to_str_keys(data["entry_count_per_app_id"])
+		accumulator.elements_per_class_per_app_id = dict([
+			(str(app_id), to_str_keys(counts))
+			for app_id, counts in data["elements_per_class_per_app_id"].items()])
+		accumulator.entry_count_per_class = to_str_keys(data["entry_count_per_class"])
+		accumulator.app_ids_per_class = dict([
+			(str(a_class), set([str(a) for a in app_ids]))
+			for a_class, app_ids in data["app_ids_per_class"].items()])
+		accumulator.duplicate_elements_per_app_id = dict([
+			(str(app_id), to_str_keys(counts))
+			for app_id, counts in data["duplicate_elements_per_app_id"].items()])
+		accumulator.first_content_per_app_id = dict([
+			(str(k), to_content(v)) for k, v in data["first_content_per_app_id"].items()])
+		accumulator.last_content_per_app_id = dict([
+			(str(k), to_content(v)) for k, v in data["last_content_per_app_id"].items()])
+
+		if accumulator.global_duplicates:
+			accumulator.unique_content_per_app_id = dict([
+				(str(k), util.hll.HyperLogLog.from_dict(v))
+				for k, v in data["unique_content_per_app_id"].items()])
 
-def get_content_hash(log_entry):
-	""" Hash only the content of the given log entry.
+		return accumulator
+
+
+	def get_global_duplicate_estimates(self):
+		"""
+		Estimate the duplicates among all entries of each app id, regardless of their position.
+		returns: A list of (app_id, (entry_count, estimated_unique_count)) tuples.
+		"""
+
+		if not self.global_duplicates:
+			raise ValueError("Global duplicates were not recorded.")
+
+		estimates = []
+		for app_id in ids_data.get_app_ids():
+			entry_count = self.entry_count_per_app_id[app_id]
+			# The estimate can exceed the actual count
+			unique_count = min(entry_count, self.unique_content_per_app_id[app_id].count())
+			estimates.append((app_id, (entry_count, unique_count)))
+
+		return estimates
+
+
+	def get_result(self):
+		""" Calculate the indices and return the analysis tuple (see analyse_entries()). """
+
+		all_app_ids = ids_data.get_app_ids()
+
+		found_app_ids = set([a for a in all_app_ids if self.entry_count_per_app_id[a] > 0])
+		found_classes = set([c for c in ids_data.get_labels() if self.entry_count_per_class[c] > 0])
+
+		scorable_app_ids = []
+		scorable_entry_counts = []
+		scorable_duplicate_percentages = []
+
+		for app_id in all_app_ids:
+			entry_count = self.entry_count_per_app_id[app_id]
+			dupe_count = self.duplicate_elements_per_app_id[app_id]["dupe"]
+			if entry_count > 0:
+				scorable_app_ids.append(app_id)
+				scorable_entry_counts.append(entry_count)
+				scorable_duplicate_percentages.append(float(dupe_count)/entry_count)
+
+		dispersion_index = util.stat.index_of_dispersion(scorable_entry_counts)
+		duplicate_index = (util.stat.avg(scorable_duplicate_percentages)
+			+ max(scorable_duplicate_percentages) / float(len(scorable_duplicate_percentages)))
+
+		return (self.total_entries, found_app_ids, self.entry_count_per_app_id,
+			self.elements_per_class_per_app_id, found_classes, self.entry_count_per_class,
+			self.app_ids_per_class, self.duplicate_elements_per_app_id,
+			scorable_app_ids, dispersion_index, duplicate_index)
+
+
+def get_content(log_entry):
+	""" Return the content of the given log entry as a tuple for comparisons.
 	Omits app_id, time_unix and log id. Includes label. """
 
-	entry_string = log_entry.data[LogEntry.VIN_FIELD]
-	entry_string += log_entry.data[LogEntry.LEVEL_FIELD]
-	entry_string += log_entry.data[LogEntry.GPS_POSITION_FIELD]
-	entry_string += log_entry.data[LogEntry.LOG_MESSAGE_FIELD]
-	entry_string += log_entry.intrusion
+	data = log_entry.data
 
-	return md5.new(entry_string).hexdigest()
+	return (data[LogEntry.VIN_FIELD], data[LogEntry.LEVEL_FIELD], data[LogEntry.GPS_POSITION_FIELD],
+		data[LogEntry.LOG_MESSAGE_FIELD], log_entry.intrusion)
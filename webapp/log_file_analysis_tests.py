@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+""" Unit tests for the log file analysis """
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from log_entry import LogEntry
+import ids.ids_tools as ids_tools
+import log_file_analysis
+import util.prtr
+
+
+class Tests(unittest.TestCase):
+	""" Tests for log_file_analysis """
+
+	def setUp(self):
+		""" Write a log file containing consecutive duplicates. """
+
+		self.temp_dir = tempfile.mkdtemp()
+		self.file_path = os.path.join(self.temp_dir, "log")
+
+		lines = []
+		for log_entry in ids_tools.generate_log_entries(2000):
+			lines.append(log_entry.get_log_string())
+
+			# Same content, new log id
+			if random.random() < 0.3:
+				duplicate = LogEntry.from_data(log_entry.data, log_entry.intrusion)
+				duplicate.set_any(log_id=LogEntry._generate_uuid_str_if_none(None))
+				lines.append(duplicate.get_log_string())
+
+		with open(self.file_path, "w") as file_handle:
+			file_handle.write("\n".join(lines) + "\n")
+
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+
+	def test_ranges_cover_file(self):
+		""" Ranges are adjacent, start at line beginnings and cover the whole file """
+
+		ranges = log_file_analysis.split_in_ranges(self.file_path, 1000)
+
+		self.assertEqual(ranges[0][0], 0)
+		self.assertEqual(ranges[-1][1], os.path.getsize(self.file_path))
+
+		with open(self.file_path, "rb") as file_handle:
+			for (_, end), (start, _) in zip(ranges, ranges[1:]):
+				self.assertEqual(end, start)
+				file_handle.seek(start - 1)
+				self.assertEqual(file_handle.read(1), "\n")
+
+
+	def test_parallel_equals_sequential(self):
+		""" Merged partial results match the single pass exactly """
+
+		expected = log_file_analysis.analyse_entries(
+			LogEntry.from_log_string(line) for line in open(self.file_path).read().splitlines())
+
+		old_min_size = log_file_analysis.PARALLEL_MIN_FILE_SIZE
+		old_range_size = log_file_analysis.RANGE_SIZE
+		try:
+			log_file_analysis.PARALLEL_MIN_FILE_SIZE = 0
+			# Many tiny ranges to hit duplicates on range boundaries
+			log_file_analysis.RANGE_SIZE = 2000
+
+			actual = log_file_analysis.analyse_file(self.file_path, processes=3)
+		finally:
+			log_file_analysis.PARALLEL_MIN_FILE_SIZE = old_min_size
+			log_file_analysis.RANGE_SIZE = old_range_size
+
+		self.assertEqual(expected, actual)
+
+
+	def test_continue_from_state(self):
+		""" Continuing from a saved state of a prefix matches analysing the whole file """
+
+		expected = log_file_analysis.analyse_file(self.file_path, processes=1)
+
+		file_size = os.path.getsize(self.file_path)
+		ranges = log_file_analysis.split_in_ranges(self.file_path, file_size / 2)
+		offset = ranges[0][1]
+
+		state_path = self.file_path + ".analysis_state"
+		printer = util.prtr.Printer(squelch=True)
+
+		prefix = log_file_analysis.accumulate_range(self.file_path, 0, offset, processes=1)
+		log_file_analysis.save_state(self.file_path, state_path, prefix, offset)
+		loaded, loaded_offset = log_file_analysis.load_state(self.file_path, state_path, printer)
+
+		self.assertEqual(loaded_offset, offset)
+		actual = log_file_analysis.accumulate_range(
+			self.file_path, offset, file_size, processes=1, accumulator=loaded).get_result()
+
+		self.assertEqual(expected, actual)
+
+		# A changed prefix invalidates the state
+		with open(self.file_path, "r+b") as file_handle:
+			file_handle.write(" ")
+		self.assertEqual(log_file_analysis.load_state(self.file_path, state_path, printer), (None, 0))
+
+
+	def test_global_duplicate_estimates(self):
+		""" Repeating the whole log yields about half global duplicates, also when merged from state """
+
+		with open(self.file_path, "r") as file_handle:
+			content = file_handle.read()
+		with open(self.file_path, "a") as file_handle:
+			file_handle.write(content)
+
+		file_size = os.path.getsize(self.file_path)
+		offset = len(content)
+
+		prefix = log_file_analysis.accumulate_range(self.file_path, 0, offset, processes=1,
+			accumulator=log_file_analysis.AnalysisAccumulator(global_duplicates=True))
+		loaded = log_file_analysis.AnalysisAccumulator.from_dict(prefix.to_dict())
+		accumulator = log_file_analysis.accumulate_range(
+			self.file_path, offset, file_size, processes=1, accumulator=loaded)
+
+		for app_id, (entry_count, unique_count) in accumulator.get_global_duplicate_estimates():
+			# The generated entries only have consecutive duplicates in the first half
+			expected = prefix.duplicate_elements_per_app_id[app_id]["uniq"]
+			self.assertEqual(entry_count, 2 * prefix.entry_count_per_app_id[app_id])
+			self.assertAlmostEqual(unique_count, expected, delta=expected * 0.05 + 1)
+
+		self.assertRaises(ValueError, log_file_analysis.AnalysisAccumulator().merge, accumulator)
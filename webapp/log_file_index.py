@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+""" Line index of a log file for random access """
+
+import json
+import os
+import random
+import shutil
+import struct
+import tempfile
+
+import ids.ids_tools as ids_tools
+import ids.ids_data as ids_data
+
+
+VERSION = "1.0"
+
+INDEX_SUFFIX = ".line_index"
+
+# Each line is stored as its byte offset in the log file
+OFFSET_FORMAT = "<Q"
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+# Offsets kept in memory per app id before they are moved to a temporary file
+SPILL_COUNT = 1000000
+
+
+def build_index(file_path, printer):
+	"""
+	Index the lines of the given log file by app id. The index is stored next to the file as a
+	JSON header line followed by the byte offsets of all lines, grouped by app id.
+	"""
+
+	index_path = file_path + INDEX_SUFFIX
+	printer.prt("Indexing {}...".format(file_path))
+
+	app_ids = ids_data.get_app_ids()
+	stat = os.stat(file_path)
+
+	offsets_per_app_id = dict([(app_id, []) for app_id in app_ids])
+	spill_files = dict([(app_id, tempfile.TemporaryFile()) for app_id in app_ids])
+	counts = dict.fromkeys(app_ids, 0)
+
+	try:
+		offset = 0
+		with open(file_path, "rb") as file_handle:
+			for line in file_handle:
+				app_id = ids_tools.log_string_to_app_id(line)
+
+				offsets = offsets_per_app_id[app_id]
+				offsets.append(offset)
+				if len(offsets) == SPILL_COUNT:
+					_write_offsets(spill_files[app_id], offsets)
+					del offsets[:]
+
+				counts[app_id] += 1
+				offset += len(line)
+
+		header = {
+			"version" : VERSION,
+			"size" : stat.st_size,
+			"mtime" : stat.st_mtime,
+			"app_ids" : app_ids,
+			"counts" : counts
+		}
+
+		# Write to a temporary path first to never leave a broken index behind
+		temp_index_path = index_path + ".tmp"
+		with open(temp_index_path, "wb") as index_handle:
+			index_handle.write(json.dumps(header) + "\n")
+
+			for app_id in app_ids:
+				spill_files[app_id].seek(0)
+				shutil.copyfileobj(spill_files[app_id], index_handle)
+				_write_offsets(index_handle, offsets_per_app_id[app_id])
+
+		os.rename(temp_index_path, index_path)
+	finally:
+		for spill_file in spill_files.values():
+			spill_file.close()
+
+	printer.prt("Indexed {:,} lines to {}.".format(sum(counts.values()), index_path))
+
+
+def load_index(file_path, printer):
+	"""
+	Load the index of the given log file.
+	returns: A LogFileIndex or None if there is no index or it doesn't match the file.
+	"""
+
+	index_path = file_path + INDEX_SUFFIX
+	if not os.path.lexists(index_path):
+		return None
+
+	with open(index_path, "rb") as index_handle:
+		header = json.loads(index_handle.readline())
+		data_start = index_handle.tell()
+
+	stat = os.stat(file_path)
+
+	if header["version"] != VERSION:
+		printer.prt("Line index has version {} instead of {} - ignoring it.".format(
+			header["version"], VERSION))
+		return None
+
+	if header["size"] != stat.st_size or header["mtime"] != stat.st_mtime:
+		printer.prt("Line index is outdated - ignoring it. Rebuild it with \"tools.py index\".")
+		return None
+
+	app_ids = [str(app_id) for app_id in header["app_ids"]]
+	counts = dict([(str(app_id), count) for app_id, count in header["counts"].items()])
+
+	return LogFileIndex(file_path, index_path, data_start, app_ids, counts)
+
+
+def _write_offsets(file_handle, offsets):
+	""" Append the given offsets to the given file. """
+
+	file_handle.write(struct.pack("<{}Q".format(len(offsets)), *offsets))
+
+
+class LogFileIndex(object):
+	""" Byte offsets of the lines of a log file per app id. The offsets are read on demand. """
+
+	def __init__(self, file_path, index_path, data_start, app_ids, counts):
+		"""
+		Ctor
+		*data_start: Position of the first offset in the index file.
+		*app_ids: The app ids in the order of their offsets in the index file.
+		*counts: { app_id : number of lines }
+		"""
+
+		object.__init__(self)
+
+		self.file_path = file_path
+		self.index_path = index_path
+		self.data_start = data_start
+		self.app_ids = app_ids
+		self.counts = counts
+
+
+	def sample(self, sample_size, limit_to=None):
+		"""
+		Sample the given number of lines by seeking to random offsets.
+		*limit_to: List of app ids to limit to.
+		returns: The sampled lines in file order, including their line endings.
+		"""
+
+		if limit_to is None:
+			limit_to = self.app_ids
+
+		if any([l not in self.app_ids for l in limit_to]):
+			raise ValueError("Given limits are invalid: %s" % limit_to)
+
+		# (position of the first offset in the index, number of lines) per app id, in index order
+		groups = []
+		position = 0
+		for app_id in self.app_ids:
+			if app_id in limit_to:
+				groups.append((position, self.counts[app_id]))
+			position += self.counts[app_id]
+
+		line_count = sum([count for _, count in groups])
+		if line_count < sample_size:
+			raise ValueError("Only {} lines available for a sample of {}!".format(line_count, sample_size))
+
+		picks = sorted(random.sample(xrange(line_count), sample_size))
+
+		offsets = []
+		with open(self.index_path, "rb") as index_handle:
+			group_index = 0
+			group_start = 0
+			for pick in picks:
+				# Picks are sorted, so the groups only need to be walked once
+				while pick >= group_start + groups[group_index][1]:
+					group_start += groups[group_index][1]
+					group_index += 1
+
+				position = groups[group_index][0] + pick - group_start
+				index_handle.seek(self.data_start + position * OFFSET_SIZE)
+				offsets.append(struct.unpack(OFFSET_FORMAT, index_handle.read(OFFSET_SIZE))[0])
+
+		lines = []
+		with open(self.file_path, "rb") as file_handle:
+			for offset in sorted(offsets):
+				file_handle.seek(offset)
+				lines.append(file_handle.readline())
+
+		return lines
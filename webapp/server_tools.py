@@ -20,9 +20,10 @@ import util.outp
 import util.prtr
 import util.seqr
 import util.stat
-from ids.dir_utils import Dir, ModelDir
+from ids.dir_utils import Dir, DatasetDir, ModelDir
 from ids.intrusion_classifier import IntrusionClassifier
-from ids.ids_converter import IdsConverter
+import ids.cross_validation as cross_validation
+import ids.dataset_cache as dataset_cache
 import ids.ids_tools as ids_tools
 import ids.ids_data as ids_data
 
@@ -81,9 +82,9 @@ def score_call(args):
 
 
 def _score(file_path, iterations):
-	""" Score the given LogEntry objects in multiple iterations and print the output. """
+	""" Score the entries of the given file in multiple iterations and print the output. """
 
-	log_entries = _read_file_flow(file_path)
+	app_id_datasets = _load_dataset_flow(file_path).X_y_per_app_id
 
 	scores = {}
 	for app_id in ids_data.get_app_ids():
@@ -96,7 +97,7 @@ def _score(file_path, iterations):
 	for i in range(iterations, 0, -1):
 		# Score
 		printer.prt("{}...".format(i), newline=False)
-		scoring_result = _score_entries(log_entries, squelch_output=True)
+		scoring_result = _score_converted(app_id_datasets, squelch_output=True)
 		if not scoring_result:
 			printer.prt("")
 			printer.prt("Scoring failed!")
@@ -110,16 +111,16 @@ def _score(file_path, iterations):
 	_print_scores(scores, printer)
 
 
-def _score_entries(log_entries, squelch_output=False):
+def _score_converted(app_id_datasets, squelch_output=False):
 	"""
-	Score the given LogEntry objects.
-	returns: Boolean flag indicating success
+	Score the given { app_id : (X, y) } datasets.
+	returns: { app_id : score } or None on failure
 	"""
 
 	clas = IntrusionClassifier.get_singleton()
 
 	try:
-		result = clas.score(log_entries, do_return=True, squelch_output=squelch_output)
+		result = clas.score_converted(app_id_datasets, do_return=True, squelch_output=squelch_output)
 		return result
 	except ValueError as val_err:
 		print(val_err)
@@ -128,76 +129,45 @@ def _score_entries(log_entries, squelch_output=False):
 
 def train_score_call(args):
 	""" Unpack the args and call _train_and_score.
-	Expects 'file_path', 'folds' and optionally 'iterations'. """
-	_train_and_score(args.file_path, args.folds, args.iterations)
+	Expects 'file_path', 'folds', 'processes' and optionally 'iterations'. """
+	_train_and_score(args.file_path, args.folds, args.iterations, args.processes)
 
 
-def _train_and_score(file_path, folds, iterations=None):
+def _train_and_score(file_path, folds, iterations=None, processes=None):
 	"""
 	Use the given log_entries to score the classifier in a <fold>-fold cross-validation.
+	The converted entries come from the dataset cache; the models of all folds and app ids are
+	fitted and scored in parallel in memory. Neither the model directory nor the classifier singleton is touched.
 	: param iterations : Optionally specify to repeat <iterations> times.
+	: param processes : Number of worker processes. None for all cores, 1 to disable.
 	"""
 
 	if iterations <= 1:
 		iterations = None
 
-	log_entries = _read_file_flow(file_path)
+	dataset = _load_dataset_flow(file_path)
 
-	if len(log_entries) < 10000:
+	if len(dataset.app_ids) < 10000:
 		raise IOError("Insufficient number of entries found in the file. Need >= 10,000.")
 
-	scores = {}
-	for app_id in ids_data.get_app_ids():
-		scores[app_id] = []
-
 	printer = util.prtr.Printer()
 
 	printer.prt("Using {}-fold cross-validation".format(folds)
-		+ "" if iterations is None else " with {} iteration{}."
-			.format(iterations, "s" if iterations > 1 else ""))
+		+ ("." if iterations is None else " with {} iterations.".format(iterations)))
 
-	folds = None
+	splitter = None
 	if iterations:
-		folds = sk_mod.RepeatedKFold(n_splits=folds, n_repeats=iterations)
+		splitter = sk_mod.RepeatedKFold(n_splits=folds, n_repeats=iterations)
 	else:
-		folds = sk_mod.KFold(n_splits=folds)
-
-	current_round = 1
-
-	for train_indices, score_indices in folds.split(log_entries):
-		printer.prt("Round {} of {}.".format(current_round, folds * iterations))
-		current_round += 1
-
-		# Selecting items based on the given indices
-		printer.prt("Splitting... ", newline=False)
-		training_entries = [log_entries[i] for i in train_indices]
-		scoring_entries = [log_entries[i] for i in score_indices]
-
-		preconditions_msg = "Please make sure that all preconditions are met and rerun."
-
-		# Train
-		printer.prt("Training... ", newline=False)
-		training_succeeded = _train_entries(training_entries, squelch_output=True)
-		if not training_succeeded:
-			printer.prt("")
-			printer.prt("Training failed. " + preconditions_msg)
-			continue
-
-		# Score
-		printer.prt("Scoring... ", newline=False)
-		scoring_result = _score_entries(scoring_entries, squelch_output=True)
-		if not scoring_result:
-			printer.prt("")
-			printer.prt("Scoring failed. " + preconditions_msg)
-			# Don't continue; reset needs to happen in order to allow for the next iteration
+		splitter = sk_mod.KFold(n_splits=folds)
 
-		for app_id in scoring_result:
-			scores[app_id].append(scoring_result[app_id])
+	printer.prt("Training and scoring {} rounds... ".format(splitter.get_n_splits()), newline=False)
+	scores = cross_validation.cross_validate(dataset, splitter.split(dataset.app_ids), processes)
+	printer.prt("Done.")
 
-		# Reset
-		printer.prt("Resetting... ", newline=False)
-		IntrusionClassifier.reset_models(purge=True)
-		printer.prt("Done.")
+	for app_id in ids_data.get_app_ids():
+		if app_id not in scores:
+			scores[app_id] = []
 
 	_print_scores(scores, printer)
 
@@ -211,36 +181,19 @@ def score_pr_call(args):
 def _score_pr(file_path):
 
 	printer = util.prtr.Printer()
-	squelcher = util.prtr.Printer(squelch=True)
-	converter = IdsConverter()
-
-	log_entries = _read_file_flow(file_path)
-
-	scores_acc = _empty_app_id_dict()
-	scores_prec = _empty_app_id_dict()
-	scores_rec = _empty_app_id_dict()
-
-	printer.prt("Preparing... ", newline=False)
-
-	# converted_entries: [(app_id, vector, class)]
-	converted_entries = []
-	for log_entry in log_entries:
-		converted_entries.append(converter.log_entry_to_prepared_tuple(log_entry, binary=True))
 
-	printer.prt("Filtering... ", newline=False)
-	train_entries, test_entries = ids_tools.converted_entries_to_train_test(converted_entries)
+	dataset = _load_dataset_flow(file_path)
 
-	printer.prt("Splitting... ", newline=False)
-	train_dict = converter.prepared_tuples_to_train_dict(train_entries, squelcher)
-	test_dict = converter.prepared_tuples_to_train_dict(test_entries, squelcher)
+	scores_acc = ids_tools.empty_app_id_to_list_dict(ids_data.get_app_ids())
+	scores_prec = ids_tools.empty_app_id_to_list_dict(ids_data.get_app_ids())
+	scores_rec = ids_tools.empty_app_id_to_list_dict(ids_data.get_app_ids())
 
 	result_table = []
 	result_table.append(["App id", "Actual (+)", "Actual (-)"])
 	printer.prt("Scoring... ")
-	for app_id in converter.app_ids:
+	for app_id, (X, y) in util.seqr.yield_items_in_key_order(dataset.X_y_per_app_id):
 
-		X_train, y_train = train_dict[app_id]
-		X_test, y_test = test_dict[app_id]
+		X_train, _, X_test, y_test = ids_tools.X_y_to_train_test(X, y)
 
 		clf = sklearn.svm.OneClassSVM(random_state=0)
 		clf.fit(X_train)
@@ -294,25 +247,25 @@ def _print_scores(scores, printer, headline="Results"):
 
 
 def reset_call(args):
-	""" Call _reset. Expects 'classifier', 'server_log' or 'all'. """
-	_reset(args.classifier, args.server_log, args.all)
+	""" Call _reset. Expects 'classifier', 'server_log', 'datasets' or 'all'. """
+	_reset(args.classifier, args.server_log, args.all, args.datasets)
 
 
-def _reset(classifier, server_log, reset_all):
-	""" Move the generated models to a sub-folder and reset the intrusion_classifier_history. """
+def _reset(classifier, server_log, reset_all, datasets=False):
+	""" Move the generated models to a sub-folder and reset the intrusion_classifier_history.
+	Optionally delete the cached datasets. """
 
-	if not (classifier or server_log or reset_all):
-		print("No selection was made! Add either --classifier, --server-log or --all to reset.")
+	if not (classifier or server_log or reset_all or datasets):
+		print("No selection was made! Add either --classifier, --server-log, --datasets or --all to reset.")
 		return
 
 	classifier |= reset_all
 	server_log |= reset_all
+	datasets |= reset_all
 
-	print("Resetting {}{}{}...".format(
-		"classifier" if classifier else "",
-		" and " if classifier and server_log else "",
-		"server log" if server_log else ""
-	))
+	selection = [name for name, selected in
+		[("classifier", classifier), ("server log", server_log), ("dataset cache", datasets)] if selected]
+	print("Resetting {}...".format(" and ".join(selection)))
 
 	message = ""
 
@@ -332,34 +285,24 @@ def _reset(classifier, server_log, reset_all):
 		message += "\n# Server log\n"
 		message += StateDao.reset_in_instance()
 
+	if datasets:
+		message += "\n# Dataset cache\n"
+		message += DatasetDir.reset_dir()
+
 	print(message)
 
 
-def _read_file_flow(file_path, squelch_output=False):
-	""" Read up to 5000000 lines of the given file as LogEntry objects.
+def _load_dataset_flow(file_path, squelch_output=False):
+	""" Load up to 5000000 converted entries of the given file from the dataset cache.
 	Updates the user about the progress. """
 
 	printer = util.prtr.Printer(squelch=squelch_output)
 
-	log_entries = []
-
-	printer.prt("Using log file \"{}\"".format(os.path.join(os.getcwd(), file_path)))
-	printer.prt("Reading file and converting up to 5,000,000 lines to LogEntry objects...")
-	log_entries = _get_log_entries_from_file(file_path, 5000000)
-
-	printer.prt("Done.")
-	return log_entries
-
-
-def _get_log_entries_from_file(file_path, limit):
-	""" Read up to <limit> number of log entries from the given file. """
-
-	log_entries = []
-
-	for line in Dir.yield_lines(file_path, limit):
-		log_entries.append(LogEntry.from_log_string(line))
+	printer.prt("Using file \"{}\"".format(os.path.join(os.getcwd(), file_path)))
+	dataset = dataset_cache.load_dataset(file_path, 5000000, printer)
 
-	return log_entries
+	printer.prt("Done. Found {:,} entries.".format(len(dataset.app_ids)))
+	return dataset
 
 
 def _yield_log_entries_from_file(file_path):
@@ -386,6 +329,8 @@ if __name__ == "__main__":
 		TRAINSCORE_PARSER.add_argument("file_path", metavar="PATH", help="The data")
 		TRAINSCORE_PARSER.add_argument("--folds", "-f", type=int, default=5)
 		TRAINSCORE_PARSER.add_argument("--iterations", "-i", type=int)
+		TRAINSCORE_PARSER.add_argument("--processes", "-p", type=int, metavar="N",
+			help="Number of worker processes (default: all cores).")
 		TRAINSCORE_PARSER.set_defaults(function=train_score_call)
 
 		SCOREPR_PARSER = SUBPARSERS.add_parser("score-pr")
@@ -395,6 +340,8 @@ if __name__ == "__main__":
 		RESET_PARSER = SUBPARSERS.add_parser("reset", help="Reset the classifier")
 		RESET_PARSER.add_argument("--classifier", "-c", action="store_true")
 		RESET_PARSER.add_argument("--server-log", "-l", action="store_true")
+		RESET_PARSER.add_argument("--datasets", "-d", action="store_true",
+			help="Delete the cached converted datasets")
 		RESET_PARSER.add_argument("--all", "-a", action="store_true")
 		RESET_PARSER.set_defaults(function=reset_call)
 
@@ -11,9 +11,18 @@ import time
 
 from log_entry import LogEntry
 import util.fmtr
+import util.metrics
 import util.prtr
 
 
+_APPEND_SECONDS = util.metrics.REGISTRY.histogram(
+	"state_dao_append_seconds", "Time to append an entry to the log, including automatic flushes")
+_FLUSH_SECONDS = util.metrics.REGISTRY.histogram(
+	"state_dao_flush_seconds", "Time to write the new log entries to disk")
+_FLUSH_ENTRIES = util.metrics.REGISTRY.histogram(
+	"state_dao_flush_entries", "Number of entries written per flush", buckets=util.metrics.SIZE_BUCKETS)
+
+
 class StateDao(object):
 	""" DAO class for handling the STATE objects """
 
@@ -242,6 +251,9 @@ class StateDao(object):
 
 		self._last_flush = time_now
 
+		_FLUSH_SECONDS.observe(time.time() - time_now)
+		_FLUSH_ENTRIES.observe(number_of_entries)
+
 
 	def get_current_min_time(self):
 		""" Getter for the STATE. Reads from disk and updates internal state. """
@@ -275,6 +287,16 @@ class StateDao(object):
 	def append_to_log(self, log_entry):
 		""" Append the given LogEntry object to the log. """
 
+		start_time = time.time()
+		try:
+			self._append_to_log(log_entry)
+		finally:
+			_APPEND_SECONDS.observe(time.time() - start_time)
+
+
+	def _append_to_log(self, log_entry):
+		""" Append the given entry and flush if necessary. """
+
 		self._new_log_entries.append(log_entry)
 
 		if self._maximum_reached(include_state=True):
@@ -12,9 +12,9 @@ import sklearn
 import sklearn.metrics as sk_met
 import sklearn.model_selection as sk_mod
 
-from log_entry import LogEntry
 from state_dao import StateDao
 import log_file_analysis
+import log_file_index
 import util.fmtr
 import util.outp
 import util.prtr
@@ -27,100 +27,120 @@ import ids.ids_tools as ids_tools
 import ids.ids_data as ids_data
 
 
+# Output files are written in big blocks
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+
+
 def split_call(args):
 	""" Unpack the args and call the respective _split_*.
 	Expects 'file_path', 'max-entries-per-file'
 	and 'train_split' / 'split_per_app_id' / 'split_in_chunks'. """
 
-	if args.max_entries_per_file <= 0:
+	if args.max_entries_per_file is not None and args.max_entries_per_file <= 0:
 		raise ValueError("Max entries need to be > 0. Received: {}".format(args.max_entries_per_file))
 
-	log_entry_generator = _yield_log_entries_from_file(args.file_path)
-
 	if args.train_split:
-		_split_in_train_and_score(log_entry_generator, args.file_path, args.train_split)
+		_split_in_train_and_score(args.file_path, args.train_split, args.max_entries_per_file)
 	elif args.per_app_id:
-		_split_per_app_id(log_entry_generator, args.file_path, args.max_entries_per_file)
+		_split_per_app_id(args.file_path, args.max_entries_per_file)
 	elif args.in_chunks:
-		_split_in_chunks(log_entry_generator, args.file_path, args.max_entries_per_file)
+		_split_in_chunks(args.file_path, args.max_entries_per_file)
 	else:
 		raise NotImplementedError("Arg configuration not implemented")
 
 
-def _split_in_train_and_score(log_entry_generator, file_path, split):
-	""" Split the given entries into a training and a scoring file based on the given split. """
-
-	print("WARNING: --max-entries-per-file is not implemented")
+def _split_in_train_and_score(file_path, split, max_entries_per_file=None):
+	"""
+	Split the given log file into a training and a scoring file based on the given split.
+	Splits each app_id's classes equally in a single pass. The lines are copied unchanged.
+	"""
 
 	if split <= 0 or split >= 100:
 		raise ValueError("Invalid split \"{}\" given.".format(split))
 
-	training_entries, scoring_entries = _split_log_entries_flow(log_entry_generator, split)
+	print("Trying to split the entries according to given split of {}/{}".format(split, 100 - split))
 
-	training_file_path = file_path + "_train"
-	scoring_file_path = file_path + "_score"
+	# { (app_id, class) : [entry_count, training_count] }
+	counts_per_bucket = {}
+	training_count = 0
+	entry_count = 0
+
+	path_creator = lambda suffix: lambda idx: file_path + suffix + ("_{}".format(idx) if idx else "")
+	writers = []
 
 	try:
-		_save_entries_flow(training_entries, training_file_path)
-		_save_entries_flow(scoring_entries, scoring_file_path)
+		training_writer = _LineWriter(path_creator("_train"), max_entries_per_file)
+		writers.append(training_writer)
+		scoring_writer = _LineWriter(path_creator("_score"), max_entries_per_file)
+		writers.append(scoring_writer)
+
+		with open(file_path, "r") as file_handle:
+			for line in file_handle:
+				bucket = (ids_tools.log_string_to_app_id(line), ids_tools.log_string_to_class(line))
+				if bucket not in counts_per_bucket:
+					counts_per_bucket[bucket] = [0, 0]
+
+				counts = counts_per_bucket[bucket]
+				counts[0] += 1
+				entry_count += 1
+
+				# Keep the training share of each bucket at (split / 100) * entries, rounded down
+				if counts[1] < counts[0] * split // 100:
+					counts[1] += 1
+					training_count += 1
+					training_writer.write(line)
+				else:
+					scoring_writer.write(line)
 	except IOError as io_err:
 		print(io_err)
 		return
+	finally:
+		for writer in writers:
+			writer.close()
 
+	achieved_split = 0
+	if entry_count > 0:
+		achieved_split = round((training_count / float(entry_count)) * 100, 2)
+	print("Done. Achieved a split of {}/{}".format(achieved_split, 100 - achieved_split))
 	print("Split was finished successfully!")
 	return
 
 
-def _split_per_app_id(log_entry_generator, file_path, max_per_file=1000000):
-	""" Split the given entries into separate files for each app id. """
+def _split_per_app_id(file_path, max_entries_per_file=None):
+	""" Split the given log file into separate files for each app id. The lines are copied unchanged. """
 
 	print("Splitting the given file per app id...")
 
 	file_path_no_ext, ext = os.path.splitext(file_path)
+	path_creator = lambda app_id: lambda idx: (
+		file_path_no_ext + "_" + app_id + ("_{}".format(idx) if idx else "") + ext)
 
-	all_app_ids = ids_data.get_app_ids()
-	file_handles = dict()
-	entry_counts = dict.fromkeys(all_app_ids, 0)
-	file_indices = dict.fromkeys(all_app_ids, 0)
+	writers = {}
 
 	try:
-		for app_id in all_app_ids:
-			new_path = file_path_no_ext + "_" + app_id + ext
-			file_handles[app_id] = _init_file_handle(new_path)
-
-		for log_entry in log_entry_generator:
-			app_id = ids_tools.log_entry_to_app_id(log_entry)
+		for app_id in ids_data.get_app_ids():
+			writers[app_id] = _LineWriter(path_creator(app_id), max_entries_per_file)
 
-			if entry_counts[app_id] == max_per_file:
-				print("Entry count for {} has reached allowed maximum of {}. Creating a new file..."
-					.format(app_id, max_per_file))
-
-				entry_counts[app_id] = 0
-				file_indices[app_id] += 1
-
-				new_index = file_indices[app_id]
-				new_path = file_path_no_ext + "_" + app_id + "_" + new_index + ext
-
-				file_handles[app_id].close()
-				file_handles[app_id] = _init_file_handle(new_path)
-
-
-			file_handles[app_id].write(log_entry.get_log_string() + "\n")
-			entry_counts[app_id] += 1
+		with open(file_path, "r") as file_handle:
+			for line in file_handle:
+				writers[ids_tools.log_string_to_app_id(line)].write(line)
 	except IOError as io_err:
 		print(io_err)
 		return
 	finally:
-		for file_handle in file_handles.values():
-			file_handle.close()
+		for writer in writers.values():
+			writer.close()
 
 		print("Closed all file handles.")
 
 	print("Done.")
 
 
-def _split_in_chunks(log_entry_generator, file_path, max_entries_per_file):
-	""" Split the given entries into chunks of size <max_entries_per_file>. """
+def _split_in_chunks(file_path, max_entries_per_file):
+	"""
+	Split the given log file into chunks of <max_entries_per_file> lines.
+	The chunk borders are found by counting line endings in big blocks; the bytes are copied unchanged.
+	"""
 
 	if max_entries_per_file is None:
 		raise ValueError("Please specify the number of entries per file!")
@@ -131,140 +151,179 @@ def _split_in_chunks(log_entry_generator, file_path, max_entries_per_file):
 
 	current_count = 0
 	current_index = 1
-	current_file = _init_file_handle(path_creator(current_index))
+	current_file = _init_file_handle(path_creator(current_index), WRITE_BUFFER_SIZE)
 
 	print(writer_msg(current_index))
 
-	for log_entry in log_entry_generator:
-		if current_count == max_entries_per_file:
-			current_count = 0
-			current_index += 1
-			current_file.close()
+	try:
+		with open(file_path, "r") as file_handle:
+			last_block = ""
+			while True:
+				block = file_handle.read(WRITE_BUFFER_SIZE)
+				if not block:
+					break
+				last_block = block
+
+				# Line endings in the rest of the block - counted once per block
+				block_lines = block.count("\n")
+
+				position = 0
+				while position < len(block):
+					if current_count == max_entries_per_file:
+						current_count = 0
+						current_index += 1
+						current_file.close()
+
+						print(writer_msg(current_index))
+						current_file = _init_file_handle(path_creator(current_index), WRITE_BUFFER_SIZE)
+
+					# End of the current chunk within this block, or the end of the block
+					chunk_end = len(block)
+					line_count = block_lines
+					if current_count + line_count >= max_entries_per_file:
+						line_count = max_entries_per_file - current_count
+						chunk_end = _find_nth_line_end(block, position, line_count)
+
+					current_file.write(block[position:chunk_end])
+					current_count += line_count
+					block_lines -= line_count
+					position = chunk_end
+
+			# A last line without line ending
+			if last_block and not last_block.endswith("\n"):
+				current_file.write("\n")
+	finally:
+		current_file.close()
+
+	print("Done.")
 
-			print(writer_msg(current_index))
-			current_file = _init_file_handle(path_creator(current_index))
 
-		current_file.write(log_entry.get_log_string() + "\n")
-		current_count += 1
+def _find_nth_line_end(block, start, n):
+	""" Return the position after the <n>th line ending in the block, counting from <start>. """
 
-	current_file.close()
-	print("Done.")
+	position = start
+	for _ in range(n):
+		position = block.index("\n", position) + 1
 
+	return position
 
-def _init_file_handle(path):
+
+def _init_file_handle(path, buffering=-1):
 	""" Check if the given file exists and open it if it does. """
 
 	if os.path.lexists(path):
 		raise IOError("File {} exists - please delete and try again.".format(path))
 
-	return open(path, "w")
+	return open(path, "w", buffering)
 
 
-def sample_call(args):
-	""" Unpack the args and call _sample.
-	Expects 'file_path' and 'number_of_elements', optionally 'limit_to'. """
+class _LineWriter(object):
+	""" Buffered writer for log lines. Continues in a new file after <max_lines> lines. """
 
-	if not args.file_path or not args.number_of_elements:
-		raise RuntimeError("Missing arg!")
+	def __init__(self, path_creator, max_lines=None):
+		"""
+		Ctor
+		*path_creator: Function mapping the file index (from 0) to the path of the file.
+		*max_lines: Maximum number of lines per file. None for no limit.
+		"""
 
-	_sample(args.file_path, args.number_of_elements, args.limit_to)
+		object.__init__(self)
 
+		self._path_creator = path_creator
+		self._max_lines = max_lines
+		self._file_index = None
+		self._line_count = None
+		self._file_handle = None
 
-def _sample(file_path, number_of_elements, limit_to):
-	""" Sample <number_of_elements> from the given file. """
+		self._open(0)
 
-	print("Sampling...")
 
-	target_file_path = "%s_%s-sample" % (file_path, number_of_elements)
+	def write(self, line):
+		""" Write the given line. Adds the line terminating character if it's missing. """
 
-	if not os.path.lexists(file_path):
-		raise IOError("Input file doesn't exist")
+		if self._line_count == self._max_lines:
+			self._file_handle.close()
+			self._open(self._file_index + 1)
 
-	target_file_path = Dir.uniquify(target_file_path)
+		if not line.endswith("\n"):
+			line += "\n"
 
-	line_generator = Dir.yield_lines(file_path)
+		self._file_handle.write(line)
+		self._line_count += 1
 
-	log_lines = None
-	if limit_to is None:
-		log_lines = ids_tools.reservoir_sample(line_generator, number_of_elements)
-	else:
-		log_lines = ids_tools.reservoir_sample_limit(line_generator, number_of_elements, limit_to)
-
-	Dir.write_lines(target_file_path, log_lines)
 
-	print("Done. Wrote to file:\n%s" % target_file_path)
-
-
-def analyse_call(args):
-	""" Unpack the args and call log_file_analysis.analyse.
-	Expects 'file_path' and 'to_file'. """
-	log_file_analysis.analyse(args.file_path, args.to_file, util.prtr.Printer())
+	def close(self):
+		""" Close the current file, if any. """
 
+		if self._file_handle is not None:
+			self._file_handle.close()
+			self._file_handle = None
 
-def _split_log_entries_flow(log_entry_iterator, split, squelch_output=False):
-	""" Split the given log entries equally by app_id and each app_id's class.
-	Updates the user about progress and success. """
 
-	printer = util.prtr.Printer(squelch=squelch_output)
+	def _open(self, file_index):
+		""" Open the file with the given index. """
 
-	printer.prt("Trying to split the entries according to given split of {}/{}"
-		.format(split, 100 - split))
+		path = self._path_creator(file_index)
+		print("Writing file {}...".format(path))
 
-	# { app_id : { class : [entries] } }
-	entries_per_app_id_per_class = {}
+		self._file_handle = _init_file_handle(path, WRITE_BUFFER_SIZE)
+		self._file_index = file_index
+		self._line_count = 0
 
-	entry_count = 0
 
-	# Sort items into buckets
-	for log_entry in log_entry_iterator:
-		entry_count += 1
+def sample_call(args):
+	""" Unpack the args and call _sample.
+	Expects 'file_path' and 'number_of_elements', optionally 'limit_to'. """
 
-		app_id = ids_tools.log_entry_to_app_id(log_entry)
-		its_class = log_entry.intrusion
+	if not args.file_path or not args.number_of_elements:
+		raise RuntimeError("Missing arg!")
 
-		if app_id not in entries_per_app_id_per_class:
-			entries_per_app_id_per_class[app_id] = {}
-		if its_class not in entries_per_app_id_per_class[app_id]:
-			entries_per_app_id_per_class[app_id][its_class] = []
+	_sample(args.file_path, args.number_of_elements, args.limit_to)
 
-		entries_per_app_id_per_class[app_id][its_class].append(log_entry)
 
-	result_train = []
-	result_score = []
+def _sample(file_path, number_of_elements, limit_to):
+	""" Sample <number_of_elements> from the given file. """
 
-	# Split each bucket and add to the result
-	for app_id in entries_per_app_id_per_class:
-		for a_class in entries_per_app_id_per_class[app_id]:
-			items = entries_per_app_id_per_class[app_id][a_class]
+	print("Sampling...")
 
-			its_split = int((split / 100.0) * len(items))
+	target_file_path = "%s_%s-sample" % (file_path, number_of_elements)
 
-			result_train += items[:its_split]
-			result_score += items[its_split:]
+	if not os.path.lexists(file_path):
+		raise IOError("Input file doesn't exist")
 
-	achieved_split = round((len(result_train) / float(entry_count)) * 100, 2)
-	printer.prt("Done. Achieved a split of {}/{}".format(achieved_split, 100 - achieved_split))
-	return result_train, result_score
+	target_file_path = Dir.uniquify(target_file_path)
 
+	index = log_file_index.load_index(file_path, util.prtr.Printer())
 
-def _yield_log_entries_from_file(file_path):
-	for line in Dir.yield_lines(file_path):
-		yield LogEntry.from_log_string(line)
+	log_lines = None
+	if index is not None:
+		print("Using the line index.")
+		log_lines = index.sample(number_of_elements, limit_to)
+	else:
+		# The lines keep their line endings, which saves copying all skipped lines
+		with open(file_path, "r") as file_handle:
+			if limit_to is None:
+				log_lines = ids_tools.reservoir_sample(file_handle, number_of_elements)
+			else:
+				log_lines = ids_tools.reservoir_sample_limit(file_handle, number_of_elements, limit_to)
 
+	Dir.write_lines(target_file_path, log_lines)
 
-def _save_entries_flow(log_entry_iterator, file_path):
-	""" Stores the given LogEntry objects in a log file. Updates the user about the progress. """
+	print("Done. Wrote to file:\n%s" % target_file_path)
 
-	if os.path.lexists(file_path):
-		raise IOError("File {} exists already - delete and try again.".format(file_path))
 
-	print("Saving entries to {}...".format(file_path))
+def index_call(args):
+	""" Unpack the args and call log_file_index.build_index.
+	Expects 'file_path'. """
+	log_file_index.build_index(args.file_path, util.prtr.Printer())
 
-	with open(file_path, "w") as file_handle:
-		for log_entry in log_entry_iterator:
-			file_handle.write(log_entry.get_log_string() + "\n")
 
-	print("Done.")
+def analyse_call(args):
+	""" Unpack the args and call log_file_analysis.analyse.
+	Expects 'file_path', 'to_file', 'processes', 'use_state' and 'global_duplicates'. """
+	log_file_analysis.analyse(args.file_path, args.to_file, util.prtr.Printer(),
+		processes=args.processes, use_state=args.use_state,
+		global_duplicates=args.global_duplicates)
 
 
 
@@ -283,7 +342,7 @@ if __name__ == "__main__":
 		MODE_GROUP.add_argument("--in-chunks", "-c", action="store_true",
 			help="Split into chunks. Specify the number of entries per file with --max-entries-per-file/-m.")
 		SPLIT_PARSER.add_argument("--max-entries-per-file", "-m", type=int,
-			help="Limit the number of entries saved per file.Caution: Significantly slower!")
+			help="Limit the number of entries saved per file.")
 		SPLIT_PARSER.set_defaults(function=split_call)
 
 		SAMPLE_PARSER = SUBPARSERS.add_parser("sample", help="Sample from a log file")
@@ -294,10 +353,21 @@ if __name__ == "__main__":
 			help="Only sample entries of the given data type(s).")
 		SAMPLE_PARSER.set_defaults(function=sample_call)
 
+		INDEX_PARSER = SUBPARSERS.add_parser("index",
+			help="Index the lines of a log file. Sampling uses the index while the file is unchanged.")
+		INDEX_PARSER.add_argument("file_path", metavar="PATH")
+		INDEX_PARSER.set_defaults(function=index_call)
+
 		ANALYSE_PARSER = SUBPARSERS.add_parser("analyse", help="Analyse existing log data")
 		ANALYSE_PARSER.add_argument("file_path", metavar="PATH", help="The file to analyse")
 		ANALYSE_PARSER.add_argument("--to-file", "-f", action="store_true",
 			help="Save the analysis to file.")
+		ANALYSE_PARSER.add_argument("--processes", "-p", type=int, metavar="N",
+			help="Number of worker processes for big files (default: all cores).")
+		ANALYSE_PARSER.add_argument("--full", action="store_false", dest="use_state",
+			help="Ignore a saved analysis state and analyse the whole file.")
+		ANALYSE_PARSER.add_argument("--global-duplicates", "-g", action="store_true",
+			help="Also estimate duplicates among all entries of an app id, not only consecutive ones.")
 		ANALYSE_PARSER.set_defaults(function=analyse_call)
 
 		if len(sys.argv) == 1:
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+""" Unit tests for the command-line tools """
+
+import collections
+import os
+import shutil
+import tempfile
+import unittest
+
+import ids.ids_tools as ids_tools
+import log_file_index
+import tools
+import util.prtr
+
+
+class Tests(unittest.TestCase):
+	""" Tests for tools """
+
+	def setUp(self):
+		""" Write a log file with generated entries. """
+
+		self.temp_dir = tempfile.mkdtemp()
+		self.file_path = os.path.join(self.temp_dir, "log")
+
+		self.lines = [entry.get_log_string() for entry in ids_tools.generate_log_entries(1000)]
+		with open(self.file_path, "w") as file_handle:
+			file_handle.write("\n".join(self.lines) + "\n")
+
+
+	def tearDown(self):
+		shutil.rmtree(self.temp_dir)
+
+
+	def test_split_in_train_and_score(self):
+		""" Lines are copied unchanged and each app id's classes are split according to the split """
+
+		tools._split_in_train_and_score(self.file_path, 70, max_entries_per_file=300)
+
+		training_lines = self._read_lines("log_train", "log_train_1", "log_train_2")
+		scoring_lines = self._read_lines("log_score", "log_score_1")
+		self.assertItemsEqual(training_lines + scoring_lines, self.lines)
+
+		bucket_of = lambda line: (ids_tools.log_string_to_app_id(line), ids_tools.log_string_to_class(line))
+		all_counts = collections.Counter([bucket_of(line) for line in self.lines])
+		training_counts = collections.Counter([bucket_of(line) for line in training_lines])
+
+		for bucket, count in all_counts.items():
+			self.assertEqual(training_counts[bucket], int(count * 0.7))
+
+
+	def test_split_per_app_id_and_in_chunks(self):
+		""" Lines are copied unchanged, routed by app id and cut after the given number of lines """
+
+		tools._split_per_app_id(self.file_path, max_entries_per_file=50)
+
+		for file_name in os.listdir(self.temp_dir):
+			if file_name == "log":
+				continue
+
+			lines = self._read_lines(file_name)
+			self.assertLessEqual(len(lines), 50)
+			self.assertEqual(set([ids_tools.log_string_to_app_id(line) for line in lines]),
+				set([file_name.split("_")[1]]))
+
+		old_buffer_size = tools.WRITE_BUFFER_SIZE
+		try:
+			# Small blocks to cut lines and chunks at block borders
+			tools.WRITE_BUFFER_SIZE = 1000
+
+			chunks_dir = os.path.join(self.temp_dir, "chunks")
+			os.mkdir(chunks_dir)
+			chunks_path = os.path.join(chunks_dir, "log")
+			shutil.copy(self.file_path, chunks_path)
+
+			tools._split_in_chunks(chunks_path, 300)
+		finally:
+			tools.WRITE_BUFFER_SIZE = old_buffer_size
+
+		chunks = [self._read_lines(os.path.join("chunks", "log_{}".format(i))) for i in range(1, 5)]
+		self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100])
+		self.assertEqual(sum(chunks, []), self.lines)
+		self.assertFalse(os.path.lexists(os.path.join(chunks_dir, "log_5")))
+
+
+	def test_split_in_chunks_smaller_than_block(self):
+		""" Many chunks are cut from one block and a last line without line ending is completed """
+
+		with open(self.file_path, "w") as file_handle:
+			file_handle.write("\n".join(self.lines))
+
+		tools._split_in_chunks(self.file_path, 7)
+
+		chunks = [self._read_lines("log_{}".format(i)) for i in range(1, 144)]
+		self.assertEqual([len(chunk) for chunk in chunks], [7] * 142 + [6])
+		self.assertEqual(sum(chunks, []), self.lines)
+		self.assertFalse(os.path.lexists(os.path.join(self.temp_dir, "log_144")))
+
+		with open(os.path.join(self.temp_dir, "log_143"), "r") as file_handle:
+			self.assertTrue(file_handle.read().endswith("\n"))
+
+
+	def test_sample_with_and_without_index(self):
+		""" Samples consist of distinct lines of the file, limited to the given app ids """
+
+		limit_to = ["GAUSSIAN", "POI"]
+
+		tools._sample(self.file_path, 40, limit_to)
+		log_file_index.build_index(self.file_path, util.prtr.Printer(squelch=True))
+		tools._sample(self.file_path, 40, limit_to)
+
+		sample_paths = [name for name in os.listdir(self.temp_dir) if name.startswith("log_40-sample")]
+		self.assertEqual(len(sample_paths), 2)
+
+		for sample_path in sample_paths:
+			lines = self._read_lines(sample_path)
+			self.assertEqual(len(set(lines)), 40)
+			self.assertTrue(set(lines).issubset(self.lines))
+			self.assertTrue(all([ids_tools.log_string_to_app_id(line) in limit_to for line in lines]))
+
+		# A changed file invalidates the index
+		with open(self.file_path, "a") as file_handle:
+			file_handle.write(self.lines[0] + "\n")
+		self.assertIsNone(log_file_index.load_index(self.file_path, util.prtr.Printer(squelch=True)))
+
+
+	def _read_lines(self, *file_names):
+		""" Read the lines of the given files in the temp dir. """
+
+		lines = []
+		for file_name in file_names:
+			with open(os.path.join(self.temp_dir, file_name), "r") as file_handle:
+				lines.extend(file_handle.read().splitlines())
+
+		return lines
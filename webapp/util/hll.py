@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+""" HyperLogLog cardinality estimator """
+
+import base64
+import math
+import zlib
+
+
+class HyperLogLog(object):
+	"""
+	Estimates the number of distinct strings added with a fixed amount of memory (2^precision bytes).
+	The standard error is about 1.04 / sqrt(2^precision) - 0.8 % for the default precision.
+	Estimators with the same precision can be merged.
+	"""
+
+	def __init__(self, precision=14):
+		""" Ctor """
+
+		object.__init__(self)
+
+		if precision < 4 or precision > 16:
+			raise ValueError("Precision must be in [4, 16]")
+
+		self.precision = precision
+		self._register_count = 1 << precision
+		self._rank_bits = 32 - precision
+		self.registers = bytearray(self._register_count)
+
+
+	def add(self, string):
+		""" Add the given string. """
+
+		hash_value = _fmix32(zlib.crc32(string) & 0xffffffff)
+
+		index = hash_value >> self._rank_bits
+		remainder = hash_value & ((1 << self._rank_bits) - 1)
+		# Position of the leftmost one bit in the remaining bits
+		rank = self._rank_bits - remainder.bit_length() + 1
+
+		if rank > self.registers[index]:
+			self.registers[index] = rank
+
+
+	def merge(self, other):
+		""" Merge the given estimator into this one. """
+
+		if other.precision != self.precision:
+			raise ValueError("Can only merge estimators of the same precision")
+
+		registers = self.registers
+		for index, rank in enumerate(other.registers):
+			if rank > registers[index]:
+				registers[index] = rank
+
+
+	def count(self):
+		""" Estimate the number of distinct strings added so far. """
+
+		register_count = self._register_count
+		alpha = 0.7213 / (1 + 1.079 / register_count)
+
+		raw_estimate = alpha * register_count * register_count / sum(
+			[2.0 ** -rank for rank in self.registers])
+
+		# Small range correction: linear counting
+		empty_registers = self.registers.count("\x00")
+		if raw_estimate <= 2.5 * register_count and empty_registers > 0:
+			return int(round(register_count * math.log(float(register_count) / empty_registers)))
+
+		# Large range correction for the 32 bit hash space
+		if raw_estimate > (1 << 32) / 30.0:
+			return int(round(-(1 << 32) * math.log(1 - raw_estimate / (1 << 32))))
+
+		return int(round(raw_estimate))
+
+
+	def to_dict(self):
+		""" Convert this estimator to a JSON-serialisable dict. """
+		return {"precision" : self.precision, "registers" : base64.b64encode(str(self.registers))}
+
+
+	@staticmethod
+	def from_dict(data):
+		""" Create a HyperLogLog from the dict produced by to_dict(). """
+
+		hll = HyperLogLog(data["precision"])
+		hll.registers = bytearray(base64.b64decode(data["registers"]))
+		return hll
+
+
+def _fmix32(value):
+	""" MurmurHash3 finaliser: Spread the bits of the given 32 bit value. """
+
+	value ^= value >> 16
+	value = (value * 0x85ebca6b) & 0xffffffff
+	value ^= value >> 13
+	value = (value * 0xc2b2ae35) & 0xffffffff
+	value ^= value >> 16
+	return value
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+""" Low-overhead counters and histograms with a Prometheus text export """
+
+import bisect
+import contextlib
+import json
+import time
+
+
+# Log-linear bucket bounds in seconds from 10 us to 50 s, similar to an HDR histogram with low precision
+LATENCY_BUCKETS = [
+	round(mantissa * 10.0 ** exponent, 10)
+	for exponent in range(-5, 2)
+	for mantissa in [1, 1.5, 2, 3, 5, 7]
+]
+
+# Powers of two up to 65536 entries
+SIZE_BUCKETS = [2 ** exponent for exponent in range(0, 17)]
+
+
+class Counter(object):
+	""" A monotonically increasing value. """
+
+	def __init__(self):
+		""" Ctor """
+
+		object.__init__(self)
+		self.value = 0
+
+
+	def inc(self, amount=1):
+		""" Increment by the given amount. """
+		self.value += amount
+
+
+class Histogram(object):
+	""" Counts observations per bucket and keeps their sum and maximum. """
+
+	def __init__(self, buckets):
+		""" Ctor """
+
+		object.__init__(self)
+
+		self.buckets = buckets
+		# One more for the values above the last bound
+		self.counts = [0] * (len(buckets) + 1)
+		self.count = 0
+		self.sum = 0
+		self.max = 0
+
+
+	def observe(self, value):
+		""" Add the given value. """
+
+		self.counts[bisect.bisect_left(self.buckets, value)] += 1
+		self.count += 1
+		self.sum += value
+		if value > self.max:
+			self.max = value
+
+
+	@contextlib.contextmanager
+	def time(self):
+		""" Observe the wall time of the enclosed block. """
+
+		start_time = time.time()
+		try:
+			yield
+		finally:
+			self.observe(time.time() - start_time)
+
+
+class Registry(object):
+	"""
+	All metrics of a process by name and labels. Not synchronised: Meant for the gevent
+	server, whose greenlets don't switch while updating a metric.
+	"""
+
+	def __init__(self):
+		""" Ctor """
+
+		object.__init__(self)
+
+		# { name : (type, help text) } in order of registration
+		self._descriptions = {}
+		self._names = []
+		# { (name, ((label, value), ...)) : Counter or Histogram }
+		self._metrics = {}
+
+
+	def counter(self, name, help_text, **labels):
+		""" Get or create the counter with the given name and labels. """
+		return self._get_or_create(name, "counter", help_text, labels, Counter)
+
+
+	def histogram(self, name, help_text, buckets=None, **labels):
+		""" Get or create the histogram with the given name and labels. Uses LATENCY_BUCKETS by default. """
+
+		buckets = LATENCY_BUCKETS if buckets is None else buckets
+		return self._get_or_create(name, "histogram", help_text, labels, lambda: Histogram(buckets))
+
+
+	def _get_or_create(self, name, metric_type, help_text, labels, creator):
+		""" Find the metric of the given name and labels or register a new one. """
+
+		key = (name, tuple(sorted(labels.items())))
+		metric = self._metrics.get(key)
+		if metric is not None:
+			return metric
+
+		if name not in self._descriptions:
+			self._descriptions[name] = (metric_type, help_text)
+			self._names.append(name)
+		elif self._descriptions[name][0] != metric_type:
+			raise ValueError("Metric {} is a {}".format(name, self._descriptions[name][0]))
+
+		metric = creator()
+		self._metrics[key] = metric
+		return metric
+
+
+	def to_prometheus_text(self):
+		""" Export all metrics in the Prometheus text exposition format (version 0.0.4). """
+
+		lines = []
+
+		for name in self._names:
+			metric_type, help_text = self._descriptions[name]
+			lines.append("# HELP {} {}".format(name, help_text))
+			lines.append("# TYPE {} {}".format(name, metric_type))
+
+			for (metric_name, labels), metric in sorted(self._metrics.items()):
+				if metric_name != name:
+					continue
+
+				if metric_type == "counter":
+					lines.append("{}{} {}".format(name, _format_labels(labels), metric.value))
+					continue
+
+				cumulative_count = 0
+				for bound, count in zip(metric.buckets + ["+Inf"], metric.counts):
+					cumulative_count += count
+					lines.append("{}_bucket{} {}".format(
+						name, _format_labels(labels + (("le", bound),)), cumulative_count))
+
+				lines.append("{}_sum{} {}".format(name, _format_labels(labels), repr(metric.sum)))
+				lines.append("{}_count{} {}".format(name, _format_labels(labels), metric.count))
+
+		return "\n".join(lines) + "\n"
+
+
+	def snapshot(self):
+		""" Create a JSON-compatible snapshot of all current values. """
+
+		metrics = []
+		for (name, labels), metric in sorted(self._metrics.items()):
+			entry = {"name" : name, "labels" : dict(labels)}
+
+			if isinstance(metric, Counter):
+				entry["value"] = metric.value
+			else:
+				entry["count"] = metric.count
+				entry["sum"] = metric.sum
+				entry["max"] = metric.max
+				entry["buckets"] = metric.buckets
+				entry["counts"] = metric.counts
+
+			metrics.append(entry)
+
+		return {"time" : time.time(), "metrics" : metrics}
+
+
+	def dump_snapshot(self, file_path):
+		""" Append a snapshot as a JSON line to the given file. """
+
+		with open(file_path, "a") as dump_file:
+			dump_file.write(json.dumps(self.snapshot()) + "\n")
+
+
+def _format_labels(labels):
+	""" Format the given (label, value) tuples as {label="value",...}. """
+
+	if not labels:
+		return ""
+
+	return "{" + ",".join(["{}=\"{}\"".format(label, _format_label_value(value)) for label, value in labels]) + "}"
+
+
+def _format_label_value(value):
+	""" Escape the given label value. Bucket bounds are shown without a trailing '.0'. """
+
+	if isinstance(value, float):
+		value = repr(value)
+		if value.endswith(".0"):
+			value = value[:-2]
+
+	return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+# The metrics of this process
+REGISTRY = Registry()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+""" Unit tests for the metrics """
+
+import unittest
+
+import util.metrics as metrics
+
+
+class Tests(unittest.TestCase):
+	""" Tests for metrics """
+
+	def test_prometheus_text(self):
+		""" Counters and cumulative histogram buckets are exported per label set """
+
+		registry = metrics.Registry()
+
+		registry.counter("requests_total", "Requests", endpoint="/a").inc()
+		registry.counter("requests_total", "Requests", endpoint="/a").inc(2)
+		registry.counter("requests_total", "Requests", endpoint="/b").inc()
+
+		histogram = registry.histogram("batch_size", "Batch sizes", buckets=[1, 10])
+		for value in [1, 5, 50]:
+			histogram.observe(value)
+
+		self.assertEqual(registry.to_prometheus_text().split("\n"), [
+			"# HELP requests_total Requests",
+			"# TYPE requests_total counter",
+			"requests_total{endpoint=\"/a\"} 3",
+			"requests_total{endpoint=\"/b\"} 1",
+			"# HELP batch_size Batch sizes",
+			"# TYPE batch_size histogram",
+			"batch_size_bucket{le=\"1\"} 1",
+			"batch_size_bucket{le=\"10\"} 2",
+			"batch_size_bucket{le=\"+Inf\"} 3",
+			"batch_size_sum 56",
+			"batch_size_count 3",
+			""
+		])
+
+		self.assertEqual(histogram.max, 50)
+
+		with self.assertRaises(ValueError):
+			registry.histogram("requests_total", "Requests", endpoint="/c")
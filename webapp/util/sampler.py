@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+""" Statistical stack sampler driven by SIGPROF """
+
+import os
+import signal
+import time
+
+try:
+	import greenlet
+except ImportError:
+	greenlet = None
+
+
+class StackSampler(object):
+	"""
+	Samples the stack of the main thread every <interval> seconds of CPU time and counts the
+	collapsed stacks, prefixed with the running greenlet. Nothing is installed while inactive.
+	Must be started and stopped from the main thread.
+	"""
+
+	_ACTIVE = None
+
+
+	def __init__(self, interval=0.005):
+		""" Ctor """
+
+		object.__init__(self)
+
+		if interval <= 0:
+			raise ValueError("Interval must be positive valued!")
+
+		self.interval = interval
+		self.sample_count = 0
+		# { collapsed stack : count }
+		self.counts = {}
+		# { code object : frame label }
+		self._labels = {}
+		self._previous_handler = None
+
+
+	def start(self):
+		""" Install the signal handler and start the timer. Only one sampler can run at a time. """
+
+		if StackSampler._ACTIVE is not None:
+			raise ValueError("Another sampler is already running.")
+
+		StackSampler._ACTIVE = self
+
+		self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+		# Restart interrupted system calls instead of failing them with EINTR
+		signal.siginterrupt(signal.SIGPROF, False)
+		signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+
+	def stop(self):
+		""" Stop the timer and restore the previous signal handler. """
+
+		if StackSampler._ACTIVE is not self:
+			return
+
+		signal.setitimer(signal.ITIMER_PROF, 0)
+		signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+		StackSampler._ACTIVE = None
+
+
+	def _sample(self, _, frame):
+		""" Signal handler: Count the stack of the interrupted frame. """
+
+		labels = []
+		while frame is not None:
+			code = frame.f_code
+			label = self._labels.get(code)
+			if label is None:
+				label = "{}:{}".format(os.path.basename(code.co_filename), code.co_name)
+				self._labels[code] = label
+			labels.append(label)
+			frame = frame.f_back
+
+		labels.append(_get_greenlet_label())
+		labels.reverse()
+
+		stack = ";".join(labels)
+		self.counts[stack] = self.counts.get(stack, 0) + 1
+		self.sample_count += 1
+
+
+	def get_collapsed_stacks(self):
+		""" Create the "root;...;leaf count" lines used by flamegraph tools, most frequent first. """
+
+		items = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))
+		return ["{} {}".format(stack, count) for stack, count in items]
+
+
+def profile(seconds, interval=0.005, sleep=time.sleep):
+	"""
+	Sample for the given number of seconds.
+	*sleep: Function to wait with - gevent.sleep lets the other greenlets run meanwhile.
+	returns: The StackSampler
+	"""
+
+	sampler = StackSampler(interval)
+	sampler.start()
+	try:
+		sleep(seconds)
+	finally:
+		sampler.stop()
+
+	return sampler
+
+
+def _get_greenlet_label():
+	""" Describe the running greenlet by its type and the function it runs. """
+
+	if greenlet is None:
+		return "greenlet:none"
+
+	current = greenlet.getcurrent()
+	if current.parent is None:
+		return "greenlet:main"
+
+	run = getattr(current, "_run", None) or getattr(current, "run", None)
+	run_name = getattr(run, "__name__", None)
+
+	if run_name is None:
+		return "greenlet:{}".format(type(current).__name__)
+
+	return "greenlet:{}({})".format(type(current).__name__, run_name)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+""" Unit tests for the stack sampler """
+
+import signal
+import time
+import unittest
+
+import util.sampler as sampler
+
+
+def _spin(seconds):
+	""" Burn CPU time, as the sampler's timer doesn't run while sleeping. """
+
+	end_time = time.time() + seconds
+	while time.time() < end_time:
+		pass
+
+
+class Tests(unittest.TestCase):
+	""" Tests for sampler """
+
+	def test_profile(self):
+		""" The busy function shows up in the collapsed stacks. """
+
+		result = sampler.profile(0.3, interval=0.001, sleep=_spin)
+
+		self.assertGreater(result.sample_count, 0)
+		self.assertEqual(sum(result.counts.values()), result.sample_count)
+
+		for line in result.get_collapsed_stacks():
+			stack, count = line.rsplit(" ", 1)
+			self.assertTrue(stack.startswith("greenlet:"))
+			self.assertGreater(int(count), 0)
+
+		self.assertTrue(any(["sampler_tests.py:_spin" in line for line in result.get_collapsed_stacks()]))
+
+
+	def test_inactive(self):
+		""" The signal handler is only installed while sampling and only once at a time. """
+
+		handler = signal.getsignal(signal.SIGPROF)
+
+		stack_sampler = sampler.StackSampler()
+		stack_sampler.start()
+		try:
+			with self.assertRaises(ValueError):
+				sampler.StackSampler().start()
+		finally:
+			stack_sampler.stop()
+
+		self.assertEqual(signal.getsignal(signal.SIGPROF), handler)
+		self.assertEqual(signal.getitimer(signal.ITIMER_PROF), (0.0, 0.0))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -11,7 +11,8 @@ monkey.patch_all()
 import argparse
 import random
 import time
-from bottle import post, get, run, request, BaseResponse
+from bottle import post, get, run, request, response, install, BaseResponse
+import gevent
 
 from log_entry import LogEntry
 from state_dao import StateDao
@@ -20,6 +21,8 @@ from functionality.country_code_mapper import CountryCodeMapper
 from functionality.poi_mapper import PoiMapper
 from functionality.routing_mapper import RoutingMapper
 import util.fmtr
+import util.metrics
+import util.sampler
 
 
 DAO = None
@@ -28,6 +31,8 @@ IDS = None
 # Configuration
 DETECT = True
 STORE = True
+# Longest profile /UTIL/profile runs
+MAX_PROFILE_SECONDS = 300
 
 
 ### API endpoints ###
@@ -157,6 +162,41 @@ def get_tsp_routing():
 
 ### UTIL zone
 
+@get("/UTIL/metrics")
+def get_metrics():
+	""" Export the metrics of this server in the Prometheus text format. """
+
+	response.content_type = "text/plain; version=0.0.4"
+	return util.metrics.REGISTRY.to_prometheus_text()
+
+
+@get("/UTIL/profile")
+def get_profile():
+	"""
+	Sample the stacks of the server for <seconds> (default: 10) and return them collapsed
+	("greenlet;frame;...;frame count" per line) for flamegraph tools. Optional: <interval> in ms of CPU time.
+	"""
+
+	try:
+		seconds = float(request.params.seconds or 10)
+		interval = float(request.params.interval or 5) / 1000
+	except ValueError:
+		return BaseResponse(body="Invalid seconds or interval.", status=400)
+
+	if not 0 < seconds <= MAX_PROFILE_SECONDS or interval <= 0:
+		return BaseResponse(body="Seconds must be in (0, {}] and the interval positive.".format(
+			MAX_PROFILE_SECONDS), status=400)
+
+	try:
+		# Sleeping lets the other greenlets run while being sampled
+		sampler = util.sampler.profile(seconds, interval, sleep=gevent.sleep)
+	except ValueError as error:
+		return BaseResponse(body=error.message, status=409)
+
+	response.content_type = "text/plain"
+	return "\n".join(sampler.get_collapsed_stacks()) + "\n"
+
+
 @get("/UTIL/log-length")
 def get_log_length():
 	""" Count the number of log entries and return the number. """
@@ -261,6 +301,51 @@ def _create_client_time(identifier):
 
 
 
+### Metrics
+
+
+class MetricsPlugin(object):
+	""" Bottle plugin counting the requests and measuring the handling time per endpoint. """
+
+	name = "metrics"
+	api = 2
+
+
+	# pylint: disable-msg=R0201; (Method could be a function)
+	def apply(self, callback, route):
+		""" Wrap the given route's callback. """
+
+		registry = util.metrics.REGISTRY
+		requests_total = registry.counter(
+			"web_api_requests_total", "Number of handled requests", endpoint=route.rule)
+		errors_total = registry.counter(
+			"web_api_request_errors_total", "Number of requests that raised an error", endpoint=route.rule)
+		request_seconds = registry.histogram(
+			"web_api_request_seconds", "Time to handle a request", endpoint=route.rule)
+
+		def _wrapper(*args, **kwargs):
+			start_time = time.time()
+			try:
+				return callback(*args, **kwargs)
+			except Exception:
+				errors_total.inc()
+				raise
+			finally:
+				requests_total.inc()
+				request_seconds.observe(time.time() - start_time)
+
+		return _wrapper
+
+
+def _dump_metrics_periodically(file_path, interval):
+	""" Append a snapshot of all metrics to the given file every <interval> seconds. """
+
+	while True:
+		gevent.sleep(interval)
+		util.metrics.REGISTRY.dump_snapshot(file_path)
+
+
+
 ### Handling log entries
 
 
@@ -288,6 +373,9 @@ PARSER.add_argument("--dont-store", "-s", action="store_false", dest="store")
 PARSER.add_argument("--flush-frequency", "-f", type=int, metavar="S")
 PARSER.add_argument("--max-entries-in-state", "-m", type=int, metavar="N")
 PARSER.add_argument("--total-max-entries", "-t", type=int, metavar="N", help="Max. total entries")
+PARSER.add_argument("--metrics-dump", metavar="FILE", help="Append metrics snapshots (JSON lines) to FILE")
+PARSER.add_argument("--metrics-interval", type=int, default=60, metavar="S",
+	help="Seconds between metrics snapshots (default: 60)")
 ARGS = PARSER.parse_args()
 
 DETECT = ARGS.detect
@@ -325,4 +413,8 @@ with StateDao(verbose=ARGS.verbose,
 	if DETECT:
 		IDS = LiveIds(verbose=ARGS.verbose)
 
+	install(MetricsPlugin())
+	if ARGS.metrics_dump:
+		gevent.spawn(_dump_metrics_periodically, ARGS.metrics_dump, ARGS.metrics_interval)
+
 	run(server="gevent", host="localhost", port=5000, quiet=(not ARGS.verbose))